@@ -26,6 +26,9 @@ Usage:
         registry=loaded_registry_dict,
         log=[]
     )
+
+Every function takes an optional PartStore (parts=). Without one, parts are
+read from and written back to target_extract_dir as before.
 """
 
 from __future__ import annotations
@@ -34,6 +37,8 @@ import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from part_store import PartStore, open_part_store
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # docDefaults application
@@ -119,7 +124,8 @@ def apply_doc_defaults(
 def apply_theme(
     target_extract_dir: Path,
     registry: Dict[str, Any],
-    log: List[str]
+    log: List[str],
+    parts: Optional[PartStore] = None
 ) -> None:
     """
     Copy theme1.xml from registry to target.
@@ -135,31 +141,34 @@ def apply_theme(
         log.append("No theme in registry; skipping theme application")
         return
     
-    theme_dir = target_extract_dir / "word" / "theme"
-    theme_dir.mkdir(parents=True, exist_ok=True)
-    
-    theme_path = theme_dir / "theme1.xml"
-    
-    # Check if target already has a theme
-    if theme_path.exists():
-        log.append("Replacing target theme1.xml with architect theme")
-    else:
-        log.append("Adding theme1.xml from architect (none existed)")
-        # May need to update [Content_Types].xml and relationships
-        _ensure_theme_in_content_types(target_extract_dir, log)
-        _ensure_theme_in_rels(target_extract_dir, log)
-    
-    theme_path.write_text(theme_xml, encoding="utf-8")
+    with open_part_store(target_extract_dir, parts) as store:
+        # Check if target already has a theme
+        if store.exists("word/theme/theme1.xml"):
+            log.append("Replacing target theme1.xml with architect theme")
+        else:
+            log.append("Adding theme1.xml from architect (none existed)")
+            # May need to update [Content_Types].xml and relationships
+            _ensure_theme_in_content_types(target_extract_dir, log, parts=store)
+            _ensure_theme_in_rels(target_extract_dir, log, parts=store)
+
+        store.set_text("word/theme/theme1.xml", theme_xml)
 
 
-def _ensure_theme_in_content_types(extract_dir: Path, log: List[str]) -> None:
+def _ensure_theme_in_content_types(
+    extract_dir: Path,
+    log: List[str],
+    parts: Optional[PartStore] = None
+) -> None:
     """Ensure [Content_Types].xml has an entry for theme1.xml."""
-    ct_path = extract_dir / "[Content_Types].xml"
-    if not ct_path.exists():
-        return
-    
-    ct_xml = ct_path.read_text(encoding="utf-8")
-    
+    with open_part_store(extract_dir, parts) as store:
+        ct_xml = store.get_text("[Content_Types].xml")
+        if ct_xml is None:
+            return
+        _add_theme_content_type(store, ct_xml, log)
+
+
+def _add_theme_content_type(store: PartStore, ct_xml: str, log: List[str]) -> None:
+    """Add the theme1.xml Override to [Content_Types].xml if missing."""
     # Check if theme override already exists
     if 'PartName="/word/theme/theme1.xml"' in ct_xml:
         return
@@ -173,18 +182,25 @@ def _ensure_theme_in_content_types(extract_dir: Path, log: List[str]) -> None:
     # Insert before </Types>
     if "</Types>" in ct_xml:
         ct_xml = ct_xml.replace("</Types>", f"  {theme_override}\n</Types>")
-        ct_path.write_text(ct_xml, encoding="utf-8")
+        store.set_text("[Content_Types].xml", ct_xml)
         log.append("Added theme1.xml to [Content_Types].xml")
 
 
-def _ensure_theme_in_rels(extract_dir: Path, log: List[str]) -> None:
+def _ensure_theme_in_rels(
+    extract_dir: Path,
+    log: List[str],
+    parts: Optional[PartStore] = None
+) -> None:
     """Ensure word/_rels/document.xml.rels has a relationship for theme."""
-    rels_path = extract_dir / "word" / "_rels" / "document.xml.rels"
-    if not rels_path.exists():
-        return
-    
-    rels_xml = rels_path.read_text(encoding="utf-8")
-    
+    with open_part_store(extract_dir, parts) as store:
+        rels_xml = store.get_text("word/_rels/document.xml.rels")
+        if rels_xml is None:
+            return
+        _add_theme_relationship(store, rels_xml, log)
+
+
+def _add_theme_relationship(store: PartStore, rels_xml: str, log: List[str]) -> None:
+    """Add a theme relationship to document.xml.rels if missing."""
     # Check if theme relationship exists
     if 'Target="theme/theme1.xml"' in rels_xml:
         return
@@ -202,7 +218,7 @@ def _ensure_theme_in_rels(extract_dir: Path, log: List[str]) -> None:
     
     if "</Relationships>" in rels_xml:
         rels_xml = rels_xml.replace("</Relationships>", f"  {theme_rel}\n</Relationships>")
-        rels_path.write_text(rels_xml, encoding="utf-8")
+        store.set_text("word/_rels/document.xml.rels", rels_xml)
         log.append(f"Added theme relationship ({new_rid}) to document.xml.rels")
 
 
@@ -213,7 +229,8 @@ def _ensure_theme_in_rels(extract_dir: Path, log: List[str]) -> None:
 def apply_settings(
     target_extract_dir: Path,
     registry: Dict[str, Any],
-    log: List[str]
+    log: List[str],
+    parts: Optional[PartStore] = None
 ) -> None:
     """
     Apply settings.xml from registry, focusing on compat flags.
@@ -231,13 +248,16 @@ def apply_settings(
         log.append("No compat flags in registry; skipping settings application")
         return
     
-    settings_path = target_extract_dir / "word" / "settings.xml"
-    if not settings_path.exists():
-        log.append("Target has no settings.xml; skipping compat application")
-        return
-    
-    settings_xml = settings_path.read_text(encoding="utf-8")
-    
+    with open_part_store(target_extract_dir, parts) as store:
+        settings_xml = store.get_text("word/settings.xml")
+        if settings_xml is None:
+            log.append("Target has no settings.xml; skipping compat application")
+            return
+        store.set_text("word/settings.xml", _apply_compat(settings_xml, compat_xml, log))
+
+
+def _apply_compat(settings_xml: str, compat_xml: str, log: List[str]) -> str:
+    """Replace (or insert) the <w:compat> block in settings.xml."""
     # Find and replace existing <w:compat> block
     existing_compat = re.search(r'<w:compat\b[\s\S]*?</w:compat>', settings_xml)
     
@@ -253,7 +273,7 @@ def apply_settings(
             )
             log.append("Inserted compat flags from architect")
     
-    settings_path.write_text(settings_xml, encoding="utf-8")
+    return settings_xml
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -263,7 +283,8 @@ def apply_settings(
 def apply_font_table(
     target_extract_dir: Path,
     registry: Dict[str, Any],
-    log: List[str]
+    log: List[str],
+    parts: Optional[PartStore] = None
 ) -> None:
     """
     Merge font declarations from registry into target fontTable.xml.
@@ -278,17 +299,18 @@ def apply_font_table(
         log.append("No fontTable in registry; skipping font table application")
         return
     
-    font_path = target_extract_dir / "word" / "fontTable.xml"
-    
-    if not font_path.exists():
-        # Just copy the architect's font table
-        font_path.write_text(arch_font_xml, encoding="utf-8")
-        log.append("Added fontTable.xml from architect")
-        return
-    
-    # Merge: add fonts from architect that don't exist in target
-    target_font_xml = font_path.read_text(encoding="utf-8")
-    
+    with open_part_store(target_extract_dir, parts) as store:
+        target_font_xml = store.get_text("word/fontTable.xml")
+        if target_font_xml is None:
+            # Just copy the architect's font table
+            store.set_text("word/fontTable.xml", arch_font_xml)
+            log.append("Added fontTable.xml from architect")
+            return
+        store.set_text("word/fontTable.xml", _merge_font_table(target_font_xml, arch_font_xml, log))
+
+
+def _merge_font_table(target_font_xml: str, arch_font_xml: str, log: List[str]) -> str:
+    """Merge: add fonts from architect that don't exist in target."""
     # Extract font names from both
     target_fonts = set(re.findall(r'<w:font\s+w:name="([^"]+)"', target_font_xml))
     arch_fonts = re.findall(r'(<w:font\s+w:name="([^"]+)"[\s\S]*?</w:font>)', arch_font_xml)
@@ -300,7 +322,7 @@ def apply_font_table(
     
     if not fonts_to_add:
         log.append("All architect fonts already present in target fontTable")
-        return
+        return target_font_xml
     
     # Insert before </w:fonts>
     if "</w:fonts>" in target_font_xml:
@@ -309,9 +331,10 @@ def apply_font_table(
             "</w:fonts>",
             f"{insertion}\n</w:fonts>"
         )
-        font_path.write_text(target_font_xml, encoding="utf-8")
         log.append(f"Added {len(fonts_to_add)} font declarations from architect")
 
+    return target_font_xml
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Style materialization helpers (for styles not already in target)
@@ -465,6 +488,7 @@ def apply_environment_to_target(
     apply_settings_flag: bool = True,
     apply_doc_defaults_flag: bool = True,
     apply_fonts_flag: bool = True,
+    parts: Optional[PartStore] = None,
 ) -> None:
     """
     Apply the formatting environment from arch_template_registry to target.
@@ -480,9 +504,26 @@ def apply_environment_to_target(
         registry: Loaded arch_template_registry.json
         log: List to append log messages
         apply_*: Flags to selectively disable parts of application
+        parts: Shared PartStore; if None, results are written to target_extract_dir
     """
     target_extract_dir = Path(target_extract_dir)
-    
+    with open_part_store(target_extract_dir, parts) as store:
+        _apply_environment(
+            target_extract_dir, registry, log, store,
+            apply_theme_flag, apply_settings_flag, apply_doc_defaults_flag, apply_fonts_flag
+        )
+
+
+def _apply_environment(
+    target_extract_dir: Path,
+    registry: Dict[str, Any],
+    log: List[str],
+    store: PartStore,
+    apply_theme_flag: bool,
+    apply_settings_flag: bool,
+    apply_doc_defaults_flag: bool,
+    apply_fonts_flag: bool,
+) -> None:
     log.append("=" * 60)
     log.append("BEGIN ENVIRONMENT APPLICATION")
     log.append("=" * 60)
@@ -490,32 +531,31 @@ def apply_environment_to_target(
     # 1. Theme
     if apply_theme_flag:
         log.append("\n[1/4] Applying theme...")
-        apply_theme(target_extract_dir, registry, log)
+        apply_theme(target_extract_dir, registry, log, parts=store)
     else:
         log.append("\n[1/4] Theme application skipped")
     
     # 2. Settings/compat
     if apply_settings_flag:
         log.append("\n[2/4] Applying settings/compat...")
-        apply_settings(target_extract_dir, registry, log)
+        apply_settings(target_extract_dir, registry, log, parts=store)
     else:
         log.append("\n[2/4] Settings application skipped")
     
     # 3. Font table
     if apply_fonts_flag:
         log.append("\n[3/4] Applying font table...")
-        apply_font_table(target_extract_dir, registry, log)
+        apply_font_table(target_extract_dir, registry, log, parts=store)
     else:
         log.append("\n[3/4] Font table application skipped")
     
     # 4. docDefaults in styles.xml
     if apply_doc_defaults_flag:
         log.append("\n[4/4] Applying docDefaults...")
-        styles_path = target_extract_dir / "word" / "styles.xml"
-        if styles_path.exists():
-            styles_xml = styles_path.read_text(encoding="utf-8")
+        styles_xml = store.get_text("word/styles.xml")
+        if styles_xml is not None:
             styles_xml = apply_doc_defaults(styles_xml, registry, log)
-            styles_path.write_text(styles_xml, encoding="utf-8")
+            store.set_text("word/styles.xml", styles_xml)
         else:
             log.append("WARNING: No styles.xml in target; cannot apply docDefaults")
     else:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+determinism_check.py — Byte-identical output check for --deterministic-ids
+
+With --deterministic-ids, a Phase 2 apply of the same DOCX, template and
+classifications must write the same bytes every time. That covers the
+numbering nsid/durableId values and every ZIP entry, including parts the
+patch adds (theme1.xml on a target without a theme).
+
+For each bundled spec, a theme-less copy is made (theme part, relationship
+and content-type override removed), then applied twice against the bundled
+architect extract. The runs are more than two seconds apart, the resolution
+of ZIP timestamps, so a wall-clock date_time would show up. Exits 1 if any
+pair of outputs differs.
+
+Usage:
+    python determinism_check.py
+    python determinism_check.py --arch-extract NVES_extracted --specs MECH_SPEC.docx
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import List
+
+
+REPO_DIR = Path(__file__).resolve().parent
+BUNDLED_SPECS = ("FIRE_SPEC.docx", "MECH_SPEC.docx", "PLUMB_SPEC.docx")
+BUNDLED_CLASSIFICATIONS = "phase2_classifications.json"
+BUNDLED_ARCH_EXTRACT = "NVES_extracted"
+
+THEME_PART = "word/theme/theme1.xml"
+_THEME_REL_RX = re.compile(r'<Relationship\b[^>]*Target="theme/theme1\.xml"[^>]*/>')
+_THEME_OVERRIDE_RX = re.compile(r'<Override\b[^>]*PartName="/word/theme/theme1\.xml"[^>]*/>\s*')
+
+
+def write_themeless_copy(src_docx: Path, out_docx: Path) -> None:
+    with zipfile.ZipFile(src_docx, "r") as zin, zipfile.ZipFile(out_docx, "w") as zout:
+        for info in zin.infolist():
+            if info.filename == THEME_PART:
+                continue
+            data = zin.read(info.filename)
+            if info.filename == "word/_rels/document.xml.rels":
+                data = _THEME_REL_RX.sub("", data.decode("utf-8")).encode("utf-8")
+            elif info.filename == "[Content_Types].xml":
+                data = _THEME_OVERRIDE_RX.sub("", data.decode("utf-8")).encode("utf-8")
+            zout.writestr(info, data, compress_type=info.compress_type)
+
+
+def apply_once(docx: Path, arch_extract: Path, classifications: Path, out_docx: Path, extract_dir: Path) -> str:
+    subprocess.run(
+        [
+            sys.executable, str(REPO_DIR / "docx_decomposer.py"), str(docx),
+            "--extract-dir", str(extract_dir),
+            "--phase2-arch-extract", str(arch_extract),
+            "--phase2-classifications", str(classifications),
+            "--output-docx", str(out_docx),
+            "--template-pack-cache-dir", str(extract_dir.parent / "_template_packs"),
+            "--deterministic-ids",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return hashlib.sha256(out_docx.read_bytes()).hexdigest()
+
+
+def differing_entries(a: Path, b: Path) -> List[str]:
+    with zipfile.ZipFile(a) as za, zipfile.ZipFile(b) as zb:
+        ia = {i.filename: (i.date_time, i.CRC) for i in za.infolist()}
+        ib = {i.filename: (i.date_time, i.CRC) for i in zb.infolist()}
+    return sorted(n for n in set(ia) | set(ib) if ia.get(n) != ib.get(n))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check that --deterministic-ids applies are byte-identical")
+    parser.add_argument("--arch-extract", default=str(REPO_DIR / BUNDLED_ARCH_EXTRACT), help="Architect extracted folder")
+    parser.add_argument("--classifications", default=str(REPO_DIR / BUNDLED_CLASSIFICATIONS), help="Classifications JSON")
+    parser.add_argument("--specs", nargs="+", default=list(BUNDLED_SPECS), help="Spec DOCX files (relative to the repo)")
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        for name in args.specs:
+            docx = work / Path(name).name
+            write_themeless_copy(REPO_DIR / name, docx)
+            outs = []
+            for run in (1, 2):
+                if run == 2:
+                    time.sleep(2.1)
+                out = work / f"{docx.stem}_run{run}.docx"
+                digest = apply_once(
+                    docx, Path(args.arch_extract), Path(args.classifications), out, work / f"{docx.stem}_x{run}"
+                )
+                outs.append((out, digest))
+            (a, da), (b, db) = outs
+            if da == db:
+                print(f"{name}: identical ({da[:12]})")
+            else:
+                failed += 1
+                print(f"{name}: DIFFERENT; entries: {', '.join(differing_entries(a, b)) or 'ZIP layout only'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,17 +11,72 @@ reconstruct the original document from the extracted components.
 import zipfile
 import os
 import shutil
+import fnmatch
 from pathlib import Path
 from datetime import datetime
 import xml.etree.ElementTree as ET
 import hashlib
+import time
 from dataclasses import dataclass 
-from typing import Dict, Any, List, Set, Tuple, Optional
+from typing import Dict, Any, List, Set, Tuple, Optional, Union
 import json
 import difflib
 import re
 import html
 from arch_env_applier import apply_environment_to_target
+from extract_cache import default_extract_cache_dir, ensure_cached_extract
+from output_cache import (
+    DEFAULT_MAX_AGE_DAYS,
+    DEFAULT_MAX_BYTES,
+    OUTPUT_CACHE_DIRNAME,
+    default_output_cache_dir,
+    evict_phase2_outputs,
+    lookup_phase2_output,
+    phase2_output_key,
+    phase2_output_options,
+    restore_phase2_output,
+    store_phase2_output,
+)
+from paragraph_index import (
+    ParagraphEdits,
+    ParagraphIndex,
+    paragraph_text_from_block,
+    paragraph_contains_sectpr,
+    paragraph_pstyle_from_block,
+    paragraph_numpr_from_block,
+)
+from paragraph_sidecar import (
+    PARAGRAPH_SIDECAR_NAME,
+    index_from_sidecar,
+    load_paragraph_sidecar,
+    sidecar_drift,
+    write_paragraph_sidecar,
+    write_sidecar,
+)
+from part_store import PartStore
+from role_cache import (
+    CACHED_CLASSIFICATIONS_NAME,
+    DEFAULT_MIN_SKIP_HITS,
+    ROLE_CACHE_NAME,
+    RoleCache,
+    default_role_cache_path,
+)
+from rule_classifier import DEFAULT_MIN_CONFIDENCE, RULE_CLASSIFICATIONS_NAME, RuleClassifier
+from revision_carryover import (
+    CARRIED_CLASSIFICATIONS_NAME,
+    MERGED_CLASSIFICATIONS_NAME,
+    carry_over_classifications,
+    load_previous_revision,
+    merge_classifications,
+)
+from phase2_profile import (
+    PHASE2_PROFILE_NAME,
+    PHASE2_TIMINGS_NAME,
+    StageTimer,
+    maybe_profile,
+    memory_checkpoint,
+)
+from style_index import FORCE_RPR_TAGS, StyleIndex
 
 try:
     from numbering_importer import import_numbering
@@ -109,6 +164,10 @@ IMPORTANT:
 
 
 
+# Parts that Phase 2 must never change (checked by snapshot/verify_stability)
+PHASE2_STABILITY_PART_PATTERNS = ["word/header*.xml", "word/footer*.xml"]
+
+
 class DocxDecomposer:
     def __init__(self, docx_path):
         """
@@ -120,23 +179,41 @@ class DocxDecomposer:
         self.docx_path = Path(docx_path)
         self.extract_dir = None
         self.markdown_report = []
+        self.lazy = False
+        self.cache_entry: Optional[Path] = None
+        self._part_names: Optional[List[str]] = None
         
-    def extract(self, output_dir=None):
+    def extract(self, output_dir=None, lazy=False, cache_dir=None):
         """
         Extract the .docx file to a directory.
         
         Args:
             output_dir: Directory to extract to. If None, creates a directory
                     based on the docx filename.
+            lazy: If True, only create the workspace; parts are written to their
+                  usual place in the folder layout the first time a stage asks
+                  for them via ensure_part()/ensure_parts(). Media, embedded
+                  objects etc. that no stage reads are never written.
+            cache_dir: If given, the package is extracted once into this
+                  content-addressed cache (see extract_cache.py) and parts are
+                  read from there. output_dir is then only the job's overlay:
+                  it is never deleted, and only changed parts and reports are
+                  written to it.
         
         Returns:
             Path to the extraction directory
         """
-        if output_dir is None:
-            base_name = self.docx_path.stem
-            output_dir = Path(f"{base_name}_extracted")
-        else:
-            output_dir = Path(output_dir)
+        output_dir = Path(output_dir) if output_dir is not None else self.default_extract_dir()
+
+        if cache_dir is not None:
+            cache_log: List[str] = []
+            self.cache_entry = ensure_cached_extract(self.docx_path, Path(cache_dir), log=cache_log)
+            for line in cache_log:
+                print(line)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self.extract_dir = output_dir
+            self.lazy = True
+            return output_dir
         
         # Remove existing directory if it exists (OneDrive-safe)
         if output_dir.exists():
@@ -158,15 +235,92 @@ class DocxDecomposer:
                         output_dir.rename(backup)
         
         output_dir.mkdir(parents=True, exist_ok=True)
+        self.extract_dir = output_dir
+        self.lazy = lazy
+
+        if lazy:
+            names = self.part_names()
+            print(f"Lazy workspace {output_dir}: {len(names)} parts, extracted on demand")
+            return output_dir
         
         # Extract the ZIP archive
         print(f"Extracting {self.docx_path} to {output_dir}...")
         with zipfile.ZipFile(self.docx_path, 'r') as zip_ref:
             zip_ref.extractall(output_dir)
+            item_count = len(zip_ref.infolist())
         
-        self.extract_dir = output_dir
-        print(f"Extraction complete: {len(list(output_dir.rglob('*')))} items extracted")
+        print(f"Extraction complete: {item_count} items extracted")
         return output_dir
+
+    def default_extract_dir(self) -> Path:
+        """Where extract() puts the workspace when no output_dir is given."""
+        return Path(f"{self.docx_path.stem}_extracted")
+
+    def part_names(self) -> List[str]:
+        """Internal paths of every part in the source package."""
+        if self._part_names is None:
+            with zipfile.ZipFile(self.docx_path, 'r') as zip_ref:
+                self._part_names = zip_ref.namelist()
+        return self._part_names
+
+    def ensure_part(self, internal_path: str) -> Optional[Path]:
+        """
+        Return the on-disk path of a part, extracting it first in lazy mode.
+        Returns None if the part is neither on disk nor in the package.
+        """
+        if self.extract_dir is None:
+            raise RuntimeError("ensure_part() called before extract()")
+        if self.cache_entry is not None:
+            path = self.cache_entry / internal_path
+            return path if path.exists() else None
+
+        path = self.extract_dir / internal_path
+        if path.exists() or not self.lazy:
+            return path if path.exists() else None
+
+        if internal_path not in self.part_names():
+            return None
+        with zipfile.ZipFile(self.docx_path, 'r') as zip_ref:
+            zip_ref.extract(internal_path, self.extract_dir)
+        return path
+
+    def ensure_parts(self, patterns: List[str]) -> List[Path]:
+        """
+        ensure_part() for every package part matching any of the glob patterns
+        (e.g. "word/header*.xml"). Opens the package once.
+        """
+        if self.extract_dir is None:
+            raise RuntimeError("ensure_parts() called before extract()")
+        if self.cache_entry is not None:
+            return [p for pat in patterns for p in self.cache_entry.glob(pat)]
+        if not self.lazy:
+            return [p for pat in patterns for p in self.extract_dir.glob(pat)]
+
+        wanted = [
+            n for n in self.part_names()
+            if any(fnmatch.fnmatchcase(n, pat) for pat in patterns)
+        ]
+        todo = [n for n in wanted if not (self.extract_dir / n).exists()]
+        if todo:
+            with zipfile.ZipFile(self.docx_path, 'r') as zip_ref:
+                for name in todo:
+                    zip_ref.extract(name, self.extract_dir)
+        return [self.extract_dir / n for n in wanted]
+
+    def read_part_bytes(self, internal_path: str) -> Optional[bytes]:
+        """Read a part from the workspace if present, else straight from the package (no disk write)."""
+        if self.cache_entry is not None:
+            # The overlay only holds this job's outputs; sources come from the cache
+            path = self.cache_entry / internal_path
+            return path.read_bytes() if internal_path in self.part_names() else None
+        if self.extract_dir is not None:
+            path = self.extract_dir / internal_path
+            if path.exists():
+                return path.read_bytes()
+        if internal_path not in self.part_names():
+            return None
+        with zipfile.ZipFile(self.docx_path, 'r') as zip_ref:
+            return zip_ref.read(internal_path)
     
 
 def main():
@@ -186,16 +340,136 @@ def main():
 
     # Reuse existing extracted folder
     parser.add_argument("--use-extract-dir", default=None, help="Use an existing extracted folder (skip extract/delete)")
+    parser.add_argument(
+        "--lazy-extract",
+        action="store_true",
+        help="Only write the parts each stage reads (skips media, embeddings, customXml)"
+    )
+    parser.add_argument(
+        "--extract-cache",
+        action="store_true",
+        help="Extract each DOCX once into a cache keyed by its SHA-256; the extract dir only "
+             "receives this run's changed parts and reports (never deleted)"
+    )
+    parser.add_argument(
+        "--extract-cache-dir",
+        default=None,
+        help="Where --extract-cache keeps extracted packages (default: <docx folder>/_extract_cache)"
+    )
 
     # Phase 2
     parser.add_argument("--phase2-arch-extract", help="Architect extracted folder")
     parser.add_argument("--phase2-discipline", default="mechanical", help="mechanical|plumbing")
     parser.add_argument("--phase2-classifications", help="Phase 2 LLM output JSON")
+    parser.add_argument(
+        "--phase2-template-pack",
+        default=None,
+        help="Precompiled architect template pack (see template_pack.py); replaces --phase2-arch-extract"
+    )
+    parser.add_argument(
+        "--template-pack-cache-dir",
+        default=None,
+        help="Where compiled template packs are cached (default: <docx folder>/_template_packs)"
+    )
+    parser.add_argument(
+        "--deterministic-ids",
+        action="store_true",
+        help="Derive imported numbering nsid/durableId values from content hashes instead of "
+             "random values, so identical inputs give byte-identical output"
+    )
+    parser.add_argument(
+        "--output-cache",
+        action="store_true",
+        help="Reuse the formatted DOCX and log of an earlier apply with the same DOCX, template, "
+             "classifications and tool version (skips extraction entirely)"
+    )
+    parser.add_argument(
+        "--output-cache-dir",
+        default=None,
+        help=f"Where --output-cache keeps outputs (default: <docx folder>/{OUTPUT_CACHE_DIRNAME})"
+    )
+    parser.add_argument(
+        "--output-cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1 << 20),
+        help="Evict least recently used outputs beyond this size (0 = no limit)"
+    )
+    parser.add_argument(
+        "--output-cache-max-age-days",
+        type=float,
+        default=DEFAULT_MAX_AGE_DAYS,
+        help="Evict outputs not used for this many days (0 = no limit)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Also write a cProfile dump of the Phase 2 apply (phase2_profile.prof in the extract dir)"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record peak/retained memory and top allocation sites per stage in phase2_timings.json (slower)"
+    )
     parser.add_argument(
         "--phase2-build-bundle",
         action="store_true",
         help="Write Phase 2 slim bundle for LLM classification"
     )
+    parser.add_argument(
+        "--phase2-previous",
+        default=None,
+        help="Previous revision of this spec (its source .docx, or the paragraph sidecar from its "
+             "bundle); with --phase2-build-bundle only new or changed paragraphs are bundled"
+    )
+    parser.add_argument(
+        "--phase2-previous-classifications",
+        default=None,
+        help="Classifications JSON the previous revision was applied with (required with --phase2-previous)"
+    )
+    parser.add_argument(
+        "--phase2-carried-classifications",
+        action="append",
+        default=None,
+        help=f"Pre-filled classifications ({CARRIED_CLASSIFICATIONS_NAME}, {CACHED_CLASSIFICATIONS_NAME}, "
+             f"{RULE_CLASSIFICATIONS_NAME}) "
+             f"to merge with --phase2-classifications at apply time; may be repeated"
+    )
+    parser.add_argument(
+        "--phase2-rule-classifier",
+        action="store_true",
+        help="Pre-classify unambiguous paragraphs (section numbers, PART headings, outline styles) "
+             "with deterministic rules and leave them out of the bundle"
+    )
+    parser.add_argument(
+        "--phase2-rule-min-confidence",
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help="Lowest rule confidence --phase2-rule-classifier accepts (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--role-cache",
+        action="store_true",
+        help="Pre-fill roles of paragraphs seen in earlier documents when building the bundle, "
+             "and record the roles of every apply"
+    )
+    parser.add_argument(
+        "--role-cache-db",
+        default=None,
+        help=f"Role cache SQLite file for --role-cache (default: <docx folder>/{ROLE_CACHE_NAME})"
+    )
+    parser.add_argument(
+        "--role-cache-min-skip-hits",
+        type=int,
+        default=DEFAULT_MIN_SKIP_HITS,
+        help="Applies a paragraph must have been left unclassified in before --role-cache "
+             "leaves it out of the bundle (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--paragraph-sidecar",
+        default=None,
+        help=f"Paragraph index written by --phase2-build-bundle and reused by apply "
+             f"(default: <extract dir>/{PARAGRAPH_SIDECAR_NAME})"
+    )
 
     # Debug
     parser.add_argument(
@@ -215,8 +489,64 @@ def main():
 
     input_docx_path = Path(args.docx_path)
 
+    if args.phase2_previous and not args.phase2_previous_classifications:
+        print("Error: --phase2-previous needs --phase2-previous-classifications")
+        sys.exit(2)
+
+    role_cache_path = None
+    if args.role_cache or args.role_cache_db:
+        role_cache_path = Path(args.role_cache_db) if args.role_cache_db else default_role_cache_path(input_docx_path)
+
+    # Pre-filled classifications usually sit in the workspace the bundle step
+    # left behind; read them before extraction clears it.
+    prefilled = [
+        json.loads(Path(p).read_text(encoding="utf-8")) for p in args.phase2_carried_classifications or []
+    ]
+
     # Create decomposer
     decomposer = DocxDecomposer(args.docx_path)
+    timer = StageTimer(trace_memory=args.trace_memory)
+
+    output_docx_path = Path(args.output_docx) if args.output_docx else (
+        input_docx_path.with_name(input_docx_path.stem + "_PHASE2_FORMATTED.docx")
+    )
+
+    # An apply whose inputs were all seen before is answered from the output
+    # cache, before anything is extracted.
+    output_cache_dir, output_key = None, None
+    applying = bool((args.phase2_arch_extract or args.phase2_template_pack) and args.phase2_classifications)
+    if applying and (args.output_cache or args.output_cache_dir):
+        from template_pack import load_template_pack, template_source_hash
+
+        output_cache_dir = Path(args.output_cache_dir) if args.output_cache_dir else default_output_cache_dir(input_docx_path)
+        template_hash = (
+            load_template_pack(Path(args.phase2_template_pack))["source_hash"] if args.phase2_template_pack
+            else template_source_hash(Path(args.phase2_arch_extract))
+        )
+        output_key = phase2_output_key(
+            input_docx_path, template_hash, Path(args.phase2_classifications),
+            options=phase2_output_options(
+                args.deterministic_ids,
+                [Path(p) for p in args.phase2_carried_classifications or []]
+            )
+        )
+        entry = lookup_phase2_output(output_cache_dir, output_key)
+        if entry is not None:
+            issues_path = Path(args.use_extract_dir or args.extract_dir or decomposer.default_extract_dir()) / "phase2_issues.log"
+            restore_phase2_output(entry, output_docx_path, issues_path)
+            print(f"Phase 2 output cache hit: {entry}")
+            print(f"Phase 2 output written: {output_docx_path}")
+            print(f"Phase 2 log written:    {issues_path}")
+            return
+
+    # The bundle step leaves its paragraph index in the workspace; read it before
+    # extraction wipes the folder so apply can skip re-indexing.
+    sidecar_path = Path(args.paragraph_sidecar) if args.paragraph_sidecar else (
+        Path(args.use_extract_dir or args.extract_dir or decomposer.default_extract_dir()) / PARAGRAPH_SIDECAR_NAME
+    )
+    sidecar, sidecar_status = None, "missing"
+    if args.phase2_classifications:
+        sidecar, sidecar_status = load_paragraph_sidecar(sidecar_path, input_docx_path)
 
     # Use existing extraction folder or extract fresh
     if args.use_extract_dir:
@@ -226,7 +556,42 @@ def main():
             sys.exit(1)
         decomposer.extract_dir = extract_dir
     else:
-        extract_dir = decomposer.extract(output_dir=args.extract_dir)
+        with timer.stage("extract") as rec:
+            cache_dir = None
+            if args.extract_cache or args.extract_cache_dir:
+                cache_dir = Path(args.extract_cache_dir) if args.extract_cache_dir else default_extract_cache_dir(input_docx_path)
+            extract_dir = decomposer.extract(output_dir=args.extract_dir, lazy=args.lazy_extract, cache_dir=cache_dir)
+            rec["bytes_read"] = input_docx_path.stat().st_size
+            if decomposer.cache_entry is None:
+                rec["bytes_written"] = sum(p.stat().st_size for p in extract_dir.rglob("*") if p.is_file())
+
+    # Parts are read once (from the workspace, or straight from the package in
+    # --lazy-extract mode) and shared by every stage; changed parts are written once.
+    parts = PartStore(extract_dir, source=decomposer)
+    timer.parts = parts
+
+    # One scan of document.xml shared by bundle build, preflight and apply
+    # (or none, when the bundle step's sidecar still matches the document)
+    sidecar_log: List[str] = []
+    with timer.stage("paragraph_index") as rec:
+        document_xml = parts.get_bytes("word/document.xml")
+        paragraph_index = None
+        if sidecar_status == "fresh":
+            try:
+                paragraph_index = index_from_sidecar(sidecar, document_xml)
+                rec["sidecar"] = str(sidecar_path)
+            except ValueError as e:
+                sidecar_log.append(f"WARNING: {e}; re-indexing")
+        if paragraph_index is None:
+            paragraph_index = ParagraphIndex.build(document_xml)
+    if sidecar_status == "stale":
+        sidecar_log.append(
+            f"WARNING: {input_docx_path.name} changed since the bundle was built "
+            f"(paragraph sidecar {sidecar_path} no longer matches word/document.xml)"
+        )
+    if sidecar is not None:
+        # Keep the bundle-time index in the fresh workspace for the next run
+        write_sidecar(sidecar, sidecar_path)
 
     # -------------------------------
     # PHASE 2: BUILD SLIM BUNDLE
@@ -243,14 +608,54 @@ def main():
             else:
                 print("WARNING: Could not load architect registry, using all standard roles")
         
-        bundle = build_phase2_slim_bundle(
-            extract_dir, 
-            args.phase2_discipline,
-            available_roles=available_roles
-        )
+        previous_revision = None
+        if args.phase2_previous:
+            previous_revision = load_previous_revision(
+                Path(args.phase2_previous), Path(args.phase2_previous_classifications)
+            )
+
+        rule_classifier = None
+        if args.phase2_rule_classifier:
+            role_styles = load_arch_style_registry(Path(args.phase2_arch_extract)) if available_roles else None
+            rule_classifier = RuleClassifier(
+                available_roles,
+                role_styles=role_styles,
+                min_confidence=args.phase2_rule_min_confidence
+            )
+
+        pattern_hits: Dict[str, int] = {}
+        carried_over: Dict[str, Any] = {}
+        cached: Dict[str, Any] = {}
+        preclassified: Dict[str, Any] = {}
+        role_cache = RoleCache(
+            role_cache_path, min_skip_hits=args.role_cache_min_skip_hits
+        ) if role_cache_path else None
+        try:
+            with timer.stage("build_phase2_slim_bundle"):
+                bundle = build_phase2_slim_bundle(
+                    extract_dir, 
+                    args.phase2_discipline,
+                    available_roles=available_roles,
+                    paragraph_index=paragraph_index,
+                    pattern_hits=pattern_hits,
+                    previous_revision=previous_revision,
+                    carried_over=carried_over,
+                    role_cache=role_cache,
+                    cached=cached,
+                    rule_classifier=rule_classifier,
+                    preclassified=preclassified
+                )
+        finally:
+            if role_cache is not None:
+                role_cache.close()
 
         out_path = extract_dir / "phase2_slim_bundle.json"
         out_path.write_text(json.dumps(bundle, indent=2), encoding="utf-8")
+        write_paragraph_sidecar(paragraph_index, input_docx_path, sidecar_path)
+        hits_path = extract_dir / BOILERPLATE_HITS_NAME
+        hits_path.write_text(json.dumps(boilerplate_hit_report(pattern_hits), indent=2), encoding="utf-8")
+        timer.write(extract_dir / PHASE2_TIMINGS_NAME)
+        timer.close()
 
         # Also write the prompts for convenience
         prompts_dir = extract_dir / "phase2_prompts"
@@ -259,6 +664,34 @@ def main():
         (prompts_dir / "run_instruction.txt").write_text(PHASE2_RUN_INSTRUCTION.strip(), encoding="utf-8")
 
         print(f"Phase 2 slim bundle written: {out_path}")
+        prefilled_paths: List[Path] = []
+        if previous_revision is not None:
+            carried_path = extract_dir / CARRIED_CLASSIFICATIONS_NAME
+            carried_path.write_text(json.dumps(carried_over, indent=2), encoding="utf-8")
+            prefilled_paths.append(carried_path)
+            print(
+                f"Revision of {previous_revision['source']}: "
+                f"{bundle['document_meta']['unchanged_paragraphs']} paragraphs unchanged, "
+                f"{len(bundle['paragraphs'])} to classify"
+            )
+            print(f"Carried-over classifications written: {carried_path}")
+        if rule_classifier is not None:
+            rules_path = extract_dir / RULE_CLASSIFICATIONS_NAME
+            rules_path.write_text(json.dumps(preclassified, indent=2), encoding="utf-8")
+            prefilled_paths.append(rules_path)
+            print(f"Rule pre-classifier: {bundle['document_meta']['rule_preclassified']} paragraphs pre-filled")
+            print(f"Rule classifications written: {rules_path}")
+        if role_cache_path is not None:
+            cached_path = extract_dir / CACHED_CLASSIFICATIONS_NAME
+            cached_path.write_text(json.dumps(cached, indent=2), encoding="utf-8")
+            prefilled_paths.append(cached_path)
+            print(
+                f"Role cache: {bundle['document_meta']['role_cache_hits']} paragraphs pre-filled, "
+                f"{len(cached['unclassified'])} left unclassified from {role_cache_path}"
+            )
+            print(f"Cached classifications written: {cached_path}")
+        print(f"Boilerplate pattern hits written: {hits_path}")
+        print(f"Paragraph index sidecar written: {sidecar_path}")
         print(f"Phase 2 prompts written to: {prompts_dir}")
         print("")
         print("NEXT STEPS:")
@@ -268,55 +701,182 @@ def main():
         print("4. Paste the content of: run_instruction.txt")
         print("5. Save LLM JSON output as: phase2_classifications.json")
         print("6. Run Phase 2 apply:")
-        print(f'   python docx_decomposer.py {args.docx_path} --phase2-arch-extract <arch_folder> --phase2-classifications phase2_classifications.json')
+        prefill_args = "".join(f" --phase2-carried-classifications {p}" for p in prefilled_paths)
+        print(f'   python docx_decomposer.py {args.docx_path} --phase2-arch-extract <arch_folder> --phase2-classifications phase2_classifications.json{prefill_args}')
         return
 
     # -------------------------------
     # PHASE 2: APPLY CLASSIFICATIONS
     # -------------------------------
-    if args.phase2_arch_extract and args.phase2_classifications:
-        from docx_patch import patch_docx  # your surgical ZIP patch writer
-        from arch_env_applier import apply_environment_to_target
+    if (args.phase2_arch_extract or args.phase2_template_pack) and args.phase2_classifications:
+        from template_pack import load_template_pack, load_or_compile_template_pack, workspace_pack_cache_dir
 
         log: List[str] = []
 
-        arch_input = Path(args.phase2_arch_extract)
+        # Architect side (registry, materialized styles, numbering inputs, environment)
+        # comes from a template pack, compiled once per template and cached by content hash.
+        # Supports passing registry JSON directly, like load_arch_style_registry.
+        if args.phase2_template_pack:
+            template_pack = load_template_pack(Path(args.phase2_template_pack))
+        else:
+            pack_log: List[str] = []
+            template_pack = load_or_compile_template_pack(
+                Path(args.phase2_arch_extract),
+                cache_dir=Path(args.template_pack_cache_dir) if args.template_pack_cache_dir else (
+                    workspace_pack_cache_dir(input_docx_path)
+                ),
+                log=pack_log
+            )
+            for line in pack_log:
+                print(line)
+
+        llm_classifications = json.loads(Path(args.phase2_classifications).read_text(encoding="utf-8"))
+        classifications = llm_classifications
+        if prefilled:
+            classifications = merge_classifications(*prefilled, llm_classifications)
+            merged_path = extract_dir / MERGED_CLASSIFICATIONS_NAME
+            merged_path.write_text(json.dumps(classifications, indent=2), encoding="utf-8")
+            print(f"Merged classifications written: {merged_path}")
+
+        if sidecar_status == "stale":
+            classified = sorted({
+                item["paragraph_index"] for item in classifications.get("classifications", [])
+                if isinstance(item, dict) and isinstance(item.get("paragraph_index"), int)
+            })
+            drift = sidecar_drift(sidecar, paragraph_index, classified)
+            sidecar_log.append(
+                f"WARNING: paragraph drift since the bundle was built: "
+                f"{drift['sidecar_paragraph_count']} -> {drift['document_paragraph_count']} paragraphs; "
+                f"{len(drift['changed_paragraphs'])} classified paragraphs changed "
+                f"{drift['changed_paragraphs'][:20]}"
+            )
+        for line in sidecar_log:
+            print(line)
+        log.extend(sidecar_log)
 
-        # Load registry (supports passing registry JSON directly)
-        arch_registry = load_arch_style_registry(arch_input)
+        # ALWAYS write final formatted docx by patching only edited parts
+        profile_path = extract_dir / PHASE2_PROFILE_NAME if args.profile else None
+        with maybe_profile(profile_path):
+            result = run_phase2_apply(
+                input_docx_path=input_docx_path,
+                extract_dir=extract_dir,
+                template_pack=template_pack,
+                classifications=classifications,
+                output_docx_path=output_docx_path,
+                parts=parts,
+                paragraph_index=paragraph_index,
+                log=log,
+                timer=timer,
+                deterministic_ids=args.deterministic_ids
+            )
+        if profile_path:
+            print(f"Phase 2 profile written: {profile_path}")
+
+        if role_cache_path is not None:
+            with RoleCache(role_cache_path) as role_cache:
+                recorded = role_cache.record(
+                    paragraph_index,
+                    llm_classifications,
+                    eligible=lambda rec: bool(strip_boilerplate_with_report(rec.text)[0]),
+                    prefilled=prefilled
+                )
+            print(f"Role cache: recorded {recorded} roles in {role_cache_path}")
+
+        if output_key is not None:
+            store_phase2_output(output_cache_dir, output_key, output_docx_path, Path(result["issues_log"]), result)
+            evict_log: List[str] = []
+            evict_phase2_outputs(
+                output_cache_dir,
+                max_bytes=int(args.output_cache_max_mb * (1 << 20)),
+                max_age_days=args.output_cache_max_age_days,
+                log=evict_log
+            )
+            for line in evict_log:
+                print(line)
+            print(f"Phase 2 output cached: {output_cache_dir}")
+        return
 
-        # Determine arch extract root for styles.xml import
-        if arch_input.is_file() and arch_input.suffix.lower() == ".json":
-            arch_root = resolve_arch_extract_root(arch_input.parent)
-        else:
-            arch_root = resolve_arch_extract_root(arch_input)
+    # -------------------------------
+    # LEGACY MODES DISABLED
+    # -------------------------------
+    if args.normalize_slim or args.apply_instructions or args.normalize or args.apply_edits:
+        print("Error: Legacy modes are disabled under the NO-REBUILD policy.")
+        print("Use Phase 2 only:")
+        print("  --phase2-build-bundle")
+        print("  --phase2-arch-extract <arch_extract> --phase2-classifications <json> [--output-docx out.docx]")
+        sys.exit(2)
+
+    # -------------------------------
+    # DEFAULT: do nothing destructive
+    # -------------------------------
+    print("No action specified.")
+    print("Use one of:")
+    print("  --phase2-build-bundle")
+    print("  --phase2-arch-extract <arch_extract> --phase2-classifications <json> [--output-docx out.docx]")
+    print(f"Extracted to: {extract_dir}")
+    if analysis_path:
+        print(f"Analysis report: {analysis_path}")
+
+
+def run_phase2_apply(
+    input_docx_path: Path,
+    extract_dir: Path,
+    template_pack: Dict[str, Any],
+    classifications: Dict[str, Any],
+    output_docx_path: Path,
+    parts: PartStore,
+    paragraph_index: ParagraphIndex,
+    log: List[str],
+    timer: Optional[StageTimer] = None,
+    deterministic_ids: bool = False
+) -> Dict[str, Any]:
+    """
+    Phase 2 apply for one document against a loaded template pack: preflight,
+    environment, numbering + style import, classification apply, stability
+    checks, patch, invariants, issues log.
+
+    parts/paragraph_index must come from the same extract of input_docx_path.
+    Each stage is timed (pass a timer that already holds e.g. the extract stage
+    to include it); timings go to phase2_timings.json next to the issues log.
+    deterministic_ids is passed on to the numbering import.
+    Returns a short summary (output paths, paragraph count, patched parts).
+    """
+    from docx_patch import patch_docx  # your surgical ZIP patch writer
 
+    if timer is None:
+        timer = StageTimer()
+    timer.parts = parts
 
-        classifications = json.loads(Path(args.phase2_classifications).read_text(encoding="utf-8"))
+    arch_registry: Dict[str, str] = template_pack["role_styles"]
+    arch_root = Path(template_pack["arch_root"])
 
-        # Preflight report (visibility)
+    # Preflight report (visibility)
+    with timer.stage("preflight"):
         preflight_path = extract_dir / "phase2_preflight.json"
         preflight = write_phase2_preflight(
             extract_dir=extract_dir,
             arch_root=arch_root,
             arch_registry=arch_registry,
             classifications=classifications,
-            out_path=preflight_path
+            out_path=preflight_path,
+            paragraph_index=paragraph_index
         )
         print(f"Phase 2 preflight written: {preflight_path}")
         if preflight.get("unmapped_roles"):
             print(f"WARNING: Unmapped roles: {preflight['unmapped_roles']}")
 
-        # ─────────────────────────────────────────────────────────────────
-        # NEW: Apply formatting environment BEFORE importing styles
-        # ─────────────────────────────────────────────────────────────────
+    # ─────────────────────────────────────────────────────────────────
+    # NEW: Apply formatting environment BEFORE importing styles
+    # ─────────────────────────────────────────────────────────────────
+    with timer.stage("environment"):
         arch_template_registry_path = arch_root / "arch_template_registry.json"
-        if arch_template_registry_path.exists():
-            env_registry = json.loads(arch_template_registry_path.read_text(encoding="utf-8"))
+        env_registry = template_pack.get("template_registry")
+        if env_registry is not None:
             apply_environment_to_target(
                 target_extract_dir=extract_dir,
                 registry=env_registry,
-                log=log
+                log=log,
+                parts=parts
             )
             print(f"Applied environment from: {arch_template_registry_path}")
         else:
@@ -327,116 +887,94 @@ def main():
 
 
 
-        # Import only styles actually used by this doc's classifications
-        used_roles = {
-        item.get("csi_role")
-        for item in classifications.get("classifications", [])
-        if isinstance(item, dict) and isinstance(item.get("csi_role"), str)
-        }
-        needed_style_ids = sorted({arch_registry[r] for r in used_roles if r in arch_registry})
+    # Import only styles actually used by this doc's classifications
+    needed_style_ids = needed_style_ids_for_classifications(classifications, arch_registry)
 
-        # ─────────────────────────────────────────────────────────────────
-        # NEW: Import numbering definitions BEFORE importing styles
-        # ─────────────────────────────────────────────────────────────────
+    # ─────────────────────────────────────────────────────────────────
+    # NEW: Import numbering definitions BEFORE importing styles
+    # ─────────────────────────────────────────────────────────────────
+    with timer.stage("numbering_import"):
         style_numid_remap = {}
-        if HAS_NUMBERING_IMPORTER and arch_template_registry_path.exists():
+        if HAS_NUMBERING_IMPORTER and env_registry is not None:
             try:
                 log.append("")
                 log.append("=" * 60)
                 log.append("IMPORTING NUMBERING DEFINITIONS")
                 log.append("=" * 60)
-                
+            
                 style_numid_remap = import_numbering(
                     arch_extract_dir=arch_root,
                     target_extract_dir=extract_dir,
                     arch_template_registry=env_registry,
                     style_ids_to_import=needed_style_ids,
-                    log=log
+                    log=log,
+                    style_to_numid=template_pack["style_numids"],
+                    parts=parts,
+                    deterministic_ids=deterministic_ids
                 )
             except Exception as e:
                 log.append(f"WARNING: Numbering import failed: {e}")
 
-        log.append("")
-        log.append("=" * 60)
-        log.append("IMPORTING STYLE DEFINITIONS")
-        log.append("=" * 60)
+    log.append("")
+    log.append("=" * 60)
+    log.append("IMPORTING STYLE DEFINITIONS")
+    log.append("=" * 60)
 
+    with timer.stage("style_import"):
         import_arch_styles_into_target(
             target_extract_dir=extract_dir,
             arch_extract_dir=arch_root,
             needed_style_ids=needed_style_ids,
             log=log,
-            style_numid_remap=style_numid_remap
+            style_numid_remap=style_numid_remap,
+            template_pack=template_pack,
+            parts=parts
         )
 
 
 
-        if not needed_style_ids:
-            log.append("No architect styles needed for this doc (no mapped roles used).")
+    if not needed_style_ids:
+        log.append("No architect styles needed for this doc (no mapped roles used).")
 
-        # Snapshot invariants BEFORE we touch document.xml
-        snap = snapshot_stability(extract_dir)
+    # Snapshot invariants BEFORE we touch document.xml
+    with timer.stage("snapshot_stability"):
+        snap = snapshot_stability(extract_dir, parts=parts)
 
+    paragraph_seconds: Dict[int, float] = {}
+    with timer.stage("apply_classifications"):
         apply_phase2_classifications(
             extract_dir=extract_dir,
             classifications=classifications,
             arch_style_registry=arch_registry,
-            log=log
-        )
-
-        # Your existing stability checks (headers/footers + sectPr + document.xml.rels)
-        verify_stability(extract_dir, snap)
-
-        # ALWAYS write final formatted docx by patching only edited parts
-        output_docx_path = Path(args.output_docx) if args.output_docx else (
-            input_docx_path.with_name(input_docx_path.stem + "_PHASE2_FORMATTED.docx")
+            log=log,
+            paragraph_index=paragraph_index,
+            parts=parts,
+            paragraph_seconds=paragraph_seconds
         )
+    timer.record_paragraphs(paragraph_seconds, paragraph_index)
 
-        replacements = {
-            "word/document.xml": (extract_dir / "word" / "document.xml").read_bytes(),
-            "word/styles.xml":   (extract_dir / "word" / "styles.xml").read_bytes(),
-        }
-
-        # Add environment parts if they were modified
-        theme_path = extract_dir / "word" / "theme" / "theme1.xml"
-        if theme_path.exists():
-            replacements["word/theme/theme1.xml"] = theme_path.read_bytes()
-        
-        settings_path = extract_dir / "word" / "settings.xml"
-        if settings_path.exists():
-            replacements["word/settings.xml"] = settings_path.read_bytes()
-        
-        font_table_path = extract_dir / "word" / "fontTable.xml"
-        if font_table_path.exists():
-            replacements["word/fontTable.xml"] = font_table_path.read_bytes()
-
-        # numbering may have been updated with imported definitions
-        numbering_path = extract_dir / "word" / "numbering.xml"
-        if numbering_path.exists():
-            replacements["word/numbering.xml"] = numbering_path.read_bytes()
-        
-        # Content types may have been updated for new theme
-        content_types_path = extract_dir / "[Content_Types].xml"
-        if content_types_path.exists():
-            replacements["[Content_Types].xml"] = content_types_path.read_bytes()
-        
-        # Rels may have been updated for new theme relationship
-        rels_path = extract_dir / "word" / "_rels" / "document.xml.rels"
-        if rels_path.exists():
-            replacements["word/_rels/document.xml.rels"] = rels_path.read_bytes()
+    # Your existing stability checks (headers/footers + sectPr + document.xml.rels)
+    with timer.stage("verify_stability"):
+        verify_stability(extract_dir, snap, parts=parts)
 
+    # Only parts that actually changed are patched; patch_docx copies the rest
+    log.append(f"Patched parts: {', '.join(parts.dirty_parts()) or '(none)'}")
 
+    with timer.stage("patch_docx") as rec:
         patch_docx(
             src_docx=input_docx_path,
             out_docx=output_docx_path,
-            replacements=replacements,
+            replacements=parts.replacements(),
         )
+        rec["bytes_read"] = input_docx_path.stat().st_size
+        rec["bytes_written"] = output_docx_path.stat().st_size
 
-        # Optional: additional invariants (sectPr, no run-level edits, headers/footers unchanged).
-        # This requires the final output docx to validate header/footer byte stability.
+    # Optional: additional invariants (sectPr, no run-level edits, headers/footers unchanged).
+    # This requires the final output docx to validate header/footer byte stability.
+    with timer.stage("verify_invariants"):
         try:
             from phase2_invariants import verify_phase2_invariants
-            new_doc_xml_bytes = (extract_dir / "word" / "document.xml").read_bytes()
+            new_doc_xml_bytes = parts.get_bytes("word/document.xml")
             verify_phase2_invariants(
                 src_docx=input_docx_path,
                 new_document_xml=new_doc_xml_bytes,
@@ -445,33 +983,26 @@ def main():
         except ModuleNotFoundError:
             pass
 
-        issues_path = extract_dir / "phase2_issues.log"
-        issues_path.write_text("\n".join(log) + "\n", encoding="utf-8")
+    # Keep the workspace in sync with the output docx
+    with timer.stage("flush"):
+        parts.flush()
 
-        print(f"Phase 2 output written: {output_docx_path}")
-        print(f"Phase 2 log written:    {issues_path}")
-        return
+    issues_path = extract_dir / "phase2_issues.log"
+    issues_path.write_text("\n".join(log) + "\n", encoding="utf-8")
+    timings_path = timer.write(extract_dir / PHASE2_TIMINGS_NAME)
+    timer.close()
 
-    # -------------------------------
-    # LEGACY MODES DISABLED
-    # -------------------------------
-    if args.normalize_slim or args.apply_instructions or args.normalize or args.apply_edits:
-        print("Error: Legacy modes are disabled under the NO-REBUILD policy.")
-        print("Use Phase 2 only:")
-        print("  --phase2-build-bundle")
-        print("  --phase2-arch-extract <arch_extract> --phase2-classifications <json> [--output-docx out.docx]")
-        sys.exit(2)
-
-    # -------------------------------
-    # DEFAULT: do nothing destructive
-    # -------------------------------
-    print("No action specified.")
-    print("Use one of:")
-    print("  --phase2-build-bundle")
-    print("  --phase2-arch-extract <arch_extract> --phase2-classifications <json> [--output-docx out.docx]")
-    print(f"Extracted to: {extract_dir}")
-    if analysis_path:
-        print(f"Analysis report: {analysis_path}")
+    print(f"Phase 2 output written: {output_docx_path}")
+    print(f"Phase 2 log written:    {issues_path}")
+    print(f"Phase 2 timings:        {timings_path}")
+    return {
+        "output_docx": str(output_docx_path),
+        "issues_log": str(issues_path),
+        "timings": str(timings_path),
+        "paragraph_count": len(paragraph_index),
+        "patched_parts": parts.dirty_parts(),
+        "unmapped_roles": preflight.get("unmapped_roles", []),
+    }
 
 
 def sha256_bytes(b: bytes) -> str:
@@ -486,35 +1017,42 @@ class StabilitySnapshot:
     sectpr_hash: str
     doc_rels_hash: str
 
-def snapshot_headers_footers(extract_dir: Path) -> Dict[str, str]:
-    wf = extract_dir / "word"
+def snapshot_headers_footers(extract_dir: Path, parts: Optional[PartStore] = None) -> Dict[str, str]:
+    store = parts or PartStore(extract_dir)
     hashes = {}
-    for p in sorted(wf.glob("header*.xml")) + sorted(wf.glob("footer*.xml")):
-        rel = str(p.relative_to(extract_dir)).replace("\\", "/")
-        hashes[rel] = sha256_bytes(p.read_bytes())
+    for pattern in PHASE2_STABILITY_PART_PATTERNS:
+        for rel in store.names(pattern):
+            if "/" in rel[len("word/"):]:
+                continue
+            hashes[rel] = sha256_bytes(store.get_bytes(rel))
     return hashes
 
-def extract_sectpr_block(document_xml: str) -> str:
+_SECTPR_BRX = re.compile(rb"(<w:sectPr[\s\S]*?</w:sectPr>)")
+
+def extract_sectpr_block(document_xml: Union[str, bytes]) -> Union[str, bytes]:
     """
-    Pull out the sectPr blocks as raw text. This is a pragmatic stability check.
+    Pull out the sectPr blocks as raw text (or raw bytes, given bytes).
+    This is a pragmatic stability check.
     We assume the XML is not pretty-printed or rewritten by our pipeline.
     """
     # Word usually has <w:sectPr> ... </w:sectPr> at end of body, sometimes multiple.
+    if isinstance(document_xml, bytes):
+        return b"\n".join(_SECTPR_BRX.findall(document_xml))
     blocks = re.findall(r"(<w:sectPr[\s\S]*?</w:sectPr>)", document_xml)
     return "\n".join(blocks)
 
-def snapshot_stability(extract_dir: Path) -> StabilitySnapshot:
-    doc_path = extract_dir / "word" / "document.xml"
-    doc_text = doc_path.read_text(encoding="utf-8")
-    sectpr = extract_sectpr_block(doc_text)
+def snapshot_stability(extract_dir: Path, parts: Optional[PartStore] = None) -> StabilitySnapshot:
+    store = parts or PartStore(extract_dir)
+    sectpr = extract_sectpr_block(store.get_bytes("word/document.xml"))
     return StabilitySnapshot(
-        header_footer_hashes=snapshot_headers_footers(extract_dir),
-        sectpr_hash=sha256_text(sectpr),
-        doc_rels_hash=snapshot_doc_rels_hash(extract_dir),
+        header_footer_hashes=snapshot_headers_footers(extract_dir, parts=store),
+        sectpr_hash=sha256_bytes(sectpr),
+        doc_rels_hash=snapshot_doc_rels_hash(extract_dir, parts=store),
     )
 
-def verify_stability(extract_dir: Path, snap: StabilitySnapshot) -> None:
-    current_hf = snapshot_headers_footers(extract_dir)
+def verify_stability(extract_dir: Path, snap: StabilitySnapshot, parts: Optional[PartStore] = None) -> None:
+    store = parts or PartStore(extract_dir)
+    current_hf = snapshot_headers_footers(extract_dir, parts=store)
     if current_hf != snap.header_footer_hashes:
         changed = []
         all_keys = set(current_hf.keys()) | set(snap.header_footer_hashes.keys())
@@ -523,23 +1061,17 @@ def verify_stability(extract_dir: Path, snap: StabilitySnapshot) -> None:
                 changed.append(k)
         raise ValueError(f"Header/footer stability check FAILED. Changed: {changed}")
 
-    doc_text = (extract_dir / "word" / "document.xml").read_text(encoding="utf-8")
-    current_sectpr = extract_sectpr_block(doc_text)
-    if sha256_text(current_sectpr) != snap.sectpr_hash:
+    current_sectpr = extract_sectpr_block(store.get_bytes("word/document.xml"))
+    if sha256_bytes(current_sectpr) != snap.sectpr_hash:
         raise ValueError("Section properties (w:sectPr) stability check FAILED.")
 
     # NEW: relationships must be stable too (header/footer binding lives here)
-    current_rels = snapshot_doc_rels_hash(extract_dir)
+    current_rels = snapshot_doc_rels_hash(extract_dir, parts=store)
     if current_rels != snap.doc_rels_hash:
         raise ValueError("document.xml.rels stability check FAILED (can break header/footer).")
 
-def _extract_style_block(styles_xml_text: str, style_id: str) -> Optional[str]:
-    m = re.search(
-        rf'(<w:style\b[^>]*w:styleId="{re.escape(style_id)}"[\s\S]*?</w:style>)',
-        styles_xml_text,
-        flags=re.S
-    )
-    return m.group(1) if m else None
+def _extract_style_block(styles: Union[str, StyleIndex], style_id: str) -> Optional[str]:
+    return StyleIndex.of(styles).block(style_id)
 
 def _extract_basedOn(style_block: str) -> Optional[str]:
     m = re.search(r'<w:basedOn\b[^>]*w:val="([^"]+)"', style_block)
@@ -556,23 +1088,10 @@ def _paragraph_style_id(p_xml: str) -> Optional[str]:
 def _paragraph_has_numpr(p_xml: str) -> bool:
     return "<w:numPr" in p_xml
 
-def _find_style_numpr_in_chain(styles_xml_text: str, style_id: str, max_hops: int = 50) -> Optional[str]:
-    seen = set()
-    cur = style_id
-    hops = 0
-    while cur and cur not in seen and hops < max_hops:
-        seen.add(cur)
-        hops += 1
-        block = _extract_style_block(styles_xml_text, cur)
-        if not block:
-            break
-        numpr = _extract_numpr_block(block)
-        if numpr:
-            return numpr
-        cur = _extract_basedOn(block)
-    return None
+def _find_style_numpr_in_chain(styles: Union[str, StyleIndex], style_id: str, max_hops: int = 50) -> Optional[str]:
+    return StyleIndex.of(styles).effective_numpr(style_id, max_hops)
 
-def ensure_explicit_numpr_from_current_style(p_xml: str, styles_xml_text: str) -> str:
+def ensure_explicit_numpr_from_current_style(p_xml: str, styles: Union[str, StyleIndex]) -> str:
     # never touch sectPr carrier paragraphs
     if "<w:sectPr" in p_xml:
         return p_xml
@@ -584,7 +1103,7 @@ def ensure_explicit_numpr_from_current_style(p_xml: str, styles_xml_text: str) -
     if not cur_style:
         return p_xml
 
-    numpr = _find_style_numpr_in_chain(styles_xml_text, cur_style)
+    numpr = _find_style_numpr_in_chain(styles, cur_style)
     if not numpr:
         return p_xml
 
@@ -603,103 +1122,23 @@ def ensure_explicit_numpr_from_current_style(p_xml: str, styles_xml_text: str) -
     # Create pPr if missing
     return re.sub(r'(<w:p\b[^>]*>)', rf"\1<w:pPr>{numpr}</w:pPr>", p_xml, count=1)
 
-def _strip_pstyle_and_numpr(ppr_inner: str) -> str:
-    if not ppr_inner:
-        return ""
-    out = re.sub(r"<w:pStyle\b[^>]*/>", "", ppr_inner)
-    out = re.sub(r"<w:numPr\b[^>]*>[\s\S]*?</w:numPr>", "", out, flags=re.S)
-    return out.strip()
-
 def _extract_tag_inner(xml: str, tag: str) -> Optional[str]:
     m = re.search(rf"<{tag}\b[^>]*>([\s\S]*?)</{tag}>", xml, flags=re.S)
     return m.group(1) if m else None
 
-def _docdefaults_rpr_inner(styles_xml_text: str) -> str:
-    m = re.search(
-        r"<w:docDefaults\b[\s\S]*?<w:rPrDefault\b[\s\S]*?<w:rPr\b[^>]*>([\s\S]*?)</w:rPr>[\s\S]*?</w:rPrDefault>",
-        styles_xml_text,
-        flags=re.S
-    )
-    return m.group(1).strip() if m else ""
-
-def _docdefaults_ppr_inner(styles_xml_text: str) -> str:
-    m = re.search(
-        r"<w:docDefaults\b[\s\S]*?<w:pPrDefault\b[\s\S]*?<w:pPr\b[^>]*>([\s\S]*?)</w:pPr>[\s\S]*?</w:pPrDefault>",
-        styles_xml_text,
-        flags=re.S
-    )
-    return _strip_pstyle_and_numpr(m.group(1).strip()) if m else ""
-
-def _effective_rpr_inner_in_arch(arch_styles_xml_text: str, style_id: str) -> str:
+def _effective_rpr_inner_in_arch(arch_styles: Union[str, StyleIndex], style_id: str) -> str:
     """
     Return a *minimal* effective rPr inner XML for the FORCE typography set only.
 
-    We resolve each child tag independently through the basedOn chain, then fall back
-    to docDefaults. This avoids the bug where a derived style contains <w:rPr> but
+    Each child tag is resolved independently through the basedOn chain, then falls
+    back to docDefaults. This avoids the bug where a derived style contains <w:rPr> but
     doesn't specify (for example) <w:rFonts>, causing inherited font settings to be missed.
+    Resolution is done once per styles.xml by StyleIndex and cached by styleId.
     """
-    force_tags = ("rFonts", "sz", "szCs", "lang")
+    return StyleIndex.of(arch_styles).effective_rpr_inner(style_id)
 
-    def _extract_child_node(inner_xml: str, tag: str) -> Optional[str]:
-        if not inner_xml:
-            return None
-        # Self-closing: <w:tag .../>
-        m = re.search(rf"(<w:{re.escape(tag)}\b[^>]*/>)", inner_xml)
-        if m:
-            return m.group(1)
-        # Paired: <w:tag ...>...</w:tag>
-        m = re.search(
-            rf"(<w:{re.escape(tag)}\b[^>]*>[\s\S]*?</w:{re.escape(tag)}>)",
-            inner_xml,
-            flags=re.S
-        )
-        if m:
-            return m.group(1)
-        return None
-
-    def _resolve(tag: str) -> Optional[str]:
-        seen = set()
-        cur = style_id
-        hops = 0
-        while cur and cur not in seen and hops < 50:
-            seen.add(cur)
-            hops += 1
-            blk = _extract_style_block(arch_styles_xml_text, cur)
-            if not blk:
-                break
-            rpr_inner = _extract_tag_inner(blk, "w:rPr") or ""
-            node = _extract_child_node(rpr_inner, tag)
-            if node:
-                return node
-            cur = _extract_basedOn(blk)
-
-        # fall back to docDefaults
-        docdef_inner = _docdefaults_rpr_inner(arch_styles_xml_text)
-        return _extract_child_node(docdef_inner, tag)
-
-    nodes: List[str] = []
-    for t in force_tags:
-        node = _resolve(t)
-        if node:
-            nodes.append(node)
-
-    return "".join(nodes)
-
-def _effective_ppr_inner_in_arch(arch_styles_xml_text: str, style_id: str) -> str:
-    seen = set()
-    cur = style_id
-    hops = 0
-    while cur and cur not in seen and hops < 50:
-        seen.add(cur); hops += 1
-        blk = _extract_style_block(arch_styles_xml_text, cur)
-        if not blk:
-            break
-        inner = _extract_tag_inner(blk, "w:pPr") or ""
-        inner = _strip_pstyle_and_numpr(inner)
-        if inner:
-            return inner
-        cur = _extract_basedOn(blk)
-    return _docdefaults_ppr_inner(arch_styles_xml_text)
+def _effective_ppr_inner_in_arch(arch_styles: Union[str, StyleIndex], style_id: str) -> str:
+    return StyleIndex.of(arch_styles).effective_ppr_inner(style_id)
 
 def _rpr_contains_tag(rpr_inner: str, tag: str) -> bool:
     return re.search(rf"<w:{re.escape(tag)}\b", rpr_inner) is not None
@@ -716,7 +1155,7 @@ def _inject_missing_rpr_children(style_block: str, missing_children_xml: str) ->
     # Replace only the first closing tag (avoid accidental insertion into nested rPr blocks)
     return style_block.replace("</w:rPr>", f"{missing_children_xml}</w:rPr>", 1)
 
-def _materialize_minimal_typography(style_block: str, style_id: str, arch_styles_xml_text: str) -> str:
+def _materialize_minimal_typography(style_block: str, style_id: str, arch_styles: Union[str, StyleIndex]) -> str:
     """
     Make imported styles resilient across documents by ensuring a minimal set of
     typography-related rPr children exist (fonts, sizes, language).
@@ -726,7 +1165,9 @@ def _materialize_minimal_typography(style_block: str, style_id: str, arch_styles
     - Only copies missing nodes from the *effective* arch style chain + docDefaults.
     - Avoids rewriting the whole block.
     """
-    eff_rpr = _effective_rpr_inner_in_arch(arch_styles_xml_text, style_id).strip()
+    idx = StyleIndex.of(arch_styles)
+    eff_nodes = idx.effective_rpr_nodes(style_id)
+    eff_rpr = idx.effective_rpr_inner(style_id).strip()
     if not eff_rpr:
         return style_block
 
@@ -745,20 +1186,10 @@ def _materialize_minimal_typography(style_block: str, style_id: str, arch_styles
 
     missing_nodes: List[str] = []
 
-    def _get_child_node(tag: str) -> Optional[str]:
-        # self-closing or paired tags, searched within eff_rpr
-        m = re.search(rf"(<w:{tag}\b[^>]*/>)", eff_rpr)
-        if m:
-            return m.group(1)
-        m = re.search(rf"(<w:{tag}\b[^>]*>[\s\S]*?</w:{tag}>)", eff_rpr, flags=re.S)
-        if m:
-            return m.group(1)
-        return None
-
-    for tag in ["rFonts", "sz", "szCs", "lang"]:
+    for tag in FORCE_RPR_TAGS:
         if _rpr_contains_tag(cur_rpr, tag):
             continue
-        node = _get_child_node(tag)
+        node = eff_nodes.get(tag)
         if node:
             missing_nodes.append(node)
 
@@ -768,7 +1199,7 @@ def _materialize_minimal_typography(style_block: str, style_id: str, arch_styles
     insertion = "".join(missing_nodes)
     return _inject_missing_rpr_children(style_block, insertion)
 
-def materialize_arch_style_block(style_block: str, style_id: str, arch_styles_xml_text: str) -> str:
+def materialize_arch_style_block(style_block: str, style_id: str, arch_styles: Union[str, StyleIndex]) -> str:
     """
     Phase 2: import-time style hardening.
 
@@ -786,7 +1217,7 @@ def materialize_arch_style_block(style_block: str, style_id: str, arch_styles_xm
 
     # Inject pPr only if missing entirely (paragraph styles only)
     if stype == "paragraph" and "<w:pPr" not in style_block:
-        effp = _effective_ppr_inner_in_arch(arch_styles_xml_text, style_id)
+        effp = _effective_ppr_inner_in_arch(arch_styles, style_id)
         if effp.strip():
             style_block = style_block.replace(
                 "</w:style>",
@@ -794,42 +1225,12 @@ def materialize_arch_style_block(style_block: str, style_id: str, arch_styles_xm
             )
 
     # Typography materialization
-    style_block = _materialize_minimal_typography(style_block, style_id, arch_styles_xml_text)
+    style_block = _materialize_minimal_typography(style_block, style_id, arch_styles)
 
     return style_block
 
 W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 
-def iter_paragraph_xml_blocks(document_xml_text: str):
-    # Non-greedy paragraph blocks. Works well for DOCX document.xml.
-    # NOTE: This intentionally avoids parsing full XML to keep indices aligned with raw text.
-    for m in re.finditer(r"(<w:p\b[\s\S]*?</w:p>)", document_xml_text):
-        yield m.start(), m.end(), m.group(1)
-
-
-def paragraph_text_from_block(p_xml: str) -> str:
-    texts = re.findall(r"<w:t\b[^>]*>([\s\S]*?)</w:t>", p_xml)
-    if not texts:
-        return ""
-    joined = html.unescape("".join(texts))
-    joined = re.sub(r"\s+", " ", joined).strip()
-    return joined
-
-def paragraph_contains_sectpr(p_xml: str) -> bool:
-    return "<w:sectPr" in p_xml
-
-def paragraph_pstyle_from_block(p_xml: str) -> Optional[str]:
-    m = re.search(r"<w:pStyle\b[^>]*w:val=\"([^\"]+)\"", p_xml)
-    return m.group(1) if m else None
-
-def paragraph_numpr_from_block(p_xml: str) -> Dict[str, Optional[str]]:
-    numId = None
-    ilvl = None
-    m1 = re.search(r"<w:numId\b[^>]*w:val=\"([^\"]+)\"", p_xml)
-    m2 = re.search(r"<w:ilvl\b[^>]*w:val=\"([^\"]+)\"", p_xml)
-    if m1: numId = m1.group(1)
-    if m2: ilvl = m2.group(1)
-    return {"numId": numId, "ilvl": ilvl}
 
 def paragraph_ppr_hints_from_block(p_xml: str) -> Dict[str, Any]:
     # lightweight hints (alignment + ind + spacing)
@@ -854,6 +1255,58 @@ def paragraph_ppr_hints_from_block(p_xml: str) -> Dict[str, Any]:
     return hints
 
 
+def _find_open_tag(xml: str, tag: str, start: int, end: int) -> int:
+    """Position of the next `tag` (e.g. "<w:r") not followed by a name character, or -1."""
+    n = len(tag)
+    pos = xml.find(tag, start, end)
+    while pos != -1:
+        nxt = xml[pos + n:pos + n + 1]
+        if not (nxt.isalnum() or nxt == "_"):
+            return pos
+        pos = xml.find(tag, pos + n, end)
+    return -1
+
+
+# rPr children strip_run_font_formatting removes: rFonts (self-closing or with
+# content), sz and szCs (self-closing only)
+_RUN_FONT_TAG_RX = re.compile(r"<w:(rFonts|szCs|sz)\b[^>]*>")
+
+
+def _strip_font_from_rpr(rpr: str) -> str:
+    """
+    Drop rFonts/sz/szCs from one raw <w:rPr>...</w:rPr> string in a single
+    left-to-right pass; returns '' if nothing but whitespace is left inside.
+    """
+    out: List[str] = []
+    last = 0
+    m = _RUN_FONT_TAG_RX.search(rpr, 1)
+    while m:
+        if m.group(0).endswith("/>"):
+            drop_end = m.end()
+        elif m.group(1) == "rFonts":
+            close = rpr.find("</w:rFonts>", m.end())
+            drop_end = close + len("</w:rFonts>") if close != -1 else -1
+        else:
+            drop_end = -1
+        if drop_end == -1:
+            m = _RUN_FONT_TAG_RX.search(rpr, m.start() + 1)
+            continue
+        out.append(rpr[last:m.start()])
+        last = drop_end
+        m = _RUN_FONT_TAG_RX.search(rpr, drop_end)
+    if out:
+        out.append(rpr[last:])
+        result = "".join(out)
+    else:
+        result = rpr
+
+    # Check if empty - remove entirely if so
+    inner = result[result.find(">") + 1:result.rfind("</w:rPr>")]
+    if not inner.strip():
+        return ""
+    return result
+
+
 def strip_run_font_formatting(p_xml: str) -> str:
     """
     Strip font-related formatting from all runs in a paragraph.
@@ -871,102 +1324,112 @@ def strip_run_font_formatting(p_xml: str) -> str:
     - Colors, highlighting
     - Character styles (<w:rStyle>)
     - Everything else
+
+    The paragraph is walked once with str.find: each run's first rPr is
+    rewritten in place and everything else is copied through as slices.
     """
     # Don't touch sectPr paragraphs
     if "<w:sectPr" in p_xml:
         return p_xml
-    
-    def strip_font_from_rpr_text(rpr_text: str) -> str:
-        """Process a raw rPr string."""
-        result = rpr_text
-        # Strip rFonts (self-closing or with content)
-        result = re.sub(r'<w:rFonts\b[^>]*/>', '', result)
-        result = re.sub(r'<w:rFonts\b[^>]*>[\s\S]*?</w:rFonts>', '', result, flags=re.S)
-        # Strip sz (font size)
-        result = re.sub(r'<w:sz\b[^>]*/>', '', result)
-        # Strip szCs (complex script font size)
-        result = re.sub(r'<w:szCs\b[^>]*/>', '', result)
-        
-        # Check if empty - remove entirely if so
-        inner = re.sub(r'<w:rPr\b[^>]*>([\s\S]*)</w:rPr>', r'\1', result, flags=re.S)
-        if not inner.strip():
-            return ''
-        return result
-    
-    def process_run(run_match):
-        """Process a single <w:r>...</w:r> block."""
-        run_block = run_match.group(0)
-        
-        # Find and replace rPr inside this run
-        run_block = re.sub(
-            r'<w:rPr\b[^>]*>[\s\S]*?</w:rPr>',
-            lambda m: strip_font_from_rpr_text(m.group(0)),
-            run_block,
-            count=1,
-            flags=re.S
-        )
-        return run_block
-    
-    # Process each run in the paragraph
-    result = re.sub(
-        r'<w:r\b[^>]*>[\s\S]*?</w:r>',
-        process_run,
-        p_xml,
-        flags=re.S
-    )
-    
-    return result
+    # No run properties, nothing to strip
+    if "<w:rPr" not in p_xml:
+        return p_xml
 
+    out: List[str] = []
+    last = 0
+    pos = 0
+    n = len(p_xml)
+    while True:
+        # Next <w:r ...> ... </w:r> (up to the first </w:r>, as a non-greedy match would)
+        run_start = _find_open_tag(p_xml, "<w:r", pos, n)
+        if run_start == -1:
+            break
+        tag_end = p_xml.find(">", run_start)
+        if tag_end == -1:
+            break
+        run_close = p_xml.find("</w:r>", tag_end + 1)
+        if run_close == -1:
+            break
+        run_end = run_close + len("</w:r>")
+
+        # First <w:rPr ...> ... </w:rPr> inside this run
+        rpr_start = _find_open_tag(p_xml, "<w:rPr", run_start, run_end)
+        if rpr_start != -1:
+            rpr_tag_end = p_xml.find(">", rpr_start, run_end)
+            rpr_close = p_xml.find("</w:rPr>", rpr_tag_end + 1, run_end) if rpr_tag_end != -1 else -1
+            if rpr_close != -1:
+                rpr_end = rpr_close + len("</w:rPr>")
+                out.append(p_xml[last:rpr_start])
+                out.append(_strip_font_from_rpr(p_xml[rpr_start:rpr_end]))
+                last = rpr_end
+        pos = run_end
+
+    if not out:
+        return p_xml
+    out.append(p_xml[last:])
+    return "".join(out)
+
+
+# Contract check: elements apply_phase2_classifications is ALLOWED to change,
+# stripped (in this order) from a paragraph before comparing it with the original:
+# pStyle, numPr (we may materialize it) and run-level font formatting
+# (rFonts, sz, szCs), then any rPr left empty by that.
+_CONTRACT_STRIP_BRX = [
+    re.compile(rb"<w:pStyle\b[^>]*/>"),
+    re.compile(rb"<w:numPr\b[^>]*>[\s\S]*?</w:numPr>"),
+    re.compile(rb"<w:rFonts\b[^>]*/>"),
+    re.compile(rb"<w:rFonts\b[^>]*>[\s\S]*?</w:rFonts>"),
+    re.compile(rb"<w:sz\b[^>]*/>"),
+    re.compile(rb"<w:szCs\b[^>]*/>"),
+    re.compile(rb"<w:rPr>\s*</w:rPr>"),
+    re.compile(rb"<w:rPr\s*/>"),
+]
+
+def _normalize_paragraph_for_contract(p_xml: bytes) -> bytes:
+    """
+    Normalize paragraph for contract comparison.
+    Strips elements we're allowed to change.
+    """
+    out = p_xml
+    for rx in _CONTRACT_STRIP_BRX:
+        out = rx.sub(b"", out)
+    return out
 
 def apply_phase2_classifications(
     extract_dir: Path,
     classifications: Dict[str, Any],
     arch_style_registry: Dict[str, str],
-    log: List[str]
+    log: List[str],
+    paragraph_index: Optional[ParagraphIndex] = None,
+    parts: Optional[PartStore] = None,
+    paragraph_seconds: Optional[Dict[int, float]] = None
 ) -> None:
     """
     Apply CSI role classifications to paragraphs by setting pStyle.
     
     Also strips run-level font formatting so the style's fonts take effect.
     This handles MasterSpec/ARCOM documents that have hardcoded fonts in every run.
+
+    If paragraph_index is given it must have been built from the current
+    document.xml; it is reused instead of rescanning the document.
+    If parts is given, document.xml is updated in the store and not written.
+    If paragraph_seconds is given, the time spent editing each classified
+    paragraph is recorded in it (paragraph index -> seconds).
     """
-    doc_path = extract_dir / "word" / "document.xml"
-    doc_text = doc_path.read_text(encoding="utf-8")
+    store = parts or PartStore(extract_dir)
+    if paragraph_index is None:
+        paragraph_index = ParagraphIndex.build(store.get_bytes("word/document.xml"))
 
     # Load styles once so we can preserve style-linked numbering before swapping styles
-    styles_xml_text = (extract_dir / "word" / "styles.xml").read_text(encoding="utf-8")
-    style_ids_in_styles = set(re.findall(r'w:styleId="([^"]+)"', styles_xml_text))
+    styles = StyleIndex(store.get_text("word/styles.xml"))
 
-    blocks = list(iter_paragraph_xml_blocks(doc_text))
-    para_blocks = [b[2] for b in blocks]
+    # Only modified paragraphs are copied; the rest stay in the index's bytes
+    edits = ParagraphEdits(paragraph_index)
+    paragraph_count = len(paragraph_index)
 
     # Track which paragraphs we modify (for logging)
     modified_indices = set()
 
-    # Contract check: normalize paragraphs for comparison
-    # We now ALLOW changes to: pStyle, numPr, and run-level font formatting (rFonts, sz, szCs)
-    def _normalize_paragraph_for_contract(p_xml: str) -> str:
-        """
-        Normalize paragraph for contract comparison.
-        Strips elements we're allowed to change.
-        """
-        out = p_xml
-        # Strip pStyle (we change this)
-        out = re.sub(r"<w:pStyle\b[^>]*/>", "", out)
-        # Strip numPr (we may materialize this)
-        out = re.sub(r"<w:numPr\b[^>]*>[\s\S]*?</w:numPr>", "", out, flags=re.S)
-        # Strip run-level font formatting (we now strip this too)
-        out = re.sub(r"<w:rFonts\b[^>]*/>", "", out)
-        out = re.sub(r"<w:rFonts\b[^>]*>[\s\S]*?</w:rFonts>", "", out, flags=re.S)
-        out = re.sub(r"<w:sz\b[^>]*/>", "", out)
-        out = re.sub(r"<w:szCs\b[^>]*/>", "", out)
-        # Clean up empty rPr blocks that might result
-        out = re.sub(r"<w:rPr>\s*</w:rPr>", "", out)
-        out = re.sub(r"<w:rPr\s*/>", "", out)
-        return out
-
-    contract_before = [_normalize_paragraph_for_contract(p) for p in para_blocks]
-
     items = classifications.get("classifications", [])
     if not isinstance(items, list):
         raise ValueError("phase2 classifications: 'classifications' must be a list")
@@ -979,7 +1442,7 @@ def apply_phase2_classifications(
         idx = item.get("paragraph_index")
         role = item.get("csi_role")
 
-        if not isinstance(idx, int) or idx < 0 or idx >= len(para_blocks):
+        if not isinstance(idx, int) or idx < 0 or idx >= paragraph_count:
             log.append(f"Invalid paragraph_index in classifications: {idx!r}")
             continue
 
@@ -992,42 +1455,45 @@ def apply_phase2_classifications(
             log.append(f"Unmapped CSI role '{role}' at paragraph {idx} (skipped)")
             continue
 
-        if style_id not in style_ids_in_styles:
+        if style_id not in styles:
             raise ValueError(
                 f"Phase 2 needs styleId '{style_id}' for role '{role}' at paragraph {idx}, "
                 "but that styleId is not present in target word/styles.xml. "
                 "Import failed or registry mismatch."
             )
 
-        if paragraph_contains_sectpr(para_blocks[idx]):
+        if paragraph_index[idx].contains_sectpr:
             log.append(f"Skipped sectPr paragraph at index {idx}")
             continue
 
+        if paragraph_seconds is not None:
+            t0 = time.perf_counter()
+
         # Preserve list continuation by materializing style-linked numPr *before* swapping styles.
-        pb = para_blocks[idx]
-        pb = ensure_explicit_numpr_from_current_style(pb, styles_xml_text)
+        pb = edits.get(idx)
+        pb = ensure_explicit_numpr_from_current_style(pb, styles)
 
         # NEW: Strip run-level font formatting so style fonts take effect
         pb = strip_run_font_formatting(pb)
 
         # Now safely swap pStyle
-        para_blocks[idx] = apply_pstyle_to_paragraph_block(pb, style_id)
+        edits.set(idx, apply_pstyle_to_paragraph_block(pb, style_id))
         modified_indices.add(idx)
 
+        if paragraph_seconds is not None:
+            paragraph_seconds[idx] = paragraph_seconds.get(idx, 0.0) + time.perf_counter() - t0
+
     # Log summary
     log.append(f"Applied styles to {len(modified_indices)} paragraphs")
     log.append(f"Stripped run-level font formatting from modified paragraphs")
 
-    # Enforce the diff contract.
-    contract_after = [_normalize_paragraph_for_contract(p) for p in para_blocks]
-    if len(contract_before) != len(contract_after):
-        raise RuntimeError("Internal error: paragraph count changed during Phase 2 application")
-
-    for i, (b, a) in enumerate(zip(contract_before, contract_after)):
+    def _check_contract(i: int, before: bytes, after: bytes) -> None:
+        b = _normalize_paragraph_for_contract(before)
+        a = _normalize_paragraph_for_contract(after)
         if b != a:
             diff = "\n".join(difflib.unified_diff(
-                b.splitlines(),
-                a.splitlines(),
+                b.decode("utf-8").splitlines(),
+                a.decode("utf-8").splitlines(),
                 fromfile=f"before:p[{i}]",
                 tofile=f"after:p[{i}]",
                 lineterm=""
@@ -1037,15 +1503,25 @@ def apply_phase2_classifications(
                 f"(pStyle/numPr/run fonts) at paragraph index {i}.\n" + diff[:4000]
             )
 
-    # Rebuild document.xml
-    out = []
-    last = 0
-    for (s, e, _), pb in zip(blocks, para_blocks):
-        out.append(doc_text[last:s])
-        out.append(pb)
-        last = e
-    out.append(doc_text[last:])
-    doc_path.write_text("".join(out), encoding="utf-8")
+    # Enforce the diff contract. Only edited paragraphs can differ, so only
+    # those are normalized; everything else must checksum the same as before.
+    for i in edits.indices():
+        _check_contract(i, paragraph_index.block_bytes(i), edits.get_bytes(i))
+
+    # Rebuild document.xml from the original bytes plus the edited paragraphs
+    new_doc_xml = edits.rebuild()
+    if edits.untouched_fingerprint(new_doc_xml) != edits.untouched_fingerprint():
+        # Something outside the edits moved: rescan and compare every paragraph to report where
+        rebuilt_index = ParagraphIndex.build(new_doc_xml)
+        if len(rebuilt_index) != paragraph_count:
+            raise RuntimeError("Internal error: paragraph count changed during Phase 2 application")
+        for i in range(paragraph_count):
+            _check_contract(i, paragraph_index.block_bytes(i), rebuilt_index.block_bytes(i))
+        raise RuntimeError("Internal error: document.xml changed outside paragraphs during Phase 2 application")
+    memory_checkpoint("apply_phase2_classifications: document.xml rebuilt")
+    store.set_bytes("word/document.xml", new_doc_xml)
+    if parts is None:
+        store.flush()
 
 
 def resolve_arch_extract_root(p: Path) -> Path:
@@ -1095,6 +1571,19 @@ def load_available_roles_from_registry(registry_path: Path) -> Optional[List[str
     return sorted(roles.keys())
 
 
+def needed_style_ids_for_classifications(
+    classifications: Dict[str, Any],
+    arch_registry: Dict[str, str]
+) -> List[str]:
+    """Architect styleIds for the roles actually used by a classifications JSON."""
+    used_roles = {
+        item.get("csi_role")
+        for item in classifications.get("classifications", [])
+        if isinstance(item, dict) and isinstance(item.get("csi_role"), str)
+    }
+    return sorted({arch_registry[r] for r in used_roles if r in arch_registry})
+
+
 def load_arch_style_registry(arch_extract_dir: Path) -> Dict[str, str]:
     """
     Phase 2 contract (STRICT):
@@ -1213,22 +1702,60 @@ BOILERPLATE_PATTERNS = [
 # Pre-compile for speed and to avoid repeated regex compilation
 _BOILERPLATE_RX = [(re.compile(pat, flags=re.MULTILINE), tag) for pat, tag in BOILERPLATE_PATTERNS]
 
-def strip_boilerplate_with_report(content: str) -> tuple[str, list[str]]:
+BOILERPLATE_HITS_NAME = "phase2_boilerplate_hits.json"
+
+# Every BOILERPLATE_PATTERNS match contains at least one of these literals
+# (compared case-insensitively, with the same case folding as the (?i) patterns).
+# A paragraph containing none of them cannot match, so the pattern loop is
+# skipped. Keep this in step when adding a pattern.
+BOILERPLATE_PREFILTER_LITERALS = [
+    "pecifier", "<<",
+    "retain", "revise", "this section uses the term", "verify that section titles",
+    "coordinate", "the list below matches", "evaluation", "characteristics are important",
+    "inspections in this article are", "materials and thicknesses", "do not duplicate requirements",
+    "consider the exposure", "thicknesses are limited", "insulation should have", "prepared to reject",
+    "copyright", "©", "exclusively published", "all rights reserved", "proprietary",
+    "****", "----", "====",
+    "page", "{revision",
+]
+_BOILERPLATE_PREFILTER_RX = re.compile(
+    "|".join(re.escape(lit) for lit in BOILERPLATE_PREFILTER_LITERALS), flags=re.IGNORECASE
+)
+
+def _may_contain_boilerplate(content: str) -> bool:
+    # ASCII text folds like str.lower(), and plain substring tests beat the
+    # regex alternation; non-ASCII text (e.g. long s, Kelvin sign) uses the regex
+    if content.isascii():
+        lowered = content.lower()
+        return any(lit in lowered for lit in BOILERPLATE_PREFILTER_LITERALS)
+    return _BOILERPLATE_PREFILTER_RX.search(content) is not None
+
+def strip_boilerplate_with_report(
+    content: str,
+    pattern_hits: Optional[Dict[str, int]] = None
+) -> tuple[str, list[str]]:
     """
     Strip boilerplate from a paragraph string and return (cleaned_text, matched_tags).
     Placeholders are NOT stripped here (your patterns do not remove generic [ ... ] placeholders).
+
+    If pattern_hits is given, each pattern that matched is counted in it
+    (pattern source -> paragraphs matched).
     """
     cleaned = content
     hits: list[str] = []
 
-    for rx, tag in _BOILERPLATE_RX:
-        if rx.search(cleaned):
-            hits.append(tag)
-            cleaned = rx.sub('', cleaned)
+    if _may_contain_boilerplate(content):
+        for rx, tag in _BOILERPLATE_RX:
+            if rx.search(cleaned):
+                hits.append(tag)
+                cleaned = rx.sub('', cleaned)
+                if pattern_hits is not None:
+                    pattern_hits[rx.pattern] = pattern_hits.get(rx.pattern, 0) + 1
 
     # Clean up whitespace
-    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
-    cleaned = re.sub(r'[ \t]+\n', '\n', cleaned)
+    if "\n" in cleaned:
+        cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
+        cleaned = re.sub(r'[ \t]+\n', '\n', cleaned)
     cleaned = cleaned.strip()
 
     # Deduplicate tags (stable order)
@@ -1239,10 +1766,26 @@ def strip_boilerplate_with_report(content: str) -> tuple[str, list[str]]:
     return cleaned, hits
 
 
+def boilerplate_hit_report(pattern_hits: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Hit count for every BOILERPLATE_PATTERNS entry, in table order (0 = never matched)."""
+    return [
+        {"pattern": pat, "tag": tag, "hits": pattern_hits.get(pat, 0)}
+        for pat, tag in BOILERPLATE_PATTERNS
+    ]
+
+
 def build_phase2_slim_bundle(
     extract_dir: Path,
     discipline: str,
-    available_roles: Optional[List[str]] = None
+    available_roles: Optional[List[str]] = None,
+    paragraph_index: Optional[ParagraphIndex] = None,
+    pattern_hits: Optional[Dict[str, int]] = None,
+    previous_revision: Optional[Dict[str, Any]] = None,
+    carried_over: Optional[Dict[str, Any]] = None,
+    role_cache: Optional[RoleCache] = None,
+    cached: Optional[Dict[str, Any]] = None,
+    rule_classifier: Optional[RuleClassifier] = None,
+    preclassified: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Build the slim bundle for Phase 2 LLM classification.
@@ -1252,28 +1795,84 @@ def build_phase2_slim_bundle(
         discipline: "mechanical" or "plumbing"
         available_roles: List of role names available in the architect template.
                         If None, all standard roles are allowed.
+        paragraph_index: Prebuilt index of document.xml. Built from extract_dir if None.
+        pattern_hits: If given, per-pattern boilerplate hit counts are added to it
+                      (see strip_boilerplate_with_report).
+        previous_revision: Previous revision of this spec (see load_previous_revision).
+                      Paragraphs unchanged since then are left out of the bundle.
+        carried_over: If given with previous_revision, filled with the carried-over
+                      classifications for the unchanged paragraphs (see
+                      carry_over_classifications).
+        role_cache: Cross-document role cache (see role_cache.py). Paragraphs it
+                      knows the role of, or knows to leave unclassified, are left
+                      out of the bundle; the latter are listed in filter_report.
+        cached: If given with role_cache, filled with a classifications dict of
+                      the cache hits ("unclassified": the skipped paragraphs).
+        rule_classifier: Deterministic pre-classifier (see rule_classifier.py).
+                      Paragraphs it classifies with high confidence are left out
+                      of the bundle; filter_report lists its confidence for every
+                      paragraph a rule fired on.
+        preclassified: If given with rule_classifier, filled with a
+                      classifications dict of the accepted rule matches.
     
     Returns:
         Dict containing document_meta, available_roles, filter_report, and paragraphs
     """
-    doc_path = extract_dir / "word" / "document.xml"
-    doc_text = doc_path.read_text(encoding="utf-8")
+    if paragraph_index is None:
+        paragraph_index = ParagraphIndex.from_extract_dir(extract_dir)
+
+    # Default roles if none specified
+    if available_roles is None:
+        available_roles = [
+            "SectionID",
+            "SectionTitle", 
+            "PART",
+            "ARTICLE",
+            "PARAGRAPH",
+            "SUBPARAGRAPH",
+            "SUBSUBPARAGRAPH"
+        ]
+
+    unchanged: Dict[int, int] = {}
+    carried_roles: Dict[int, str] = {}
+    if previous_revision is not None:
+        carry = carry_over_classifications(previous_revision, paragraph_index)
+        unchanged = carry.pop("aligned")
+        carried_roles = {item["paragraph_index"]: item["csi_role"] for item in carry["classifications"]}
+        if carried_over is not None:
+            carried_over.update(carry)
 
     paragraphs = []
     filter_report = {
         "paragraphs_removed_entirely": [],
         "paragraphs_stripped": []
     }
-
-    for idx, (_s, _e, p_xml) in enumerate(iter_paragraph_xml_blocks(doc_text)):
-        if paragraph_contains_sectpr(p_xml):
+    cache_hits: List[Dict[str, Any]] = []
+    cache_skips: List[int] = []
+    if role_cache is not None:
+        filter_report["paragraphs_role_cache_skipped"] = []
+    rule_hits: List[Dict[str, Any]] = []
+    if rule_classifier is not None:
+        filter_report["paragraphs_preclassified"] = []
+        filter_report["paragraphs_rule_uncertain"] = []
+    # Role of the nearest preceding classified paragraph; None (unknown) once a
+    # paragraph is left to the LLM (the role cache is keyed on it, see role_cache.py)
+    prev_role: Optional[str] = ""
+
+    for rec in paragraph_index:
+        idx = rec.index
+        if rec.contains_sectpr:
+            continue
+        if idx in unchanged:
+            if idx in carried_roles:
+                prev_role = carried_roles[idx]
             continue
 
-        raw_text = paragraph_text_from_block(p_xml)
+        raw_text = rec.text
         if not raw_text:
             continue
 
-        cleaned_text, tags = strip_boilerplate_with_report(raw_text)
+        cleaned_text, tags = strip_boilerplate_with_report(raw_text, pattern_hits)
 
         if not cleaned_text:
             if tags:
@@ -1290,7 +1889,45 @@ def build_phase2_slim_bundle(
                 "tags": tags
             })
 
-        numpr = paragraph_numpr_from_block(p_xml)
+        if rule_classifier is not None:
+            match = rule_classifier.match(rec, cleaned_text)
+            if match is not None:
+                entry = {
+                    "paragraph_index": idx,
+                    "csi_role": match.role,
+                    "confidence": match.confidence,
+                    "rule": match.rule
+                }
+                if rule_classifier.accepts(match):
+                    filter_report["paragraphs_preclassified"].append(entry)
+                    rule_hits.append({"paragraph_index": idx, "csi_role": match.role})
+                    prev_role = match.role
+                    continue
+                if match.rule.startswith("conflict:"):
+                    entry["reason"] = "rules disagree"
+                elif match.role not in rule_classifier.available_roles:
+                    entry["reason"] = "role not available"
+                else:
+                    entry["reason"] = "below min confidence"
+                filter_report["paragraphs_rule_uncertain"].append(entry)
+
+        if role_cache is not None:
+            role = role_cache.lookup(raw_text, rec.ilvl, prev_role)
+            if role == "":
+                # Left unclassified in enough earlier applies
+                cache_skips.append(idx)
+                filter_report["paragraphs_role_cache_skipped"].append({
+                    "paragraph_index": idx,
+                    "original_text_preview": raw_text[:120]
+                })
+                continue
+            if role in available_roles:
+                cache_hits.append({"paragraph_index": idx, "csi_role": role})
+                prev_role = role
+                continue
+        prev_role = None
+
+        numpr = rec.numpr
 
         paragraphs.append({
             "paragraph_index": idx,
@@ -1299,19 +1936,27 @@ def build_phase2_slim_bundle(
             "contains_sectPr": False
         })
 
-    # Default roles if none specified
-    if available_roles is None:
-        available_roles = [
-            "SectionID",
-            "SectionTitle", 
-            "PART",
-            "ARTICLE",
-            "PARAGRAPH",
-            "SUBPARAGRAPH",
-            "SUBSUBPARAGRAPH"
-        ]
+    if rule_classifier is not None and preclassified is not None:
+        preclassified.update({
+            "classifications": rule_hits,
+            "notes": [
+                f"Rule pre-classifier (min confidence {rule_classifier.min_confidence}): "
+                f"{len(rule_hits)} classifications"
+            ],
+        })
+    if role_cache is not None and cached is not None:
+        cached.update({
+            "classifications": cache_hits,
+            "unclassified": cache_skips,
+            "notes": [
+                f"Role cache {role_cache.path.name}: {len(cache_hits)} classifications, "
+                f"{len(cache_skips)} left unclassified"
+            ],
+        })
 
-    return {
+    memory_checkpoint("build_phase2_slim_bundle: paragraphs collected")
+
+    bundle = {
         "document_meta": {
             "discipline": discipline
         },
@@ -1319,9 +1964,17 @@ def build_phase2_slim_bundle(
         "filter_report": filter_report,
         "paragraphs": paragraphs
     }
+    if previous_revision is not None:
+        bundle["document_meta"]["revision_of"] = previous_revision["source"]
+        bundle["document_meta"]["unchanged_paragraphs"] = len(unchanged)
+    if rule_classifier is not None:
+        bundle["document_meta"]["rule_preclassified"] = len(rule_hits)
+    if role_cache is not None:
+        bundle["document_meta"]["role_cache_hits"] = len(cache_hits)
+    return bundle
 
 
-def _collect_style_deps_from_arch(arch_styles_text: str, style_id: str, seen: Set[str]) -> None:
+def _collect_style_deps_from_arch(arch_styles: Union[str, StyleIndex], style_id: str, seen: Set[str]) -> None:
     """
     Recursively collect styleId dependencies via <w:basedOn w:val="..."/>.
     """
@@ -1329,26 +1982,22 @@ def _collect_style_deps_from_arch(arch_styles_text: str, style_id: str, seen: Se
         return
     seen.add(style_id)
 
-    blk = extract_style_block_raw(arch_styles_text, style_id)
-    if not blk:
+    entry = StyleIndex.of(arch_styles).get(style_id)
+    if not entry:
         return
 
-    m = re.search(r'<w:basedOn\b[^>]*w:val="([^"]+)"', blk)
-    if m:
-        base = m.group(1)
-        if base and base not in seen:
-            _collect_style_deps_from_arch(arch_styles_text, base, seen)
+    base = entry.based_on
+    if base and base not in seen:
+        _collect_style_deps_from_arch(arch_styles, base, seen)
 
 
-def extract_style_block_raw(styles_xml_text: str, style_id: str) -> Optional[str]:
+def extract_style_block_raw(styles: Union[str, StyleIndex], style_id: str) -> Optional[str]:
     """
-    Extract the raw <w:style ...>...</w:style> block for a given styleId using regex.
+    Extract the raw <w:style ...>...</w:style> block for a given styleId.
     This avoids ET rewriting / reformatting.
     """
-    # styleId can include characters that need escaping in regex
-    sid = re.escape(style_id)
-    m = re.search(rf'(<w:style\b[^>]*w:styleId="{sid}"[^>]*>[\s\S]*?</w:style>)', styles_xml_text)
-    return m.group(1) + "\n" if m else None
+    blk = StyleIndex.of(styles).block(style_id)
+    return blk + "\n" if blk else None
 
 
 def import_arch_styles_into_target(
@@ -1356,26 +2005,35 @@ def import_arch_styles_into_target(
     arch_extract_dir: Path,
     needed_style_ids: List[str],
     log: List[str], 
-    style_numid_remap: Optional[Dict[str, Dict[str, int]]] = None
+    style_numid_remap: Optional[Dict[str, Dict[str, int]]] = None,
+    template_pack: Optional[Dict[str, Any]] = None,
+    parts: Optional[PartStore] = None
 ) -> None:
     """
     Copy specific style blocks from architect styles.xml into target styles.xml (idempotent),
     including basedOn dependencies.
-    """
-    arch_extract_dir = resolve_arch_extract_root(arch_extract_dir)
-
-    arch_styles_path = arch_extract_dir / "word" / "styles.xml"
-    tgt_styles_path = target_extract_dir / "word" / "styles.xml"
 
-    arch_styles_text = arch_styles_path.read_text(encoding="utf-8")
-    tgt_styles_text = tgt_styles_path.read_text(encoding="utf-8")
+    If template_pack is given, dependency closures and pre-materialized blocks come
+    from the pack and the architect styles.xml is not read.
+    If parts is given, the target styles.xml is updated in the store and not written.
+    """
+    store = parts or PartStore(target_extract_dir)
+    tgt_styles_text = store.get_text("word/styles.xml")
 
     existing = set(re.findall(r'w:styleId="([^"]+)"', tgt_styles_text))
 
     # Expand basedOn deps
     expanded: Set[str] = set()
-    for sid in needed_style_ids:
-        _collect_style_deps_from_arch(arch_styles_text, sid, expanded)
+    if template_pack is not None:
+        arch_styles = None
+        for sid in needed_style_ids:
+            expanded.update(template_pack["dependencies"].get(sid) or [sid])
+    else:
+        arch_extract_dir = resolve_arch_extract_root(arch_extract_dir)
+        arch_styles_path = arch_extract_dir / "word" / "styles.xml"
+        arch_styles = StyleIndex(arch_styles_path.read_text(encoding="utf-8"))
+        for sid in needed_style_ids:
+            _collect_style_deps_from_arch(arch_styles, sid, expanded)
 
     blocks: List[str] = []
     missing: List[str] = []
@@ -1383,7 +2041,11 @@ def import_arch_styles_into_target(
         if sid in existing:
             continue
 
-        blk = extract_style_block_raw(arch_styles_text, sid)
+        if arch_styles is None:
+            packed = template_pack["styles"].get(sid)
+            blk = packed["block"] if packed else None
+        else:
+            blk = extract_style_block_raw(arch_styles, sid)
         if not blk:
             missing.append(sid)
             continue
@@ -1412,7 +2074,9 @@ def import_arch_styles_into_target(
 
 
         # HARDEN: make style self-contained (pPr/rPr) to prevent font drift
-        blk = materialize_arch_style_block(blk, sid, arch_styles_text)
+        # (template pack blocks were materialized at compile time)
+        if arch_styles is not None:
+            blk = materialize_arch_style_block(blk, sid, arch_styles)
 
         blocks.append(blk)
 
@@ -1433,7 +2097,9 @@ def import_arch_styles_into_target(
 
     tgt_new = insert_styles_into_styles_xml(tgt_styles_text, blocks)
     if tgt_new != tgt_styles_text:
-        tgt_styles_path.write_text(tgt_new, encoding="utf-8")
+        store.set_text("word/styles.xml", tgt_new)
+        if parts is None:
+            store.flush()
 
 
 def insert_styles_into_styles_xml(styles_xml_text: str, style_blocks: List[str]) -> str:
@@ -1512,7 +2178,8 @@ def write_phase2_preflight(
     arch_root: Path,
     arch_registry: Dict[str, str],
     classifications: Dict[str, Any],
-    out_path: Path
+    out_path: Path,
+    paragraph_index: Optional[ParagraphIndex] = None
 ) -> Dict[str, Any]:
     # Count classifications per role
     role_counts: Dict[str, int] = {}
@@ -1533,6 +2200,22 @@ def write_phase2_preflight(
         "unmapped_roles": unmapped_roles,
     }
 
+    # Paragraph-level checks against the same index the apply stage will use
+    if paragraph_index is not None:
+        out_of_range: List[Any] = []
+        sectpr_targets: List[int] = []
+        for item in classifications.get("classifications", []):
+            if not isinstance(item, dict):
+                continue
+            idx = item.get("paragraph_index")
+            if not isinstance(idx, int) or idx < 0 or idx >= len(paragraph_index):
+                out_of_range.append(idx)
+            elif paragraph_index[idx].contains_sectpr:
+                sectpr_targets.append(idx)
+        report["paragraph_count"] = len(paragraph_index)
+        report["invalid_paragraph_indices"] = out_of_range
+        report["sectpr_paragraph_targets"] = sectpr_targets
+
     out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
     return report
 
@@ -1544,11 +2227,12 @@ def sanitize_style_def(sd: Dict[str, Any]) -> Dict[str, Any]:
     return clean
 
 
-def snapshot_doc_rels_hash(extract_dir: Path) -> str:
-    rels_path = extract_dir / "word" / "_rels" / "document.xml.rels"
-    if not rels_path.exists():
+def snapshot_doc_rels_hash(extract_dir: Path, parts: Optional[PartStore] = None) -> str:
+    store = parts or PartStore(extract_dir)
+    rels = store.get_bytes("word/_rels/document.xml.rels")
+    if rels is None:
         return ""
-    return sha256_bytes(rels_path.read_bytes())
+    return sha256_bytes(rels)
 
 def ppr_without_pstyle(p_xml: str) -> str:
     """
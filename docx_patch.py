@@ -2,11 +2,153 @@
 from __future__ import annotations
 
 from pathlib import Path
+import copy
+import os
+import struct
 import zipfile
-from typing import Dict, Union
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from phase2_profile import memory_checkpoint
 
 BytesOrStr = Union[bytes, str]
 
+# Replacement parts at least this large are deflated on a worker thread
+# (zlib releases the GIL while compressing).
+PARALLEL_DEFLATE_THRESHOLD = 256 * 1024
+MAX_DEFLATE_WORKERS = 4
+
+# date_time for added parts when the source has no word/document.xml entry
+NEW_PART_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# ZIP record layouts (APPNOTE 4.3.7, 4.3.12, 4.3.16); the writer below only
+# produces non-ZIP64 archives and leaves anything else to zipfile
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+_END_RECORD = struct.Struct("<4s4H2LH")
+_END_RECORD_SIGNATURE = b"PK\x05\x06"
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_ZIP64_EXTRA_ID = 0x0001
+_MAX_ENTRIES = 0xFFFF
+
+
+def _deflate(data: bytes) -> bytes:
+    # Same settings zipfile uses for ZIP_DEFLATED at the default level
+    co = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return co.compress(data) + co.flush()
+
+
+def _can_raw_copy(info: zipfile.ZipInfo) -> bool:
+    if info.flag_bits & _FLAG_ENCRYPTED:
+        return False
+    # Leave ZIP64 entries to zipfile; a DOCX never gets near these limits
+    limit = zipfile.ZIP64_LIMIT
+    return info.file_size < limit and info.compress_size < limit and info.header_offset < limit
+
+
+def _read_raw_entry(src: BinaryIO, info: zipfile.ZipInfo) -> bytes:
+    """Compressed bytes of an entry exactly as stored in the source archive."""
+    src.seek(info.header_offset)
+    fields = _LOCAL_HEADER.unpack(src.read(_LOCAL_HEADER.size))
+    if fields[0] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_len, extra_len = fields[10], fields[11]
+    src.seek(info.header_offset + _LOCAL_HEADER.size + name_len + extra_len)
+    raw = src.read(info.compress_size)
+    if len(raw) != info.compress_size:
+        raise zipfile.BadZipFile(f"Truncated entry: {info.filename}")
+    return raw
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    out = bytearray()
+    i = 0
+    while i + 4 <= len(extra):
+        tag, size = struct.unpack("<2H", extra[i:i + 4])
+        if tag != _ZIP64_EXTRA_ID:
+            out += extra[i:i + 4 + size]
+        i += 4 + size
+    return bytes(out)
+
+
+def _dos_datetime(date_time) -> tuple:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11 | minute << 5 | second // 2), ((year - 1980) << 9 | month << 5 | day)
+
+
+class _RawZipWriter:
+    """
+    Minimal non-ZIP64 archive writer for entries that are already compressed:
+    local header + data per entry, then the central directory. Uses only the
+    public ZipInfo fields, so it does not depend on zipfile's writer internals.
+    """
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.entries: list = []
+
+    def add(self, zinfo: zipfile.ZipInfo, raw: bytes) -> None:
+        """zinfo must carry the final CRC and sizes (no data descriptor follows)."""
+        try:
+            name = zinfo.filename.encode("ascii")
+            flags = zinfo.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+        except UnicodeEncodeError:
+            name = zinfo.filename.encode("utf-8")
+            flags = (zinfo.flag_bits & ~_FLAG_DATA_DESCRIPTOR) | _FLAG_UTF8
+        extra = _strip_zip64_extra(zinfo.extra)
+        dostime, dosdate = _dos_datetime(zinfo.date_time)
+        offset = self.fp.tell()
+        if offset >= zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile("Output needs ZIP64")
+        self.fp.write(_LOCAL_HEADER.pack(
+            _LOCAL_HEADER_SIGNATURE, zinfo.extract_version, zinfo.reserved, flags,
+            zinfo.compress_type, dostime, dosdate, zinfo.CRC, zinfo.compress_size,
+            zinfo.file_size, len(name), len(extra)
+        ))
+        self.fp.write(name)
+        self.fp.write(extra)
+        self.fp.write(raw)
+        self.entries.append((zinfo, name, flags, extra, dostime, dosdate, offset))
+
+    def close(self, comment: bytes = b"") -> None:
+        if len(self.entries) >= _MAX_ENTRIES:
+            raise zipfile.LargeZipFile("Output needs ZIP64")
+        start = self.fp.tell()
+        for zinfo, name, flags, extra, dostime, dosdate, offset in self.entries:
+            self.fp.write(_CENTRAL_HEADER.pack(
+                _CENTRAL_HEADER_SIGNATURE, zinfo.create_version, zinfo.create_system,
+                zinfo.extract_version, zinfo.reserved, flags, zinfo.compress_type,
+                dostime, dosdate, zinfo.CRC, zinfo.compress_size, zinfo.file_size,
+                len(name), len(extra), len(zinfo.comment), 0, zinfo.internal_attr,
+                zinfo.external_attr, offset
+            ))
+            self.fp.write(name)
+            self.fp.write(extra)
+            self.fp.write(zinfo.comment)
+        end = self.fp.tell()
+        if end >= zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile("Output needs ZIP64")
+        comment = comment[:0xFFFF]
+        self.fp.write(_END_RECORD.pack(
+            _END_RECORD_SIGNATURE, 0, 0, len(self.entries), len(self.entries),
+            end - start, start, len(comment)
+        ))
+        self.fp.write(comment)
+
+
+def _replacement_info(template: zipfile.ZipInfo, data: bytes, compressed: bytes) -> zipfile.ZipInfo:
+    zinfo = copy.copy(template)
+    zinfo.CRC = zlib.crc32(data)
+    zinfo.file_size = len(data)
+    zinfo.compress_size = len(compressed)
+    return zinfo
+
+
 def patch_docx(
     src_docx: Path,
     out_docx: Path,
@@ -18,6 +160,13 @@ def patch_docx(
 
     This is NOT a "rebuild from extracted folder".
     It's a surgical patch: swap specific parts, preserve everything else.
+
+    Untouched entries are copied as raw compressed bytes (same CRC, sizes and
+    metadata) without being inflated and re-deflated. Only replacement parts are
+    compressed, large ones in parallel. The archive is written by
+    _RawZipWriter; sources it cannot handle (unusual compression, encryption,
+    ZIP64) are rewritten through zipfile instead. Either way the written
+    central directory is checked against the source before returning.
     """
     src_docx = Path(src_docx)
     out_docx = Path(out_docx)
@@ -67,27 +216,114 @@ def patch_docx(
     if out_docx.exists():
         out_docx.unlink()
 
-    with zipfile.ZipFile(src_docx, "r") as zin:
-        with zipfile.ZipFile(out_docx, "w") as zout:
-            # preserve archive comment if any
-            zout.comment = zin.comment
-
-            src_names = set(zin.namelist())
-            
-            # For new parts (like theme1.xml if it didn't exist), we'll add them
-            new_parts = [name for name in rep_bytes.keys() if name not in src_names]
-            existing_replacements = [name for name in rep_bytes.keys() if name in src_names]
-            
-            # Ensure we are not accidentally dropping entries
-            assert len(src_names) == len(zin.infolist())
-
-            for info in zin.infolist():
-                name = info.filename
-                data = rep_bytes.get(name, zin.read(name))
-
-                # Preserve per-entry compression type where possible
-                zout.writestr(info, data, compress_type=info.compress_type)
-            
-            # Add any new parts that didn't exist in source
-            for new_name in new_parts:
-                zout.writestr(new_name, rep_bytes[new_name])
\ No newline at end of file
+    with zipfile.ZipFile(src_docx, "r") as zin, open(src_docx, "rb") as src_raw:
+        infos = zin.infolist()
+        src_names = {info.filename for info in infos}
+
+        # Ensure we are not accidentally dropping entries
+        assert len(src_names) == len(infos)
+
+        # For new parts (like theme1.xml if it didn't exist), we'll add them
+        new_parts = [name for name in rep_bytes.keys() if name not in src_names]
+        # Fixed timestamp (the main part's) so identical inputs give identical bytes
+        stamp = zin.getinfo("word/document.xml").date_time if "word/document.xml" in src_names else NEW_PART_DATE_TIME
+        new_infos: Dict[str, zipfile.ZipInfo] = {}
+        for name in new_parts:
+            zinfo = zipfile.ZipInfo(name, date_time=stamp)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.external_attr = 0o600 << 16
+            new_infos[name] = zinfo
+
+        # Compress replacement parts up front; large ones on the worker pool
+        templates = {info.filename: info for info in infos if info.filename in rep_bytes}
+        templates.update(new_infos)
+        compressed: Dict[str, Union[bytes, Future]] = {}
+        big = [
+            n for n, info in templates.items()
+            if info.compress_type == zipfile.ZIP_DEFLATED and len(rep_bytes[n]) >= PARALLEL_DEFLATE_THRESHOLD
+        ]
+        pool: Optional[ThreadPoolExecutor] = None
+        if len(big) > 1:
+            pool = ThreadPoolExecutor(max_workers=min(len(big), MAX_DEFLATE_WORKERS, os.cpu_count() or 1))
+        try:
+            for name, info in templates.items():
+                data = rep_bytes[name]
+                if info.compress_type == zipfile.ZIP_STORED:
+                    compressed[name] = data
+                elif info.compress_type == zipfile.ZIP_DEFLATED:
+                    compressed[name] = pool.submit(_deflate, data) if (pool and name in big) else _deflate(data)
+
+            memory_checkpoint("patch_docx: replacements compressed")
+
+            raw_ok = all(name in compressed for name in templates) and all(
+                _can_raw_copy(info) for info in infos if info.filename not in rep_bytes
+            )
+            if raw_ok:
+                try:
+                    with open(out_docx, "wb") as fp:
+                        writer = _RawZipWriter(fp)
+                        for info in infos:
+                            name = info.filename
+                            if name in rep_bytes:
+                                comp = compressed[name]
+                                comp = comp.result() if isinstance(comp, Future) else comp
+                                writer.add(_replacement_info(info, rep_bytes[name], comp), comp)
+                            else:
+                                writer.add(info, _read_raw_entry(src_raw, info))
+
+                        # Add any new parts that didn't exist in source
+                        for new_name in new_parts:
+                            comp = compressed[new_name]
+                            comp = comp.result() if isinstance(comp, Future) else comp
+                            writer.add(_replacement_info(new_infos[new_name], rep_bytes[new_name], comp), comp)
+                        writer.close(zin.comment)
+                except zipfile.LargeZipFile:
+                    raw_ok = False
+
+            if not raw_ok:
+                # Unusual compression, encryption or ZIP64: let zipfile rewrite it all
+                with zipfile.ZipFile(out_docx, "w") as zout:
+                    # preserve archive comment if any
+                    zout.comment = zin.comment
+                    for info in infos:
+                        data = rep_bytes[info.filename] if info.filename in rep_bytes else zin.read(info.filename)
+                        # Preserve per-entry compression type where possible
+                        zout.writestr(info, data, compress_type=info.compress_type)
+                    for new_name in new_parts:
+                        zout.writestr(new_infos[new_name], rep_bytes[new_name])
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    _check_patched_archive(out_docx, infos, new_infos, rep_bytes)
+
+
+def _check_patched_archive(
+    out_docx: Path,
+    src_infos: List[zipfile.ZipInfo],
+    new_infos: Dict[str, zipfile.ZipInfo],
+    rep_bytes: Dict[str, bytes]
+) -> None:
+    """
+    Re-read the written central directory: same entries in the same order,
+    copied entries with their source CRC and sizes, replacements with the CRC
+    of their new bytes. Cheap (nothing is inflated) and fails loudly.
+    """
+    expected = []
+    for info in src_infos:
+        if info.filename in rep_bytes:
+            data = rep_bytes[info.filename]
+            expected.append((info.filename, zlib.crc32(data), len(data)))
+        else:
+            expected.append((info.filename, info.CRC, info.file_size))
+    for name in new_infos:
+        data = rep_bytes[name]
+        expected.append((name, zlib.crc32(data), len(data)))
+
+    with zipfile.ZipFile(out_docx, "r") as z:
+        actual = [(info.filename, info.CRC, info.file_size) for info in z.infolist()]
+    if len(actual) != len(expected):
+        raise RuntimeError(f"Patched archive {out_docx} has {len(actual)} entries; expected {len(expected)}")
+    for got, want in zip(actual, expected):
+        if got != want:
+            raise RuntimeError(f"Patched archive {out_docx} entry mismatch: got {got}, expected {want}")
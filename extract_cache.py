@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+extract_cache.py — Content-addressed extraction cache
+
+Each input DOCX is extracted once into <cache_dir>/<sha256 prefix>/, keyed by
+the SHA-256 of the file. The cached copy is never written to after it is
+published: a run reads its parts from there (DocxDecomposer.extract with
+cache_dir=...), keeps its changes in the PartStore, and flushes only the
+parts it changed into its own workspace folder, which acts as the job's
+copy-on-write overlay. Re-running the same section therefore skips
+extraction, and the workspace is never deleted, so a folder locked by
+OneDrive cannot stall the run.
+
+Entries are extracted into a temporary folder and published with a single
+rename, so concurrent runs on the same DOCX never see a half-written entry.
+
+Usage:
+    base = ensure_cached_extract(Path("spec.docx"), Path("_extract_cache"))
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+import zipfile
+from pathlib import Path
+from typing import List, Optional
+
+from paragraph_sidecar import file_sha256
+
+
+EXTRACT_CACHE_DIRNAME = "_extract_cache"
+EXTRACT_CACHE_MARKER = "_extract_cache_entry.json"
+
+
+def default_extract_cache_dir(docx_path: Path) -> Path:
+    return Path(docx_path).resolve().parent / EXTRACT_CACHE_DIRNAME
+
+
+def ensure_cached_extract(
+    docx_path: Path,
+    cache_dir: Path,
+    sha256: Optional[str] = None,
+    log: Optional[List[str]] = None
+) -> Path:
+    """
+    Return the cached extraction of docx_path, extracting it on first use.
+    The returned folder must be treated as read-only.
+    """
+    docx_path = Path(docx_path)
+    cache_dir = Path(cache_dir)
+    sha256 = sha256 or file_sha256(docx_path)
+    entry = cache_dir / sha256[:24]
+
+    marker = entry / EXTRACT_CACHE_MARKER
+    if marker.exists():
+        if log is not None:
+            log.append(f"Extraction cache hit: {entry}")
+        return entry
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{sha256[:24]}.{uuid.uuid4().hex[:8]}.tmp"
+    with zipfile.ZipFile(docx_path, "r") as z:
+        z.extractall(tmp)
+    (tmp / EXTRACT_CACHE_MARKER).write_text(
+        json.dumps({"docx_sha256": sha256, "docx_name": docx_path.name}, indent=2), encoding="utf-8"
+    )
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another run published the same entry first; its copy is identical
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not marker.exists():
+            raise
+    if log is not None:
+        log.append(f"Extraction cached: {entry}")
+    return entry
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+font_strip_check.py — Differential check for strip_run_font_formatting
+
+strip_run_font_formatting walks each paragraph once with str.find and a
+single combined tag regex. It must stay byte-for-byte equivalent to the
+original regex implementation, kept here unchanged as
+strip_run_font_formatting_reference.
+
+The corpus is:
+
+- seeded random paragraphs built from the awkward cases the rewrite has to
+  match: malformed and unclosed runs, self-closing <w:r/> / <w:rPr/>,
+  rPrChange with a nested rPr, unclosed or content-bearing rFonts, look-alike
+  tags (<w:szX/>, <w:rX>), rPr inside pPr, sectPr paragraphs;
+- every paragraph of the bundled FIRE/MECH/PLUMB specs;
+- every paragraph of a synthetic MasterSpec-style spec (phase2_bench.py).
+
+Exits 1 and prints the first mismatches if any paragraph differs.
+
+Usage:
+    python font_strip_check.py
+    python font_strip_check.py --cases 600000 --seed 7 --synthetic 10000
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Iterator, List
+
+from docx_decomposer import strip_run_font_formatting
+
+
+REPO_DIR = Path(__file__).resolve().parent
+BUNDLED_SPECS = ("FIRE_SPEC.docx", "MECH_SPEC.docx", "PLUMB_SPEC.docx")
+DEFAULT_CASES = 200000
+DEFAULT_SEED = 0
+DEFAULT_SYNTHETIC = 1000
+
+_PARAGRAPH_RX = re.compile(r"<w:p\b[\s\S]*?</w:p>")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reference implementation (before the single-pass rewrite)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def strip_run_font_formatting_reference(p_xml: str) -> str:
+    # Don't touch sectPr paragraphs
+    if "<w:sectPr" in p_xml:
+        return p_xml
+
+    def strip_font_from_rpr_text(rpr_text: str) -> str:
+        result = rpr_text
+        result = re.sub(r'<w:rFonts\b[^>]*/>', '', result)
+        result = re.sub(r'<w:rFonts\b[^>]*>[\s\S]*?</w:rFonts>', '', result, flags=re.S)
+        result = re.sub(r'<w:sz\b[^>]*/>', '', result)
+        result = re.sub(r'<w:szCs\b[^>]*/>', '', result)
+        inner = re.sub(r'<w:rPr\b[^>]*>([\s\S]*)</w:rPr>', r'\1', result, flags=re.S)
+        if not inner.strip():
+            return ''
+        return result
+
+    def process_run(run_match):
+        return re.sub(
+            r'<w:rPr\b[^>]*>[\s\S]*?</w:rPr>',
+            lambda m: strip_font_from_rpr_text(m.group(0)),
+            run_match.group(0),
+            count=1,
+            flags=re.S
+        )
+
+    return re.sub(r'<w:r\b[^>]*>[\s\S]*?</w:r>', process_run, p_xml, flags=re.S)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Corpus
+# ─────────────────────────────────────────────────────────────────────────────
+
+_RPR_CHILDREN = (
+    '<w:rFonts w:ascii="Arial" w:hAnsi="Arial"/>', '<w:rFonts/>', '<w:rFonts w:ascii="A"></w:rFonts>',
+    '<w:rFonts w:ascii="A"><w:x/></w:rFonts>', '<w:rFonts>', '</w:rFonts>',
+    '<w:sz w:val="20"/>', '<w:szCs w:val="20"/>', '<w:sz w:val="2"></w:sz>', '<w:szCs>', '<w:sz/>',
+    '<w:b/>', '<w:i/>', '<w:rStyle w:val="X"/>', '<w:color w:val="FF0000"/>', ' ', '\n', '\t',
+    '<w:rPrChange w:id="1"><w:rPr><w:sz w:val="4"/></w:rPr></w:rPrChange>', '<w:szX/>', '<w:rFontsX/>',
+    '<w:rPr>', '</w:rPr>', '<w:rPr/>', '<w:rPrChange/>',
+)
+_RUN_CHILDREN = (
+    '<w:t>x</w:t>', '<w:t xml:space="preserve"> a </w:t>', '<w:tab/>', '<w:br/>',
+    '<w:pict><w:r><w:t>in</w:t></w:r></w:pict>', '<w:rPr/>',
+)
+_PPRS = (
+    '', '', '<w:pPr><w:pStyle w:val="A"/><w:rPr><w:sz w:val="1"/></w:rPr></w:pPr>',
+)
+_FILLER = ('<w:ins w:id="1">', '</w:ins>', '<w:proofErr/>', 'junk<', '>')
+
+
+def _random_rpr(rng: random.Random) -> str:
+    tag = rng.choice(('<w:rPr>', '<w:rPr>', '<w:rPr w:x="1">', '<w:rPr/>'))
+    children = "".join(rng.choice(_RPR_CHILDREN) for _ in range(rng.randint(0, 6)))
+    return tag + children + rng.choice(('</w:rPr>', '</w:rPr>', '</w:rPr>', ''))
+
+
+def _random_run(rng: random.Random) -> str:
+    tag = rng.choice(('<w:r>', '<w:r w:rsidR="00A1">', '<w:r/>', '<w:rX>', '<w:r\n>'))
+    body = _random_rpr(rng) if rng.random() < 0.8 else ''
+    body += "".join(rng.choice(_RUN_CHILDREN) for _ in range(rng.randint(0, 3)))
+    if rng.random() < 0.3:
+        body += _random_rpr(rng)
+    return tag + body + rng.choice(('</w:r>', '</w:r>', '</w:r>', ''))
+
+
+def random_paragraphs(count: int, seed: int = DEFAULT_SEED) -> Iterator[str]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        ppr = '<w:pPr><w:sectPr/></w:pPr>' if rng.random() < 0.03 else rng.choice(_PPRS)
+        parts = [
+            _random_run(rng) if rng.random() < 0.85 else rng.choice(_FILLER)
+            for _ in range(rng.randint(0, 8))
+        ]
+        yield '<w:p>' + ppr + "".join(parts) + '</w:p>'
+
+
+def docx_paragraphs(docx: Path) -> List[str]:
+    with zipfile.ZipFile(docx) as z:
+        return _PARAGRAPH_RX.findall(z.read("word/document.xml").decode("utf-8"))
+
+
+def corpus(cases: int, seed: int, synthetic: int) -> Iterator[str]:
+    yield from random_paragraphs(cases, seed)
+    for name in BUNDLED_SPECS:
+        if (REPO_DIR / name).exists():
+            yield from docx_paragraphs(REPO_DIR / name)
+    if synthetic:
+        from phase2_bench import generate_synthetic_spec
+
+        with tempfile.TemporaryDirectory() as tmp:
+            docx = Path(tmp) / "synthetic.docx"
+            generate_synthetic_spec(docx, synthetic, seed=seed, media_bytes=0)
+            yield from docx_paragraphs(docx)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check strip_run_font_formatting against the reference implementation"
+    )
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES, help="Random paragraphs (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Generator seed (default: %(default)s)")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=DEFAULT_SYNTHETIC,
+        help="Paragraphs in the synthetic spec added to the corpus (0 = none; default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    total, mismatches = 0, 0
+    for p_xml in corpus(args.cases, args.seed, args.synthetic):
+        total += 1
+        expected = strip_run_font_formatting_reference(p_xml)
+        actual = strip_run_font_formatting(p_xml)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"MISMATCH\n  input:    {p_xml!r}\n  expected: {expected!r}\n  actual:   {actual!r}")
+
+    print(f"{total} paragraphs, {mismatches} mismatches (seed {args.seed})")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,24 +7,71 @@ numbering.xml, handling ID collisions by remapping.
 
 This allows imported styles to reference the architect's exact numbering definitions,
 preserving list number formatting (fonts, indents, prefixes).
+
+Imported abstractNums get a fresh w:nsid and nums a fresh w16cid:durableId.
+By default these are random; with deterministic_ids=True they are derived
+from a hash of the architect definition and the target numbering.xml, so the
+same inputs always produce byte-identical numbering.xml. Either way, IDs
+already present in the target are never reused.
 """
 
 import re
 import json
 import random
+import hashlib
+from itertools import count
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Set
 from copy import deepcopy
 
+from part_store import PartStore, open_part_store
+
+
+_NSID_RX = re.compile(r'<w:nsid\s+w:val="([^"]+)"')
+_DURABLE_ID_RX = re.compile(r'w16cid:durableId="([^"]*)"')
+
 
-def _generate_unique_nsid() -> str:
-    """Generate a unique nsid (8 hex chars) for abstractNum."""
-    return f"{random.randint(0, 0xFFFFFFFF):08X}"
+def _id_candidates(seed: Optional[bytes], bits: int):
+    """Random values, or a deterministic sequence of hashes of seed."""
+    for attempt in count():
+        if seed is None:
+            yield random.getrandbits(bits)
+        else:
+            digest = hashlib.sha256(seed + attempt.to_bytes(4, "little")).digest()
+            yield int.from_bytes(digest[:8], "big") >> (64 - bits)
 
 
-def _generate_unique_durable_id() -> str:
-    """Generate a unique durableId for num."""
-    return str(random.randint(1, 2147483647))
+def _generate_unique_nsid(taken: Optional[Set[str]] = None, seed: Optional[bytes] = None) -> str:
+    """
+    Generate a unique nsid (8 hex chars) for abstractNum.
+    With seed, the nsid is derived from it; a value in taken is never returned
+    (and the new one is added to it).
+    """
+    for value in _id_candidates(seed, 32):
+        nsid = f"{value:08X}"
+        if taken is None or nsid not in taken:
+            if taken is not None:
+                taken.add(nsid)
+            return nsid
+
+
+def _generate_unique_durable_id(taken: Optional[Set[str]] = None, seed: Optional[bytes] = None) -> str:
+    """Generate a unique durableId (1..2147483647) for num; see _generate_unique_nsid."""
+    for value in _id_candidates(seed, 31):
+        if value == 0:
+            continue
+        durable_id = str(value)
+        if taken is None or durable_id not in taken:
+            if taken is not None:
+                taken.add(durable_id)
+            return durable_id
+
+
+def existing_numbering_ids(numbering_xml: str) -> Tuple[Set[str], Set[str]]:
+    """(nsids, durableIds) already used in numbering.xml; nsids upper-cased."""
+    nsids = {v.upper() for v in _NSID_RX.findall(numbering_xml)}
+    durable_ids = set(_DURABLE_ID_RX.findall(numbering_xml))
+    return nsids, durable_ids
 
 
 def find_max_ids_in_numbering(numbering_xml: str) -> Tuple[int, int]:
@@ -65,10 +112,19 @@ def build_numbering_import_plan(
     arch_template_registry: Dict[str, Any],
     arch_styles_xml: str,
     target_numbering_xml: str,
-    style_ids_to_import: List[str]
+    style_ids_to_import: List[str],
+    style_to_numid: Optional[Dict[str, int]] = None,
+    deterministic_ids: bool = False
 ) -> Dict[str, Any]:
     """
     Build a plan for importing numbering definitions.
+
+    style_to_numid may be passed precomputed (e.g. from a template pack);
+    otherwise it is extracted from arch_styles_xml.
+
+    deterministic_ids derives each new nsid/durableId from a hash of the
+    architect abstractNum/num XML and the target numbering.xml instead of
+    drawing it at random.
     
     Returns:
     {
@@ -87,7 +143,8 @@ def build_numbering_import_plan(
     }
     """
     # Find which numIds the styles we're importing reference
-    style_to_numid = extract_used_num_ids_from_styles(arch_styles_xml)
+    if style_to_numid is None:
+        style_to_numid = extract_used_num_ids_from_styles(arch_styles_xml)
     
     # Filter to only styles we're importing
     relevant_numids = set()
@@ -112,6 +169,15 @@ def build_numbering_import_plan(
     
     # Find max IDs in target to avoid collisions
     max_abstract_id, max_num_id = find_max_ids_in_numbering(target_numbering_xml)
+    taken_nsids, taken_durable_ids = existing_numbering_ids(target_numbering_xml)
+    target_signature = (
+        hashlib.sha256(target_numbering_xml.encode("utf-8")).digest() if deterministic_ids else b""
+    )
+
+    def _seed(kind: str, arch_xml: str) -> Optional[bytes]:
+        if not deterministic_ids:
+            return None
+        return kind.encode("ascii") + b"\0" + target_signature + arch_xml.encode("utf-8")
     
     # Build import lists
     abstract_num_id_remap = {}  # old_id -> new_id
@@ -134,7 +200,7 @@ def build_numbering_import_plan(
             abstract_num_id_remap[old_abstract_id] = new_abstract_id
             
             # Get XML and remap the abstractNumId
-            xml = abstract_nums[old_abstract_id]["xml"]
+            arch_xml = xml = abstract_nums[old_abstract_id]["xml"]
             xml = re.sub(
                 r'w:abstractNumId="' + str(old_abstract_id) + '"',
                 f'w:abstractNumId="{new_abstract_id}"',
@@ -143,7 +209,7 @@ def build_numbering_import_plan(
             # Generate new nsid to avoid conflicts
             xml = re.sub(
                 r'<w:nsid\s+w:val="[^"]+"/>',
-                f'<w:nsid w:val="{_generate_unique_nsid()}"/>',
+                f'<w:nsid w:val="{_generate_unique_nsid(taken_nsids, _seed("nsid", arch_xml))}"/>',
                 xml
             )
             
@@ -166,7 +232,7 @@ def build_numbering_import_plan(
             new_abstract_id = abstract_num_id_remap.get(old_abstract_id, old_abstract_id)
             
             # Get XML and remap IDs
-            xml = num_data["xml"]
+            arch_xml = xml = num_data["xml"]
             xml = re.sub(
                 r'w:numId="' + str(old_num_id) + '"',
                 f'w:numId="{new_num_id}"',
@@ -180,7 +246,7 @@ def build_numbering_import_plan(
             # Generate new durableId
             xml = re.sub(
                 r'w16cid:durableId="[^"]*"',
-                f'w16cid:durableId="{_generate_unique_durable_id()}"',
+                f'w16cid:durableId="{_generate_unique_durable_id(taken_durable_ids, _seed("durableId", arch_xml))}"',
                 xml
             )
             
@@ -302,11 +368,18 @@ def import_numbering(
     target_extract_dir: Path,
     arch_template_registry: Dict[str, Any],
     style_ids_to_import: List[str],
-    log: List[str]
+    log: List[str],
+    style_to_numid: Optional[Dict[str, int]] = None,
+    parts: Optional[PartStore] = None,
+    deterministic_ids: bool = False
 ) -> Dict[str, Dict[str, int]]:
     """
     Main entry point: import architect's numbering into target.
     
+    If style_to_numid is given (template pack), the architect styles.xml is not read.
+    If parts is given, numbering.xml is read from and written to the shared store.
+    deterministic_ids: see build_numbering_import_plan.
+
     Returns style_numid_remap for use when importing styles.
     """
     # Check if registry has numbering data
@@ -320,25 +393,46 @@ def import_numbering(
         return {}
     
     # Read architect's styles.xml to find numId references
-    arch_styles_path = arch_extract_dir / "word" / "styles.xml"
-    if not arch_styles_path.exists():
-        log.append(f"WARNING: Architect styles.xml not found at {arch_styles_path}")
-        return {}
-    arch_styles_xml = arch_styles_path.read_text(encoding="utf-8")
-    
+    arch_styles_xml = ""
+    if style_to_numid is None:
+        arch_styles_path = arch_extract_dir / "word" / "styles.xml"
+        if not arch_styles_path.exists():
+            log.append(f"WARNING: Architect styles.xml not found at {arch_styles_path}")
+            return {}
+        arch_styles_xml = arch_styles_path.read_text(encoding="utf-8")
+    
+    with open_part_store(target_extract_dir, parts) as store:
+        return _import_numbering_into_store(
+            store, target_extract_dir, arch_template_registry, arch_styles_xml,
+            style_ids_to_import, log, style_to_numid, deterministic_ids
+        )
+
+
+def _import_numbering_into_store(
+    store: PartStore,
+    target_extract_dir: Path,
+    arch_template_registry: Dict[str, Any],
+    arch_styles_xml: str,
+    style_ids_to_import: List[str],
+    log: List[str],
+    style_to_numid: Optional[Dict[str, int]],
+    deterministic_ids: bool = False
+) -> Dict[str, Dict[str, int]]:
     # Read target's numbering.xml
     target_numbering_path = target_extract_dir / "word" / "numbering.xml"
-    if not target_numbering_path.exists():
+    target_numbering_xml = store.get_text("word/numbering.xml")
+    if target_numbering_xml is None:
         log.append("WARNING: Target has no numbering.xml - skipping numbering import")
         return {}
-    target_numbering_xml = target_numbering_path.read_text(encoding="utf-8")
     
     # Build import plan
     plan = build_numbering_import_plan(
         arch_template_registry,
         arch_styles_xml,
         target_numbering_xml,
-        style_ids_to_import
+        style_ids_to_import,
+        style_to_numid=style_to_numid,
+        deterministic_ids=deterministic_ids
     )
     
     if not plan["abstract_nums_to_import"] and not plan["nums_to_import"]:
@@ -359,7 +453,7 @@ def import_numbering(
     )
     
     # Write updated numbering.xml
-    target_numbering_path.write_text(new_numbering_xml, encoding="utf-8")
+    store.set_text("word/numbering.xml", new_numbering_xml)
     log.append(f"Updated {target_numbering_path}")
     
     return plan["style_numid_remap"]
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+output_cache.py — Content-addressed cache of Phase 2 apply outputs
+
+A Phase 2 output depends only on:
+  - the input DOCX,
+  - the architect template (the template pack's source hash, which covers
+    arch_style_registry.json, arch_template_registry.json and styles.xml),
+  - the classifications JSON,
+  - the tool itself (the source of the modules the apply runs through),
+  - the apply options that change the output (e.g. deterministic_ids).
+
+Those are hashed into one key before anything is extracted. The CLI and
+phase2_batch.py build the options with phase2_output_options(), so the same
+job gets the same key from either. Each entry
+holds the formatted DOCX, its phase2_issues.log and the apply summary; a hit
+copies them out and skips extraction, patching and every check. Re-running a
+spec book after one section changed therefore only redoes that section.
+
+Entries are written to a temporary folder and published with a single
+rename. A hit refreshes the entry's last-use time; evict_phase2_outputs()
+drops entries unused for longer than max_age_days, then the least recently
+used ones until the cache fits in max_bytes.
+
+Usage:
+    options = phase2_output_options(deterministic_ids, carried_paths)
+    key = phase2_output_key(docx, template_pack["source_hash"], classifications_path, options)
+    entry = lookup_phase2_output(cache_dir, key)
+    if entry is None:
+        ...run the apply...
+        store_phase2_output(cache_dir, key, output_docx, issues_log, summary)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from paragraph_sidecar import file_sha256
+
+
+OUTPUT_CACHE_VERSION = 1
+OUTPUT_CACHE_DIRNAME = "_phase2_output_cache"
+OUTPUT_CACHE_ENTRY = "entry.json"
+OUTPUT_CACHE_DOCX = "output.docx"
+OUTPUT_CACHE_LOG = "phase2_issues.log"
+
+DEFAULT_MAX_BYTES = 2 << 30
+DEFAULT_MAX_AGE_DAYS = 30
+
+# Modules whose code decides what an apply writes
+TOOL_SOURCES = (
+    "arch_env_applier.py",
+    "docx_decomposer.py",
+    "docx_patch.py",
+    "numbering_importer.py",
+    "paragraph_index.py",
+    "paragraph_sidecar.py",
+    "part_store.py",
+    "phase2_invariants.py",
+    "revision_carryover.py",
+    "style_index.py",
+    "template_pack.py",
+)
+
+_TOOL_HASH: Optional[str] = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Key
+# ─────────────────────────────────────────────────────────────────────────────
+
+def tool_source_hash() -> str:
+    """Hash of the tool's own source; any code change starts a fresh cache."""
+    global _TOOL_HASH
+    if _TOOL_HASH is None:
+        here = Path(__file__).resolve().parent
+        h = hashlib.sha256(f"output-cache-v{OUTPUT_CACHE_VERSION}".encode("utf-8"))
+        for name in TOOL_SOURCES:
+            p = here / name
+            h.update(name.encode("utf-8"))
+            if p.exists():
+                data = p.read_bytes()
+                h.update(len(data).to_bytes(8, "little"))
+                h.update(data)
+            else:
+                h.update(b"\x00missing")
+        _TOOL_HASH = h.hexdigest()
+    return _TOOL_HASH
+
+
+def phase2_output_options(
+    deterministic_ids: bool = False,
+    carried_classifications: Optional[List[Path]] = None
+) -> Dict[str, Any]:
+    """Apply options that change the output; pre-filled classifications by content."""
+    return {
+        "deterministic_ids": bool(deterministic_ids),
+        "carried_classifications": [
+            hashlib.sha256(Path(p).read_bytes()).hexdigest() for p in carried_classifications or []
+        ],
+    }
+
+
+def phase2_output_key(
+    docx_path: Path,
+    template_source_hash: str,
+    classifications_path: Path,
+    options: Optional[Dict[str, Any]] = None
+) -> str:
+    h = hashlib.sha256()
+    for label, value in (
+        ("docx", file_sha256(Path(docx_path))),
+        ("template", template_source_hash),
+        ("classifications", hashlib.sha256(Path(classifications_path).read_bytes()).hexdigest()),
+        ("tool", tool_source_hash()),
+        ("options", json.dumps(options or {}, sort_keys=True)),
+    ):
+        h.update(f"{label}={value}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def default_output_cache_dir(docx_path: Path) -> Path:
+    return Path(docx_path).resolve().parent / OUTPUT_CACHE_DIRNAME
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lookup / store
+# ─────────────────────────────────────────────────────────────────────────────
+
+def lookup_phase2_output(cache_dir: Path, key: str) -> Optional[Path]:
+    """The entry folder for key, or None. A hit refreshes the entry's last-use time."""
+    entry = Path(cache_dir) / key[:32]
+    marker = entry / OUTPUT_CACHE_ENTRY
+    try:
+        meta = json.loads(marker.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("key") != key or not (entry / OUTPUT_CACHE_DOCX).exists():
+        return None
+    try:
+        os.utime(marker)
+    except OSError:
+        pass
+    return entry
+
+
+def restore_phase2_output(entry: Path, output_docx: Path, issues_log: Path) -> Dict[str, Any]:
+    """
+    Copy a cached output and log to where the apply would have written them.
+    Returns the cached apply summary with its paths pointing at the copies.
+    """
+    meta = json.loads((entry / OUTPUT_CACHE_ENTRY).read_text(encoding="utf-8"))
+    output_docx = Path(output_docx)
+    issues_log = Path(issues_log)
+    output_docx.parent.mkdir(parents=True, exist_ok=True)
+    issues_log.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(entry / OUTPUT_CACHE_DOCX, output_docx)
+    shutil.copyfile(entry / OUTPUT_CACHE_LOG, issues_log)
+
+    summary = dict(meta.get("summary", {}))
+    summary.update(output_docx=str(output_docx), issues_log=str(issues_log), cached=True)
+    summary.pop("timings", None)
+    return summary
+
+
+def store_phase2_output(
+    cache_dir: Path,
+    key: str,
+    output_docx: Path,
+    issues_log: Path,
+    summary: Optional[Dict[str, Any]] = None
+) -> Path:
+    cache_dir = Path(cache_dir)
+    entry = cache_dir / key[:32]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{key[:32]}.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.mkdir()
+    shutil.copyfile(output_docx, tmp / OUTPUT_CACHE_DOCX)
+    shutil.copyfile(issues_log, tmp / OUTPUT_CACHE_LOG)
+    (tmp / OUTPUT_CACHE_ENTRY).write_text(json.dumps({
+        "key": key,
+        "created": time.time(),
+        "summary": summary or {},
+    }, indent=2), encoding="utf-8")
+    if entry.exists():
+        # A stale or half-evicted entry; the new one replaces it
+        shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another run published the same key first; its output is identical
+        shutil.rmtree(tmp, ignore_errors=True)
+    return entry
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Eviction
+# ─────────────────────────────────────────────────────────────────────────────
+
+def evict_phase2_outputs(
+    cache_dir: Path,
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    log: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Drop entries not used for max_age_days, then least recently used entries
+    until the rest fit in max_bytes. None (or 0) disables either limit.
+    Returns the removed entry names.
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return []
+
+    entries = []
+    for entry in cache_dir.iterdir():
+        marker = entry / OUTPUT_CACHE_ENTRY
+        if entry.name.startswith(".") or not marker.exists():
+            continue
+        try:
+            last_used = marker.stat().st_mtime
+            size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+        except OSError:
+            continue
+        entries.append((last_used, size, entry))
+    entries.sort(key=lambda e: e[0], reverse=True)
+
+    now = time.time()
+    kept_bytes = 0
+    removed: List[str] = []
+    for last_used, size, entry in entries:
+        too_old = bool(max_age_days) and now - last_used > max_age_days * 86400
+        too_big = bool(max_bytes) and kept_bytes + size > max_bytes
+        if too_old or too_big:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry.name)
+        else:
+            kept_bytes += size
+
+    if removed and log is not None:
+        log.append(f"Output cache: evicted {len(removed)} entries from {cache_dir}")
+    return removed
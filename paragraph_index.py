@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+paragraph_index.py — Phase 2 paragraph index
+
+Scans word/document.xml once and records, for every <w:p> block, the facts the
+Phase 2 stages keep asking for: span, text, pStyle, numId/ilvl, sectPr flag and
+a content hash.
+
+The slim bundle builder, the preflight report and the apply stage all read from
+the same index, so paragraph_index values are guaranteed to line up between
+them and no paragraph is rescanned per stage.
+
+Paragraphs are found by a streaming tag scanner over the raw bytes of
+document.xml, fed in fixed-size chunks. It tracks <w:p> nesting depth, so a
+paragraph inside a text box (w:txbxContent) stays part of the top-level
+paragraph that holds it, and a self-closing <w:p/> is its own paragraph.
+Only the open top-level paragraph is buffered between chunks.
+
+Spans are byte offsets, kept as two array('q') offset columns. Edits go into a sparse
+ParagraphEdits map keyed by paragraph index; untouched paragraphs are never
+copied out of the document bytes, and rebuild() splices the edited blocks
+back into the original buffer. untouched_fingerprint() checksums everything
+outside the edited paragraphs, so a rebuilt document can be shown to leave
+the rest of the bytes identical without comparing it paragraph by paragraph.
+
+Usage:
+    from paragraph_index import ParagraphIndex
+
+    index = ParagraphIndex.from_extract_dir(Path("mech_spec_extracted"))
+    for rec in index:
+        print(rec.index, rec.pstyle, rec.text[:40])
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+SCAN_CHUNK_SIZE = 1 << 20
+
+# <w:p ...>, <w:p/> and </w:p> (not <w:pPr>, <w:pStyle>, ...)
+_P_TAG_RX = re.compile(rb"<(/?)w:p(?=[\s/>])[^>]*>")
+_TEXT_RX = re.compile(r"<w:t\b[^>]*>([\s\S]*?)</w:t>")
+_WS_RX = re.compile(r"\s+")
+_PSTYLE_RX = re.compile(r"<w:pStyle\b[^>]*w:val=\"([^\"]+)\"")
+_NUMID_RX = re.compile(r"<w:numId\b[^>]*w:val=\"([^\"]+)\"")
+_ILVL_RX = re.compile(r"<w:ilvl\b[^>]*w:val=\"([^\"]+)\"")
+
+# Bytes twins of the above, used when indexing; only w:t text gets decoded
+_TEXT_BRX = re.compile(rb"<w:t\b[^>]*>([\s\S]*?)</w:t>")
+_PSTYLE_BRX = re.compile(rb"<w:pStyle\b[^>]*w:val=\"([^\"]+)\"")
+_NUMID_BRX = re.compile(rb"<w:numId\b[^>]*w:val=\"([^\"]+)\"")
+_ILVL_BRX = re.compile(rb"<w:ilvl\b[^>]*w:val=\"([^\"]+)\"")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-block helpers
+# ─────────────────────────────────────────────────────────────────────────────
+
+def iter_paragraph_spans(chunks: Iterable[bytes]) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    (start, end, xml) for every top-level <w:p> in a stream of document.xml
+    chunks; offsets are absolute byte positions in the stream.
+
+    NOTE: This intentionally avoids parsing full XML to keep indices aligned with raw bytes.
+    """
+    buf = b""
+    base = 0    # stream offset of buf[0]
+    scan = 0    # where the next tag search starts in buf
+    depth = 0
+    start = 0   # stream offset of the open top-level paragraph
+    for chunk in chunks:
+        buf += chunk
+        for m in _P_TAG_RX.finditer(buf, scan):
+            if m.group(1):
+                if depth == 0:
+                    continue  # stray </w:p>
+                depth -= 1
+                if depth == 0:
+                    yield start, base + m.end(), buf[start - base:m.end()]
+            elif m.group(0).endswith(b"/>"):
+                if depth == 0:
+                    yield base + m.start(), base + m.end(), m.group(0)
+            else:
+                if depth == 0:
+                    start = base + m.start()
+                depth += 1
+
+        # Resume after the last complete tag, or at a tag cut off by the chunk end
+        lt = buf.rfind(b"<", scan)
+        scan = lt if lt != -1 and buf.find(b">", lt) == -1 else len(buf)
+        keep = min(start - base, scan) if depth else scan
+        buf = buf[keep:]
+        base += keep
+        scan -= keep
+
+
+def iter_chunks(data, chunk_size: int = SCAN_CHUNK_SIZE) -> Iterator[bytes]:
+    """Fixed-size chunks of an in-memory buffer or a binary file object."""
+    if hasattr(data, "read"):
+        while True:
+            chunk = data.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    view = memoryview(data)
+    for i in range(0, len(view), chunk_size):
+        yield bytes(view[i:i + chunk_size])
+
+
+def iter_paragraph_xml_blocks(document_xml: bytes, chunk_size: int = SCAN_CHUNK_SIZE):
+    return iter_paragraph_spans(iter_chunks(document_xml, chunk_size))
+
+
+def paragraph_text_from_block(p_xml: str) -> str:
+    texts = _TEXT_RX.findall(p_xml)
+    if not texts:
+        return ""
+    joined = html.unescape("".join(texts))
+    joined = _WS_RX.sub(" ", joined).strip()
+    return joined
+
+
+def paragraph_contains_sectpr(p_xml: str) -> bool:
+    return "<w:sectPr" in p_xml
+
+
+def paragraph_pstyle_from_block(p_xml: str) -> Optional[str]:
+    m = _PSTYLE_RX.search(p_xml)
+    return m.group(1) if m else None
+
+
+def paragraph_numpr_from_block(p_xml: str) -> Dict[str, Optional[str]]:
+    numId = None
+    ilvl = None
+    m1 = _NUMID_RX.search(p_xml)
+    m2 = _ILVL_RX.search(p_xml)
+    if m1: numId = m1.group(1)
+    if m2: ilvl = m2.group(1)
+    return {"numId": numId, "ilvl": ilvl}
+
+
+def _attr(rx: "re.Pattern[bytes]", p_xml: bytes) -> Optional[str]:
+    m = rx.search(p_xml)
+    return m.group(1).decode("utf-8") if m else None
+
+
+def _paragraph_text_from_bytes(p_xml: bytes) -> str:
+    texts = _TEXT_BRX.findall(p_xml)
+    if not texts:
+        return ""
+    joined = html.unescape(b"".join(texts).decode("utf-8"))
+    return _WS_RX.sub(" ", joined).strip()
+
+
+def paragraph_content_hash(p_xml: Union[str, bytes]) -> str:
+    if isinstance(p_xml, str):
+        p_xml = p_xml.encode("utf-8")
+    return hashlib.sha256(p_xml).hexdigest()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Index
+# ─────────────────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ParagraphRecord:
+    index: int
+    start: int
+    end: int
+    text: str
+    pstyle: Optional[str]
+    num_id: Optional[str]
+    ilvl: Optional[str]
+    contains_sectpr: bool
+    content_hash: str
+
+    @property
+    def numpr(self) -> Dict[str, Optional[str]]:
+        return {"numId": self.num_id, "ilvl": self.ilvl}
+
+
+class ParagraphIndex:
+    """
+    Single-pass index over document.xml.
+
+    The index keeps the document bytes it was built from; spans are byte
+    offsets into them, so block(i) always returns exactly the XML that was
+    indexed.
+    """
+
+    def __init__(self, document_xml: bytes, records: List[ParagraphRecord]):
+        self.document_xml = document_xml
+        self.records = records
+        self.starts = array("q", (r.start for r in records))
+        self.ends = array("q", (r.end for r in records))
+
+    @classmethod
+    def build(cls, document_xml: Union[bytes, str], chunk_size: int = SCAN_CHUNK_SIZE) -> "ParagraphIndex":
+        if isinstance(document_xml, str):
+            document_xml = document_xml.encode("utf-8")
+        records: List[ParagraphRecord] = []
+        for idx, (s, e, p_xml) in enumerate(iter_paragraph_xml_blocks(document_xml, chunk_size)):
+            records.append(ParagraphRecord(
+                index=idx,
+                start=s,
+                end=e,
+                text=_paragraph_text_from_bytes(p_xml),
+                pstyle=_attr(_PSTYLE_BRX, p_xml),
+                num_id=_attr(_NUMID_BRX, p_xml),
+                ilvl=_attr(_ILVL_BRX, p_xml),
+                contains_sectpr=b"<w:sectPr" in p_xml,
+                content_hash=paragraph_content_hash(p_xml),
+            ))
+        return cls(document_xml, records)
+
+    @classmethod
+    def from_extract_dir(cls, extract_dir: Path) -> "ParagraphIndex":
+        doc_path = Path(extract_dir) / "word" / "document.xml"
+        return cls.build(doc_path.read_bytes())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ParagraphRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, idx: int) -> ParagraphRecord:
+        return self.records[idx]
+
+    def block_bytes(self, idx: int) -> bytes:
+        return self.document_xml[self.starts[idx]:self.ends[idx]]
+
+    def block(self, idx: int) -> str:
+        return self.block_bytes(idx).decode("utf-8")
+
+    def blocks(self) -> List[Tuple[int, int, str]]:
+        """(start, end, xml) for every paragraph, in document order."""
+        return [(r.start, r.end, self.block(r.index)) for r in self.records]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sparse edits
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ParagraphEdit:
+    """Replacement XML for one paragraph of the indexed document."""
+
+    __slots__ = ("index", "xml", "_data")
+
+    def __init__(self, index: int, xml: str):
+        self.index = index
+        self.xml = xml
+        self._data: Optional[bytes] = None
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = self.xml.encode("utf-8")
+        return self._data
+
+
+class ParagraphEdits:
+    """
+    Sparse edit map over a ParagraphIndex.
+
+    Only edited paragraphs hold a copy of their XML; everything else is read
+    from (and rebuilt out of) the index's document bytes.
+    """
+
+    def __init__(self, index: ParagraphIndex):
+        self.index = index
+        self._edits: Dict[int, ParagraphEdit] = {}
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def __contains__(self, idx: int) -> bool:
+        return idx in self._edits
+
+    def get(self, idx: int) -> str:
+        """Current XML of paragraph idx (edited or original)."""
+        edit = self._edits.get(idx)
+        return edit.xml if edit is not None else self.index.block(idx)
+
+    def get_bytes(self, idx: int) -> bytes:
+        edit = self._edits.get(idx)
+        return edit.data if edit is not None else self.index.block_bytes(idx)
+
+    def set(self, idx: int, xml: str) -> None:
+        edit = self._edits.get(idx)
+        if edit is None:
+            self._edits[idx] = ParagraphEdit(idx, xml)
+        else:
+            edit.xml = xml
+            edit._data = None
+
+    def indices(self) -> List[int]:
+        return sorted(self._edits)
+
+    def rebuild(self) -> bytes:
+        """The document bytes with every edited paragraph spliced in."""
+        doc = self.index.document_xml
+        if not self._edits:
+            return bytes(doc)
+        starts, ends = self.index.starts, self.index.ends
+        out: List[bytes] = []
+        last = 0
+        for idx in self.indices():
+            out.append(doc[last:starts[idx]])
+            out.append(self._edits[idx].data)
+            last = ends[idx]
+        out.append(doc[last:])
+        return b"".join(out)
+
+    def untouched_fingerprint(self, rebuilt: Optional[bytes] = None) -> int:
+        """
+        CRC32 of the bytes outside the edited paragraphs: read from the original
+        document, or from `rebuilt` (the output of rebuild()) when given.
+        """
+        data = memoryview(self.index.document_xml if rebuilt is None else rebuilt)
+        starts, ends = self.index.starts, self.index.ends
+        crc = 0
+        last = 0
+        shift = 0
+        for idx in self.indices():
+            start, end = starts[idx], ends[idx]
+            crc = zlib.crc32(data[last + shift:start + shift], crc)
+            if rebuilt is not None:
+                shift += len(self._edits[idx].data) - (end - start)
+            last = end
+        crc = zlib.crc32(data[last + shift:], crc)
+        return crc
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+paragraph_sidecar.py — Paragraph index persisted between bundle and apply
+
+--phase2-build-bundle and --phase2-classifications run as separate
+invocations. The bundle step writes the paragraph index it built (offsets,
+content hashes, pStyle/numPr/sectPr, text) next to the bundle, together with
+the source DOCX hash and the CRC32/size of its word/document.xml.
+
+The apply step checks the sidecar against the DOCX's ZIP central directory
+(document.xml CRC32 and size, no decompression or hashing) and, if it still
+matches, rebuilds the ParagraphIndex from it instead of rescanning
+document.xml (the bytes it is handed are CRC-checked once more, which also
+covers --use-extract-dir workspaces). If the document changed since the bundle was built, the index
+is rebuilt and the paragraphs whose content no longer matches what was
+classified are reported as drift.
+
+Usage:
+    write_paragraph_sidecar(index, Path("spec.docx"), extract_dir / PARAGRAPH_SIDECAR_NAME)
+
+    sidecar, status = load_paragraph_sidecar(sidecar_path, Path("spec.docx"))
+    if status == "fresh":
+        index = index_from_sidecar(sidecar, document_xml)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from paragraph_index import ParagraphIndex, ParagraphRecord
+
+
+PARAGRAPH_SIDECAR_NAME = "phase2_paragraph_index.json"
+PARAGRAPH_SIDECAR_VERSION = 1
+DOCUMENT_XML = "word/document.xml"
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def package_document_info(docx_path: Path) -> Dict[str, int]:
+    """CRC32 and size of word/document.xml, read from the ZIP central directory."""
+    with zipfile.ZipFile(docx_path, "r") as z:
+        info = z.getinfo(DOCUMENT_XML)
+    return {"document_xml_crc32": info.CRC, "document_xml_size": info.file_size}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Write
+# ─────────────────────────────────────────────────────────────────────────────
+
+def sidecar_from_index(index: ParagraphIndex, docx_path: Path) -> Dict[str, Any]:
+    """Column-oriented sidecar for an index built from docx_path's document.xml."""
+    records = index.records
+    return {
+        "sidecar_version": PARAGRAPH_SIDECAR_VERSION,
+        "docx_name": Path(docx_path).name,
+        "docx_sha256": file_sha256(docx_path),
+        **package_document_info(docx_path),
+        "paragraph_count": len(records),
+        "start": list(index.starts),
+        "end": list(index.ends),
+        "content_hash": [r.content_hash for r in records],
+        "pstyle": [r.pstyle for r in records],
+        "num_id": [r.num_id for r in records],
+        "ilvl": [r.ilvl for r in records],
+        "sectpr": [r.index for r in records if r.contains_sectpr],
+        "text": [r.text for r in records],
+    }
+
+
+def write_paragraph_sidecar(index: ParagraphIndex, docx_path: Path, out_path: Path) -> Path:
+    return write_sidecar(sidecar_from_index(index, docx_path), out_path)
+
+
+def write_sidecar(sidecar: Dict[str, Any], out_path: Path) -> Path:
+    """Write atomically so a concurrent apply never reads a partial sidecar."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_text(json.dumps(sidecar, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Load + validate
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_paragraph_sidecar(sidecar_path: Path, docx_path: Path) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Returns (sidecar, status). status is one of:
+      "missing" - no sidecar file
+      "invalid" - unreadable or another sidecar version (sidecar is None)
+      "stale"   - document.xml in docx_path differs from the one indexed
+      "fresh"   - CRC32 and size still match; the index can be reused
+    """
+    sidecar_path = Path(sidecar_path)
+    if not sidecar_path.exists():
+        return None, "missing"
+    try:
+        sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, "invalid"
+    if not isinstance(sidecar, dict) or sidecar.get("sidecar_version") != PARAGRAPH_SIDECAR_VERSION:
+        return None, "invalid"
+
+    current = package_document_info(docx_path)
+    for key, value in current.items():
+        if sidecar.get(key) != value:
+            return sidecar, "stale"
+    return sidecar, "fresh"
+
+
+def index_from_sidecar(sidecar: Dict[str, Any], document_xml: bytes) -> ParagraphIndex:
+    """
+    ParagraphIndex over document_xml from a fresh sidecar, without rescanning.
+    Raises ValueError if document_xml is not the document the sidecar indexed.
+    """
+    if len(document_xml) != sidecar["document_xml_size"] or zlib.crc32(document_xml) != sidecar["document_xml_crc32"]:
+        raise ValueError("Paragraph sidecar does not match this document.xml (size/CRC32 differ)")
+    sectpr = set(sidecar["sectpr"])
+    records: List[ParagraphRecord] = [
+        ParagraphRecord(
+            index=i,
+            start=start,
+            end=end,
+            text=text,
+            pstyle=pstyle,
+            num_id=num_id,
+            ilvl=ilvl,
+            contains_sectpr=i in sectpr,
+            content_hash=content_hash,
+        )
+        for i, (start, end, text, pstyle, num_id, ilvl, content_hash) in enumerate(zip(
+            sidecar["start"], sidecar["end"], sidecar["text"], sidecar["pstyle"],
+            sidecar["num_id"], sidecar["ilvl"], sidecar["content_hash"],
+        ))
+    ]
+    return ParagraphIndex(document_xml, records)
+
+
+def sidecar_drift(
+    sidecar: Dict[str, Any],
+    index: ParagraphIndex,
+    paragraph_indices: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Compare a stale sidecar with the index of the current document.
+
+    Returns the paragraph counts and the indices (from paragraph_indices, or
+    all indexed paragraphs) whose content hash differs or that no longer exist.
+    """
+    old_hashes = sidecar.get("content_hash", [])
+    if paragraph_indices is None:
+        paragraph_indices = list(range(len(old_hashes)))
+    changed = [
+        i for i in paragraph_indices
+        if i >= len(index) or i >= len(old_hashes) or index[i].content_hash != old_hashes[i]
+    ]
+    return {
+        "sidecar_paragraph_count": len(old_hashes),
+        "document_paragraph_count": len(index),
+        "changed_paragraphs": changed,
+    }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+part_store.py — In-memory package parts shared across Phase 2 stages
+
+A PartStore holds each part a run touches, hands the same object from stage
+to stage, and tracks which parts were actually changed. Nothing is written
+until flush(), and replacements() yields only the dirty parts, so patch_docx
+copies everything else straight from the source package.
+
+Parts are kept as raw bytes and decoded only when a stage asks for text
+(get_text); stages that work on bytes (get_bytes/set_bytes) never pay for a
+decode or re-encode. Decoding is as-is (no newline translation), so a part
+that is read but not changed is byte-identical on the way out.
+
+Usage:
+    from part_store import PartStore
+
+    parts = PartStore(extract_dir, source=decomposer)
+    styles = parts.get_text("word/styles.xml")
+    parts.set_text("word/styles.xml", styles.replace(...))
+    patch_docx(src, out, parts.replacements())
+    parts.flush()
+"""
+
+from __future__ import annotations
+
+import fnmatch
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+
+class PartStore:
+    """
+    Parts keyed by internal package path ("word/styles.xml").
+
+    source is optional and duck-typed (DocxDecomposer): if given, parts are
+    read through source.read_part_bytes() and listed via source.part_names(),
+    so a lazy workspace never has to write a part to disk just to read it.
+    Otherwise parts are read from root.
+    """
+
+    def __init__(self, root: Path, source=None):
+        self.root = Path(root)
+        self.source = source
+        self._data: Dict[str, bytes] = {}
+        self._text: Dict[str, str] = {}
+        self._missing: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._unflushed: Set[str] = set()
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Reading
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _load_bytes(self, name: str) -> Optional[bytes]:
+        if self.source is not None:
+            data = self.source.read_part_bytes(name)
+        else:
+            path = self.root / name
+            data = path.read_bytes() if path.exists() else None
+        if data is not None:
+            self.bytes_read += len(data)
+        return data
+
+    def get_bytes(self, name: str) -> Optional[bytes]:
+        """Raw part bytes, or None if the part does not exist."""
+        data = self._data.get(name)
+        if data is not None:
+            return data
+        if name in self._text:
+            data = self._text[name].encode("utf-8")
+            self._data[name] = data
+            return data
+        if name in self._missing:
+            return None
+        data = self._load_bytes(name)
+        if data is None:
+            self._missing.add(name)
+            return None
+        self._data[name] = data
+        return data
+
+    def get_text(self, name: str) -> Optional[str]:
+        """Decoded part text, or None if the part does not exist."""
+        text = self._text.get(name)
+        if text is not None:
+            return text
+        data = self.get_bytes(name)
+        if data is None:
+            return None
+        text = data.decode("utf-8")
+        self._text[name] = text
+        return text
+
+    def exists(self, name: str) -> bool:
+        return self.get_bytes(name) is not None
+
+    def names(self, pattern: str = "*") -> List[str]:
+        """Part names (existing or newly added) matching a glob pattern."""
+        if self.source is not None:
+            known = set(self.source.part_names())
+        else:
+            known = {
+                str(p.relative_to(self.root)).replace("\\", "/")
+                for p in self.root.rglob("*") if p.is_file()
+            }
+        known |= set(self._data) | set(self._text)
+        known -= self._missing
+        return sorted(n for n in known if fnmatch.fnmatchcase(n, pattern))
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Writing
+    # ─────────────────────────────────────────────────────────────────────
+
+    def set_text(self, name: str, text: str) -> None:
+        """Replace a part's text. Writing identical text does not mark it dirty."""
+        if self.get_text(name) == text:
+            return
+        self._data.pop(name, None)
+        self._text[name] = text
+        self._mark_dirty(name)
+
+    def set_bytes(self, name: str, data: bytes) -> None:
+        """Replace a part's bytes. Writing identical bytes does not mark it dirty."""
+        if self.get_bytes(name) == data:
+            return
+        self._text.pop(name, None)
+        self._data[name] = data
+        self._mark_dirty(name)
+
+    def _mark_dirty(self, name: str) -> None:
+        self._missing.discard(name)
+        self._dirty.add(name)
+        self._unflushed.add(name)
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    def dirty_parts(self) -> List[str]:
+        return sorted(self._dirty)
+
+    def replacements(self) -> Dict[str, bytes]:
+        """Dirty parts, encoded, ready for patch_docx."""
+        return {name: self.get_bytes(name) for name in sorted(self._dirty)}
+
+    def flush(self) -> List[Path]:
+        """Write parts changed since the last flush to root. Returns written paths."""
+        written: List[Path] = []
+        for name in sorted(self._unflushed):
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = self.get_bytes(name)
+            path.write_bytes(data)
+            self.bytes_written += len(data)
+            written.append(path)
+        self._unflushed.clear()
+        return written
+
+
+@contextmanager
+def open_part_store(root: Path, parts: Optional[PartStore] = None) -> Iterator[PartStore]:
+    """
+    Yield parts if the caller supplied a store; otherwise a private store over
+    root that is flushed on exit. Lets stage functions keep their on-disk
+    behaviour when called standalone.
+    """
+    if parts is not None:
+        yield parts
+        return
+    store = PartStore(root)
+    yield store
+    store.flush()
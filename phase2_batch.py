@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+phase2_batch.py — Phase 2 apply for a whole spec book
+
+Formats many (docx, classifications) pairs against one architect template.
+The template pack is loaded (or compiled) once in the parent process and
+handed to each worker process when it starts, so no worker re-reads the
+architect registry or styles.xml. Documents are fanned out to a process pool
+and a per-document status summary is written to batch_summary.json.
+
+Inputs:
+  - a directory: every *.docx in it, paired with <stem>_classifications.json
+    next to it (documents without one are reported as skipped)
+  - a manifest JSON: {"documents": [{"docx": "...", "classifications": "...",
+    "output_docx": "..." (optional), "carried_classifications": [...]
+    (optional)}, ...]} or just the list; relative paths are resolved against
+    the manifest's folder. carried_classifications are pre-filled
+    classifications (carried over, cached, rule-classified) merged in before
+    "classifications", as with docx_decomposer.py --phase2-carried-classifications
+
+Usage:
+    python phase2_batch.py specs/ --phase2-arch-extract NVES_extracted
+    python phase2_batch.py book.json --phase2-template-pack nves.pack.json --workers 8
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from docx_decomposer import DocxDecomposer, run_phase2_apply, strip_boilerplate_with_report
+from extract_cache import default_extract_cache_dir
+from output_cache import (
+    DEFAULT_MAX_AGE_DAYS,
+    DEFAULT_MAX_BYTES,
+    default_output_cache_dir,
+    evict_phase2_outputs,
+    lookup_phase2_output,
+    phase2_output_key,
+    phase2_output_options,
+    restore_phase2_output,
+    store_phase2_output,
+)
+from paragraph_index import ParagraphIndex
+from part_store import PartStore
+from revision_carryover import merge_classifications
+from role_cache import ROLE_CACHE_NAME, RoleCache, default_role_cache_path
+from template_pack import TEMPLATE_PACK_CACHE_DIRNAME, load_or_compile_template_pack, load_template_pack
+
+
+BATCH_SUMMARY_NAME = "batch_summary.json"
+CLASSIFICATIONS_SUFFIX = "_classifications.json"
+FORMATTED_SUFFIX = "_PHASE2_FORMATTED"
+WORK_DIRNAME = "_work"
+
+
+@dataclass
+class BatchJob:
+    docx: str
+    classifications: Optional[str]
+    output_docx: str
+    extract_dir: str
+    carried_classifications: List[str] = field(default_factory=list)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Job discovery
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _job_for(
+    docx: Path,
+    classifications: Optional[Path],
+    out_dir: Path,
+    output_docx: Optional[Path] = None,
+    carried: Optional[List[Path]] = None
+) -> BatchJob:
+    return BatchJob(
+        docx=str(docx),
+        classifications=str(classifications) if classifications else None,
+        output_docx=str(output_docx or out_dir / f"{docx.stem}{FORMATTED_SUFFIX}.docx"),
+        extract_dir=str(out_dir / WORK_DIRNAME / f"{docx.stem}_extracted"),
+        carried_classifications=[str(p) for p in carried or []],
+    )
+
+
+def discover_jobs_in_dir(input_dir: Path, out_dir: Path) -> List[BatchJob]:
+    """One job per *.docx in input_dir (Word lock files and earlier outputs are ignored)."""
+    jobs: List[BatchJob] = []
+    for docx in sorted(input_dir.glob("*.docx")):
+        if docx.name.startswith("~$") or docx.stem.endswith(FORMATTED_SUFFIX):
+            continue
+        cls_path = docx.with_name(docx.stem + CLASSIFICATIONS_SUFFIX)
+        jobs.append(_job_for(docx, cls_path if cls_path.exists() else None, out_dir))
+    return jobs
+
+
+def load_manifest_jobs(manifest_path: Path, out_dir: Path) -> List[BatchJob]:
+    data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    entries = data.get("documents") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"Batch manifest {manifest_path}: expected a list of documents")
+
+    base = manifest_path.parent
+    jobs: List[BatchJob] = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("docx"), str):
+            raise ValueError(f"Batch manifest {manifest_path}: entry {i} has no 'docx' path")
+        docx = base / entry["docx"]
+        cls_path = base / entry["classifications"] if entry.get("classifications") else None
+        output_docx = base / entry["output_docx"] if entry.get("output_docx") else None
+        carried = entry.get("carried_classifications") or []
+        if isinstance(carried, str):
+            carried = [carried]
+        if not isinstance(carried, list) or not all(isinstance(p, str) for p in carried):
+            raise ValueError(f"Batch manifest {manifest_path}: entry {i} has a bad 'carried_classifications' list")
+        jobs.append(_job_for(docx, cls_path, out_dir, output_docx, [base / p for p in carried]))
+    return jobs
+
+
+def _check_unique_outputs(jobs: List[BatchJob]) -> None:
+    for attr in ("output_docx", "extract_dir"):
+        seen: Dict[str, str] = {}
+        for job in jobs:
+            key = getattr(job, attr)
+            if key in seen:
+                raise ValueError(
+                    f"Batch jobs {seen[key]} and {job.docx} would share {attr} {key}; "
+                    "give them distinct output_docx entries or file names"
+                )
+            seen[key] = job.docx
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Workers
+# ─────────────────────────────────────────────────────────────────────────────
+
+_WORKER_PACK: Optional[Dict[str, Any]] = None
+_WORKER_LAZY = False
+_WORKER_CACHE: Optional[str] = None  # "" = extraction cache next to each docx
+_WORKER_OUTPUT_CACHE: Optional[str] = None  # "" = output cache next to each docx
+_WORKER_DETERMINISTIC_IDS = False
+_WORKER_ROLE_CACHE: Optional[str] = None  # "" = role cache next to each docx
+
+
+def _init_worker(
+    template_pack: Dict[str, Any],
+    lazy_extract: bool,
+    extract_cache_dir: Optional[str] = None,
+    output_cache_dir: Optional[str] = None,
+    deterministic_ids: bool = False,
+    role_cache_db: Optional[str] = None
+) -> None:
+    """Pool initializer: the pack arrives once per worker, not once per document."""
+    global _WORKER_PACK, _WORKER_LAZY, _WORKER_CACHE, _WORKER_OUTPUT_CACHE, _WORKER_DETERMINISTIC_IDS
+    global _WORKER_ROLE_CACHE
+    _WORKER_PACK = template_pack
+    _WORKER_LAZY = lazy_extract
+    _WORKER_CACHE = extract_cache_dir
+    _WORKER_OUTPUT_CACHE = output_cache_dir
+    _WORKER_DETERMINISTIC_IDS = deterministic_ids
+    _WORKER_ROLE_CACHE = role_cache_db
+
+
+def _output_cache_dir_for(job: BatchJob) -> Optional[Path]:
+    if _WORKER_OUTPUT_CACHE is None:
+        return None
+    return Path(_WORKER_OUTPUT_CACHE) if _WORKER_OUTPUT_CACHE else default_output_cache_dir(Path(job.docx))
+
+
+def _run_job(job: BatchJob) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"docx": job.docx, "classifications": job.classifications}
+    if job.classifications is None:
+        status.update(status="skipped", error="no classifications JSON found")
+        return status
+
+    t0 = time.perf_counter()
+    console = io.StringIO()
+    try:
+        output_cache_dir = _output_cache_dir_for(job)
+        output_key = None
+        if output_cache_dir is not None:
+            output_key = phase2_output_key(
+                Path(job.docx), _WORKER_PACK["source_hash"], Path(job.classifications),
+                options=phase2_output_options(
+                    _WORKER_DETERMINISTIC_IDS, [Path(p) for p in job.carried_classifications]
+                )
+            )
+            entry = lookup_phase2_output(output_cache_dir, output_key)
+            if entry is not None:
+                result = restore_phase2_output(
+                    entry, Path(job.output_docx), Path(job.extract_dir) / "phase2_issues.log"
+                )
+                status.update(status="ok", **result)
+                status["elapsed_seconds"] = round(time.perf_counter() - t0, 3)
+                return status
+
+        with redirect_stdout(console):
+            llm_classifications = json.loads(Path(job.classifications).read_text(encoding="utf-8"))
+            prefilled = [
+                json.loads(Path(p).read_text(encoding="utf-8")) for p in job.carried_classifications
+            ]
+            classifications = merge_classifications(*prefilled, llm_classifications) if prefilled else llm_classifications
+            decomposer = DocxDecomposer(job.docx)
+            cache_dir = None
+            if _WORKER_CACHE is not None:
+                cache_dir = Path(_WORKER_CACHE) if _WORKER_CACHE else default_extract_cache_dir(Path(job.docx))
+            extract_dir = decomposer.extract(output_dir=job.extract_dir, lazy=_WORKER_LAZY, cache_dir=cache_dir)
+            parts = PartStore(extract_dir, source=decomposer)
+            paragraph_index = ParagraphIndex.build(parts.get_bytes("word/document.xml"))
+            log: List[str] = []
+            result = run_phase2_apply(
+                input_docx_path=Path(job.docx),
+                extract_dir=extract_dir,
+                template_pack=_WORKER_PACK,
+                classifications=classifications,
+                output_docx_path=Path(job.output_docx),
+                parts=parts,
+                paragraph_index=paragraph_index,
+                log=log,
+                deterministic_ids=_WORKER_DETERMINISTIC_IDS
+            )
+        if output_key is not None:
+            store_phase2_output(output_cache_dir, output_key, Path(job.output_docx), Path(result["issues_log"]), result)
+        if _WORKER_ROLE_CACHE is not None:
+            role_cache_path = Path(_WORKER_ROLE_CACHE) if _WORKER_ROLE_CACHE else default_role_cache_path(Path(job.docx))
+            with RoleCache(role_cache_path) as role_cache:
+                result["roles_recorded"] = role_cache.record(
+                    paragraph_index,
+                    llm_classifications,
+                    eligible=lambda rec: bool(strip_boilerplate_with_report(rec.text)[0]),
+                    prefilled=prefilled
+                )
+        status.update(status="ok", **result)
+    except Exception as e:
+        status.update(
+            status="failed",
+            error=f"{type(e).__name__}: {e}",
+            traceback=traceback.format_exc(),
+        )
+    status["elapsed_seconds"] = round(time.perf_counter() - t0, 3)
+    return status
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch driver
+# ─────────────────────────────────────────────────────────────────────────────
+
+def run_phase2_batch(
+    jobs: List[BatchJob],
+    template_pack: Dict[str, Any],
+    out_dir: Path,
+    workers: Optional[int] = None,
+    lazy_extract: bool = False,
+    extract_cache_dir: Optional[str] = None,
+    output_cache_dir: Optional[str] = None,
+    output_cache_max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    output_cache_max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    deterministic_ids: bool = False,
+    role_cache_db: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run every job and write out_dir/batch_summary.json. Documents are reported
+    in input order; one failing document never stops the rest.
+
+    extract_cache_dir enables the extraction cache (see extract_cache.py) and
+    output_cache_dir the output cache (see output_cache.py); role_cache_db
+    records each applied document's roles (see role_cache.py). "" puts any of
+    them next to each docx. Output cache eviction runs once, after every job.
+    """
+    _check_unique_outputs(jobs)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    workers = max(1, workers)
+
+    t0 = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        _init_worker(template_pack, lazy_extract, extract_cache_dir, output_cache_dir, deterministic_ids, role_cache_db)
+        for i, job in enumerate(jobs):
+            results[i] = _run_job(job)
+            print(f"[{i + 1}/{len(jobs)}] {results[i]['status']:7} {job.docx}")
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                template_pack, lazy_extract, extract_cache_dir, output_cache_dir, deterministic_ids, role_cache_db
+            ),
+        ) as pool:
+            futures = {pool.submit(_run_job, job): i for i, job in enumerate(jobs)}
+            for done, fut in enumerate(as_completed(futures), 1):
+                i = futures[fut]
+                results[i] = fut.result()
+                print(f"[{done}/{len(jobs)}] {results[i]['status']:7} {jobs[i].docx}")
+
+    if output_cache_dir is not None:
+        cache_dirs = {Path(output_cache_dir)} if output_cache_dir else {
+            default_output_cache_dir(Path(job.docx)) for job in jobs
+        }
+        evict_log: List[str] = []
+        for cache_dir in sorted(cache_dirs):
+            evict_phase2_outputs(cache_dir, output_cache_max_bytes, output_cache_max_age_days, log=evict_log)
+        for line in evict_log:
+            print(line)
+
+    counts: Dict[str, int] = {}
+    cached = 0
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        cached += bool(r.get("cached"))
+
+    summary = {
+        "template_source_hash": template_pack.get("source_hash"),
+        "arch_root": template_pack.get("arch_root"),
+        "workers": workers,
+        "elapsed_seconds": round(time.perf_counter() - t0, 3),
+        "counts": counts,
+        "output_cache_hits": cached,
+        "documents": results,
+        "jobs": [asdict(job) for job in jobs],
+    }
+    summary_path = out_dir / BATCH_SUMMARY_NAME
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    summary["summary_path"] = str(summary_path)
+    return summary
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Phase 2 apply for a folder or manifest of spec sections against one architect template"
+    )
+    parser.add_argument("input", help="Folder of .docx files, or a batch manifest JSON")
+    parser.add_argument("--phase2-arch-extract", help="Architect extracted folder")
+    parser.add_argument(
+        "--phase2-template-pack",
+        default=None,
+        help="Precompiled architect template pack (see template_pack.py); replaces --phase2-arch-extract"
+    )
+    parser.add_argument(
+        "--template-pack-cache-dir",
+        default=None,
+        help="Where compiled template packs are cached (default: <input folder>/_template_packs)"
+    )
+    parser.add_argument("--out-dir", default=None, help="Output folder (default: <input folder>/phase2_formatted)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument(
+        "--lazy-extract",
+        action="store_true",
+        help="Only write the parts each stage reads (skips media, embeddings, customXml)"
+    )
+    parser.add_argument(
+        "--extract-cache",
+        action="store_true",
+        help="Extract each DOCX once into a cache keyed by its SHA-256 and reuse it on later runs"
+    )
+    parser.add_argument(
+        "--extract-cache-dir",
+        default=None,
+        help="Where --extract-cache keeps extracted packages (default: <docx folder>/_extract_cache)"
+    )
+    parser.add_argument(
+        "--deterministic-ids",
+        action="store_true",
+        help="Derive imported numbering nsid/durableId values from content hashes (byte-identical reruns)"
+    )
+    parser.add_argument(
+        "--role-cache",
+        action="store_true",
+        help="Record every applied document's roles in the cross-document role cache"
+    )
+    parser.add_argument(
+        "--role-cache-db",
+        default=None,
+        help=f"Role cache SQLite file for --role-cache (default: <docx folder>/{ROLE_CACHE_NAME})"
+    )
+    parser.add_argument(
+        "--output-cache",
+        action="store_true",
+        help="Reuse earlier outputs for documents whose DOCX, classifications, template and tool are unchanged"
+    )
+    parser.add_argument(
+        "--output-cache-dir",
+        default=None,
+        help="Where --output-cache keeps outputs (default: <docx folder>/_phase2_output_cache)"
+    )
+    parser.add_argument(
+        "--output-cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1 << 20),
+        help="Evict least recently used outputs beyond this size (0 = no limit)"
+    )
+    parser.add_argument(
+        "--output-cache-max-age-days",
+        type=float,
+        default=DEFAULT_MAX_AGE_DAYS,
+        help="Evict outputs not used for this many days (0 = no limit)"
+    )
+    args = parser.parse_args()
+
+    if not (args.phase2_arch_extract or args.phase2_template_pack):
+        print("Error: --phase2-arch-extract or --phase2-template-pack is required")
+        sys.exit(2)
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"Error: not found: {input_path}")
+        sys.exit(1)
+
+    input_dir = input_path if input_path.is_dir() else input_path.parent
+    out_dir = Path(args.out_dir) if args.out_dir else input_dir / "phase2_formatted"
+
+    if input_path.is_dir():
+        jobs = discover_jobs_in_dir(input_path, out_dir)
+    else:
+        jobs = load_manifest_jobs(input_path, out_dir)
+    if not jobs:
+        print(f"No .docx files found in {input_path}")
+        sys.exit(1)
+
+    # Load the architect side once for the whole book
+    if args.phase2_template_pack:
+        template_pack = load_template_pack(Path(args.phase2_template_pack))
+    else:
+        pack_log: List[str] = []
+        template_pack = load_or_compile_template_pack(
+            Path(args.phase2_arch_extract),
+            cache_dir=Path(args.template_pack_cache_dir) if args.template_pack_cache_dir else (
+                input_dir / TEMPLATE_PACK_CACHE_DIRNAME
+            ),
+            log=pack_log
+        )
+        for line in pack_log:
+            print(line)
+
+    summary = run_phase2_batch(
+        jobs,
+        template_pack,
+        out_dir,
+        workers=args.workers,
+        lazy_extract=args.lazy_extract,
+        extract_cache_dir=args.extract_cache_dir or ("" if args.extract_cache else None),
+        output_cache_dir=args.output_cache_dir or ("" if args.output_cache else None),
+        output_cache_max_bytes=int(args.output_cache_max_mb * (1 << 20)),
+        output_cache_max_age_days=args.output_cache_max_age_days,
+        deterministic_ids=args.deterministic_ids,
+        role_cache_db=args.role_cache_db or ("" if args.role_cache else None)
+    )
+
+    counts = summary["counts"]
+    print(
+        f"Batch complete in {summary['elapsed_seconds']}s: "
+        + ", ".join(f"{n} {k}" for k, n in sorted(counts.items()))
+    )
+    print(f"Batch summary written: {summary['summary_path']}")
+    if counts.get("failed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,817 @@
+#!/usr/bin/env python3
+"""
+phase2_bench.py — Phase 2 benchmark suite
+
+Times the Phase 2 hot paths on their own and end to end:
+
+- build_phase2_slim_bundle
+- import_numbering
+- import_arch_styles_into_target
+- apply_phase2_classifications
+- patch_docx
+- end_to_end (extract + index + run_phase2_apply)
+
+Cases are the bundled FIRE/MECH/PLUMB specs (with phase2_classifications.json)
+plus synthetic MasterSpec-style documents generated at 1k/10k/100k paragraphs
+with deep basedOn chains, many numbering definitions, hardcoded run fonts,
+specifier notes, section breaks and a large media part. Synthetic documents
+are deterministic (seeded) and cached in the work dir.
+
+Every stage runs against a fresh in-memory PartStore over one extraction, so
+repeats never see each other's edits and the extraction on disk is never
+modified. Setup work (e.g. importing styles before timing apply) is untimed.
+
+`compare` is the regression gate: it times the bundled specs (plus peak
+memory per stage), checks them against a stored baseline JSON and exits
+non-zero with a table when any stage got slower or hungrier than the
+threshold allows, or when a baseline stage was not measured at all. With
+no baseline file yet, it records one.
+
+Usage:
+    python phase2_bench.py run
+    python phase2_bench.py run --sizes 1000 10000 --repeat 5 --out bench.json
+    python phase2_bench.py generate --paragraphs 10000 --out synthetic_10k.docx
+    python phase2_bench.py compare --baseline bench_baseline.json --threshold 0.25
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import zipfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from arch_env_applier import apply_environment_to_target
+from docx_decomposer import (
+    DocxDecomposer,
+    apply_phase2_classifications,
+    build_phase2_slim_bundle,
+    import_arch_styles_into_target,
+    needed_style_ids_for_classifications,
+    run_phase2_apply,
+)
+from docx_patch import patch_docx
+from numbering_importer import import_numbering
+from paragraph_index import ParagraphIndex
+from part_store import PartStore
+from template_pack import load_or_compile_template_pack
+
+
+REPO_DIR = Path(__file__).resolve().parent
+BUNDLED_SPECS = ("FIRE_SPEC.docx", "MECH_SPEC.docx", "PLUMB_SPEC.docx")
+BUNDLED_CLASSIFICATIONS = "phase2_classifications.json"
+BUNDLED_ARCH_EXTRACT = "NVES_extracted"
+
+SYNTHETIC_SIZES = (1000, 10000, 100000)
+SYNTHETIC_GENERATOR_VERSION = 1
+DEFAULT_WORK_DIR = "_bench"
+DEFAULT_REPEAT = 3
+
+# Regression gate defaults. A stage only regresses if it is worse by more
+# than the relative threshold AND by more than the absolute floor, so
+# sub-millisecond stages cannot fail the gate on timer noise.
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_COMPARE_REPEAT = 5
+DEFAULT_TIME_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.25
+MIN_TIME_DELTA_SECONDS = 0.005
+MIN_MEMORY_DELTA_BYTES = 256 * 1024
+
+STAGES = (
+    "build_phase2_slim_bundle",
+    "import_numbering",
+    "import_arch_styles_into_target",
+    "apply_phase2_classifications",
+    "patch_docx",
+    "end_to_end",
+)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Synthetic MasterSpec-style documents
+# ─────────────────────────────────────────────────────────────────────────────
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+
+# MasterSpec-like source styles: (styleId, outline level or None, role)
+_MS_STYLES = [
+    ("SCT", None, "SectionID"),
+    ("STL", None, "SectionTitle"),
+    ("PRT", 0, "PART"),
+    ("ART", 1, "ARTICLE"),
+    ("PR1", 2, "PARAGRAPH"),
+    ("PR2", 3, "SUBPARAGRAPH"),
+    ("PR3", 4, "SUBSUBPARAGRAPH"),
+    ("CMT", None, None),
+]
+
+_WORDS = (
+    "install equipment piping ductwork valves according manufacturer written instructions "
+    "provide access panels coordinate with structural elements insulation jacket seal joints "
+    "test pressure hydrostatic submit product data shop drawings warranty period system "
+    "operation maintenance comply requirements indicated drawings schedules labeled listed "
+    "fire protection sprinkler heads hangers supports seismic restraints vibration isolation"
+).split()
+
+_SPECIFIER_NOTES = (
+    "Retain or delete this article in all Sections of Project Manual.",
+    "Retain paragraph below if Work includes special requirements.",
+    "Revise this Section by deleting and inserting text to meet Project-specific requirements.",
+    "Coordinate paragraph below with Division 01 requirements.",
+)
+
+
+def _sentence(rng: random.Random, lo: int = 6, hi: int = 24) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    return words[0].capitalize() + " " + " ".join(words[1:]) + "."
+
+
+def _runs(rng: random.Random, text: str) -> str:
+    """Split text over a few runs, each with MasterSpec-style hardcoded fonts."""
+    words = text.split(" ")
+    cuts = sorted(rng.sample(range(1, len(words)), min(len(words) - 1, rng.randint(0, 3)))) if len(words) > 1 else []
+    pieces, last = [], 0
+    for c in cuts + [len(words)]:
+        pieces.append(" ".join(words[last:c]) + (" " if c < len(words) else ""))
+        last = c
+    out = []
+    for piece in pieces:
+        bold = "<w:b/>" if rng.random() < 0.1 else ""
+        out.append(
+            "<w:r><w:rPr>"
+            '<w:rFonts w:ascii="Times New Roman" w:hAnsi="Times New Roman" w:cs="Times New Roman"/>'
+            f'{bold}<w:sz w:val="20"/><w:szCs w:val="20"/>'
+            f'</w:rPr><w:t xml:space="preserve">{piece}</w:t></w:r>'
+        )
+    return "".join(out)
+
+
+def _paragraph(rng: random.Random, style_id: str, text: str, num: Optional[Tuple[int, int]] = None) -> str:
+    numpr = ""
+    if num is not None:
+        numpr = f'<w:numPr><w:ilvl w:val="{num[1]}"/><w:numId w:val="{num[0]}"/></w:numPr>'
+    return f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/>{numpr}</w:pPr>{_runs(rng, text)}</w:p>'
+
+
+def _sectpr() -> str:
+    return (
+        "<w:sectPr>"
+        '<w:headerReference w:type="default" r:id="rIdHdr1"/>'
+        '<w:footerReference w:type="default" r:id="rIdFtr1"/>'
+        '<w:pgSz w:w="12240" w:h="15840"/>'
+        '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" w:header="720" w:footer="720" w:gutter="0"/>'
+        "</w:sectPr>"
+    )
+
+
+def _synthetic_outline(rng: random.Random, num_defs: int) -> Iterator[Tuple[str, Optional[str]]]:
+    """Endless MasterSpec outline: (paragraph XML, csi_role or None)."""
+    section = 0
+    while True:
+        section += 1
+        if section > 1:
+            # Section break paragraph (paragraph-level sectPr)
+            yield f"<w:p><w:pPr>{_sectpr()}</w:pPr></w:p>", None
+        yield _paragraph(rng, "SCT", f"SECTION 23 {section // 100:02d} {section % 100:02d}"), "SectionID"
+        yield _paragraph(rng, "STL", " ".join(rng.choice(_WORDS) for _ in range(3)).upper()), "SectionTitle"
+        for part_no, part_name in enumerate(("GENERAL", "PRODUCTS", "EXECUTION"), 1):
+            yield _paragraph(rng, "PRT", f"PART {part_no} - {part_name}"), "PART"
+            for _ in range(rng.randint(4, 8)):
+                if rng.random() < 0.15:
+                    yield _paragraph(rng, "CMT", rng.choice(_SPECIFIER_NOTES)), None
+                yield _paragraph(rng, "ART", f"{rng.choice(_WORDS).upper()} {rng.choice(_WORDS).upper()}"), "ARTICLE"
+                for _ in range(rng.randint(3, 6)):
+                    # Some paragraphs carry direct numbering from one of the many defs
+                    num = (rng.randint(2, num_defs), 0) if rng.random() < 0.2 else None
+                    yield _paragraph(rng, "PR1", _sentence(rng), num), "PARAGRAPH"
+                    for _ in range(rng.randint(0, 3)):
+                        yield _paragraph(rng, "PR2", _sentence(rng, 4, 14)), "SUBPARAGRAPH"
+                        for _ in range(rng.randint(0, 2)):
+                            yield _paragraph(rng, "PR3", _sentence(rng, 3, 10)), "SUBSUBPARAGRAPH"
+
+
+def _synthetic_body(rng: random.Random, paragraphs: int, num_defs: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """First `paragraphs` outline paragraphs and their classifications."""
+    blocks: List[str] = []
+    classifications: List[Dict[str, Any]] = []
+    for idx, (xml, role) in enumerate(itertools.islice(_synthetic_outline(rng, num_defs), paragraphs)):
+        blocks.append(xml)
+        if role is not None:
+            classifications.append({"paragraph_index": idx, "csi_role": role})
+    return blocks, classifications
+
+
+def _synthetic_styles(chain_depth: int, extra_styles: int, rng: random.Random) -> str:
+    out = [
+        _XML_DECL,
+        f'<w:styles xmlns:w="{_W_NS}" xmlns:r="{_R_NS}">',
+        "<w:docDefaults><w:rPrDefault><w:rPr>"
+        '<w:rFonts w:ascii="Times New Roman" w:hAnsi="Times New Roman" w:cs="Times New Roman"/>'
+        '<w:sz w:val="20"/><w:szCs w:val="20"/><w:lang w:val="en-US"/>'
+        "</w:rPr></w:rPrDefault><w:pPrDefault/></w:docDefaults>",
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>',
+    ]
+    # Deep basedOn chain
+    parent = "Normal"
+    for i in range(chain_depth):
+        sid = f"SynChain{i}"
+        out.append(
+            f'<w:style w:type="paragraph" w:customStyle="1" w:styleId="{sid}"><w:name w:val="{sid}"/>'
+            f'<w:basedOn w:val="{parent}"/><w:pPr><w:spacing w:before="{i * 10}" w:after="0"/></w:pPr>'
+            f'<w:rPr><w:sz w:val="{18 + i % 6}"/></w:rPr></w:style>'
+        )
+        parent = sid
+    for sid, level, _role in _MS_STYLES:
+        numpr = f'<w:numPr><w:ilvl w:val="{level}"/><w:numId w:val="1"/></w:numPr>' if level is not None else ""
+        out.append(
+            f'<w:style w:type="paragraph" w:customStyle="1" w:styleId="{sid}"><w:name w:val="{sid}"/>'
+            f'<w:basedOn w:val="{parent}"/><w:pPr>{numpr}<w:keepNext/></w:pPr>'
+            f'<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/></w:rPr></w:style>'
+        )
+    for i in range(extra_styles):
+        base = f"SynChain{rng.randrange(chain_depth)}" if chain_depth else "Normal"
+        sid = f"SynExtra{i}"
+        out.append(
+            f'<w:style w:type="paragraph" w:customStyle="1" w:styleId="{sid}"><w:name w:val="{sid}"/>'
+            f'<w:basedOn w:val="{base}"/><w:rPr><w:color w:val="{rng.randrange(0x1000000):06X}"/></w:rPr></w:style>'
+        )
+    out.append("</w:styles>")
+    return "".join(out)
+
+
+def _synthetic_numbering(num_defs: int) -> str:
+    out = [_XML_DECL, f'<w:numbering xmlns:w="{_W_NS}">']
+    for a in range(num_defs):
+        levels = []
+        for lvl in range(9):
+            levels.append(
+                f'<w:lvl w:ilvl="{lvl}"><w:start w:val="1"/><w:numFmt w:val="{"upperLetter" if lvl % 2 else "decimal"}"/>'
+                f'<w:lvlText w:val="%{lvl + 1}."/><w:lvlJc w:val="left"/>'
+                f'<w:pPr><w:ind w:left="{720 * (lvl + 1)}" w:hanging="360"/></w:pPr></w:lvl>'
+            )
+        out.append(
+            f'<w:abstractNum w:abstractNumId="{a}"><w:nsid w:val="{0x10000000 + a:08X}"/>'
+            f'<w:multiLevelType w:val="multilevel"/>{"".join(levels)}</w:abstractNum>'
+        )
+    for n in range(num_defs):
+        out.append(f'<w:num w:numId="{n + 1}"><w:abstractNumId w:val="{n}"/></w:num>')
+    out.append("</w:numbering>")
+    return "".join(out)
+
+
+def _header_footer(tag: str, text: str) -> str:
+    return (
+        f'{_XML_DECL}<w:{tag} xmlns:w="{_W_NS}" xmlns:r="{_R_NS}">'
+        f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:{tag}>"
+    )
+
+
+def generate_synthetic_spec(
+    out_docx: Path,
+    paragraphs: int,
+    seed: int = 0,
+    chain_depth: int = 12,
+    num_defs: Optional[int] = None,
+    extra_styles: Optional[int] = None,
+    media_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Write a synthetic MasterSpec-style DOCX with `paragraphs` body paragraphs.
+    Returns its classifications JSON (also written next to it as
+    <stem>_classifications.json, the phase2_batch convention).
+
+    Defaults scale with size: numbering definitions max(50, n/50), extra
+    styles max(100, n/100), incompressible media n*256 bytes (min 1 MB).
+    """
+    out_docx = Path(out_docx)
+    rng = random.Random(seed)
+    num_defs = num_defs if num_defs is not None else max(50, paragraphs // 50)
+    extra_styles = extra_styles if extra_styles is not None else max(100, paragraphs // 100)
+    media_bytes = media_bytes if media_bytes is not None else max(1 << 20, paragraphs * 256)
+
+    blocks, classifications = _synthetic_body(rng, paragraphs, num_defs)
+    document_xml = (
+        f'{_XML_DECL}<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>'
+        + "".join(blocks)
+        + _sectpr()
+        + "</w:body></w:document>"
+    )
+
+    content_types = (
+        f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="png" ContentType="image/png"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+        '<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>'
+        '<Override PartName="/word/settings.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.settings+xml"/>'
+        '<Override PartName="/word/fontTable.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.fontTable+xml"/>'
+        '<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>'
+        '<Override PartName="/word/footer1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/>'
+        "</Types>"
+    )
+    package_rels = (
+        f'{_XML_DECL}<Relationships xmlns="{_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_TYPE}/officeDocument" Target="word/document.xml"/>'
+        "</Relationships>"
+    )
+    document_rels = (
+        f'{_XML_DECL}<Relationships xmlns="{_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_TYPE}/styles" Target="styles.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_TYPE}/numbering" Target="numbering.xml"/>'
+        f'<Relationship Id="rId3" Type="{_REL_TYPE}/settings" Target="settings.xml"/>'
+        f'<Relationship Id="rId4" Type="{_REL_TYPE}/fontTable" Target="fontTable.xml"/>'
+        f'<Relationship Id="rIdHdr1" Type="{_REL_TYPE}/header" Target="header1.xml"/>'
+        f'<Relationship Id="rIdFtr1" Type="{_REL_TYPE}/footer" Target="footer1.xml"/>'
+        f'<Relationship Id="rId5" Type="{_REL_TYPE}/image" Target="media/image1.png"/>'
+        "</Relationships>"
+    )
+    settings_xml = (
+        f'{_XML_DECL}<w:settings xmlns:w="{_W_NS}"><w:defaultTabStop w:val="720"/>'
+        '<w:compat><w:compatSetting w:name="compatibilityMode" w:uri="http://schemas.microsoft.com/office/word" w:val="14"/></w:compat>'
+        "</w:settings>"
+    )
+    font_table = (
+        f'{_XML_DECL}<w:fonts xmlns:w="{_W_NS}">'
+        '<w:font w:name="Times New Roman"><w:family w:val="roman"/></w:font>'
+        '<w:font w:name="Arial"><w:family w:val="swiss"/></w:font>'
+        "</w:fonts>"
+    )
+
+    parts: List[Tuple[str, bytes]] = [
+        ("[Content_Types].xml", content_types.encode("utf-8")),
+        ("_rels/.rels", package_rels.encode("utf-8")),
+        ("word/document.xml", document_xml.encode("utf-8")),
+        ("word/_rels/document.xml.rels", document_rels.encode("utf-8")),
+        ("word/styles.xml", _synthetic_styles(chain_depth, extra_styles, rng).encode("utf-8")),
+        ("word/numbering.xml", _synthetic_numbering(num_defs).encode("utf-8")),
+        ("word/settings.xml", settings_xml.encode("utf-8")),
+        ("word/fontTable.xml", font_table.encode("utf-8")),
+        ("word/header1.xml", _header_footer("hdr", "SYNTHETIC SPEC").encode("utf-8")),
+        ("word/footer1.xml", _header_footer("ftr", "Page").encode("utf-8")),
+        ("word/media/image1.png", b"\x89PNG\r\n\x1a\n" + rng.randbytes(media_bytes)),
+    ]
+
+    out_docx.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(out_docx, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in parts:
+            z.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data, compress_type=zipfile.ZIP_DEFLATED)
+
+    result = {
+        "classifications": classifications,
+        "notes": f"synthetic v{SYNTHETIC_GENERATOR_VERSION}: {len(blocks)} paragraphs, seed {seed}",
+    }
+    cls_path = out_docx.with_name(out_docx.stem + "_classifications.json")
+    cls_path.write_text(json.dumps(result), encoding="utf-8")
+    return result
+
+
+def synthetic_case(work_dir: Path, paragraphs: int, seed: int = 0) -> Tuple[Path, Path]:
+    """Cached synthetic docx + classifications for a size; generated on first use."""
+    docx = work_dir / f"synthetic_v{SYNTHETIC_GENERATOR_VERSION}_{paragraphs}_s{seed}.docx"
+    cls_path = docx.with_name(docx.stem + "_classifications.json")
+    if not (docx.exists() and cls_path.exists()):
+        generate_synthetic_spec(docx, paragraphs, seed=seed)
+    return docx, cls_path
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stage runners
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BenchCase:
+    """One document extracted once; every stage gets a fresh PartStore over it."""
+
+    def __init__(self, name: str, docx: Path, classifications_path: Path, template_pack: Dict[str, Any], work_dir: Path):
+        self.name = name
+        self.docx = Path(docx)
+        self.classifications = json.loads(Path(classifications_path).read_text(encoding="utf-8"))
+        self.pack = template_pack
+        self.work_dir = work_dir / name
+        self.env_registry = template_pack.get("template_registry") or {}
+        self.arch_root = Path(template_pack["arch_root"])
+        self.needed_style_ids = needed_style_ids_for_classifications(
+            self.classifications, template_pack["role_styles"]
+        )
+        with redirect_stdout(io.StringIO()):
+            self.extract_dir = DocxDecomposer(self.docx).extract(output_dir=self.work_dir / "extracted")
+        self.paragraph_count = len(ParagraphIndex.from_extract_dir(self.extract_dir))
+        self.document_xml_bytes = (self.extract_dir / "word" / "document.xml").stat().st_size
+
+    # Setup replays the stages that run before the timed one, so it sees the
+    # same parts it would in a real run (e.g. docDefaults already replaced).
+
+    def _fresh_parts(self) -> PartStore:
+        parts = PartStore(self.extract_dir)
+        if self.env_registry:
+            apply_environment_to_target(self.extract_dir, self.env_registry, [], parts=parts)
+        return parts
+
+    def _numbering(self, parts: PartStore, log: List[str]):
+        return import_numbering(
+            arch_extract_dir=self.arch_root,
+            target_extract_dir=self.extract_dir,
+            arch_template_registry=self.env_registry,
+            style_ids_to_import=self.needed_style_ids,
+            log=log,
+            style_to_numid=self.pack["style_numids"],
+            parts=parts
+        )
+
+    def _styles(self, parts: PartStore, remap, log: List[str]) -> None:
+        import_arch_styles_into_target(
+            target_extract_dir=self.extract_dir,
+            arch_extract_dir=self.arch_root,
+            needed_style_ids=self.needed_style_ids,
+            log=log,
+            style_numid_remap=remap,
+            template_pack=self.pack,
+            parts=parts
+        )
+
+    def _apply(self, parts: PartStore, index: ParagraphIndex, log: List[str]) -> None:
+        apply_phase2_classifications(
+            extract_dir=self.extract_dir,
+            classifications=self.classifications,
+            arch_style_registry=self.pack["role_styles"],
+            log=log,
+            paragraph_index=index,
+            parts=parts
+        )
+
+    def stage_calls(self, stage: str) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+        """(setup, timed) for a stage; timed receives setup's return value."""
+        if stage == "build_phase2_slim_bundle":
+            return (
+                lambda: None,
+                lambda _: build_phase2_slim_bundle(
+                    self.extract_dir, "mechanical", available_roles=self.pack["available_roles"]
+                ),
+            )
+
+        if stage == "import_numbering":
+            def setup():
+                parts = self._fresh_parts()
+                parts.get_text("word/numbering.xml")
+                return parts
+            return setup, lambda parts: self._numbering(parts, [])
+
+        if stage == "import_arch_styles_into_target":
+            def setup():
+                parts = self._fresh_parts()
+                return parts, self._numbering(parts, [])
+            return setup, lambda st: self._styles(st[0], st[1], [])
+
+        if stage == "apply_phase2_classifications":
+            def setup():
+                parts = self._fresh_parts()
+                self._styles(parts, self._numbering(parts, []), [])
+                return parts, ParagraphIndex.build(parts.get_bytes("word/document.xml"))
+            return setup, lambda st: self._apply(st[0], st[1], [])
+
+        if stage == "patch_docx":
+            out_docx = self.work_dir / "patched.docx"
+
+            def setup():
+                parts = self._fresh_parts()
+                self._styles(parts, self._numbering(parts, []), [])
+                self._apply(parts, ParagraphIndex.build(parts.get_bytes("word/document.xml")), [])
+                return parts.replacements()
+            return setup, lambda reps: patch_docx(self.docx, out_docx, reps)
+
+        if stage == "end_to_end":
+            out_docx = self.work_dir / "end_to_end.docx"
+
+            def run(_):
+                decomposer = DocxDecomposer(self.docx)
+                extract_dir = decomposer.extract(output_dir=self.work_dir / "end_to_end")
+                parts = PartStore(extract_dir, source=decomposer)
+                index = ParagraphIndex.build(parts.get_bytes("word/document.xml"))
+                run_phase2_apply(
+                    input_docx_path=self.docx,
+                    extract_dir=extract_dir,
+                    template_pack=self.pack,
+                    classifications=self.classifications,
+                    output_docx_path=out_docx,
+                    parts=parts,
+                    paragraph_index=index,
+                    log=[]
+                )
+            return lambda: None, run
+
+        raise ValueError(f"Unknown benchmark stage: {stage}")
+
+
+def time_stage(case: BenchCase, stage: str, repeat: int, measure_memory: bool = False) -> Dict[str, Any]:
+    """
+    min/median wall time over `repeat` runs. With measure_memory, one extra
+    run under tracemalloc records the peak Python allocation of the timed call
+    (kept separate so tracing overhead never shows up in the timings).
+    """
+    setup, timed = case.stage_calls(stage)
+    runs: List[float] = []
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            state = setup()
+            t0 = time.perf_counter()
+            timed(state)
+            runs.append(time.perf_counter() - t0)
+    result: Dict[str, Any] = {
+        "min_seconds": round(min(runs), 6),
+        "median_seconds": round(statistics.median(runs), 6),
+        "runs": [round(r, 6) for r in runs],
+    }
+    if measure_memory:
+        with redirect_stdout(io.StringIO()):
+            state = setup()
+            tracemalloc.start()
+            try:
+                timed(state)
+                result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return result
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Suite
+# ─────────────────────────────────────────────────────────────────────────────
+
+def collect_cases(
+    work_dir: Path,
+    sizes: List[int],
+    include_bundled: bool = True,
+    seed: int = 0
+) -> List[Tuple[str, Path, Path]]:
+    """(name, docx, classifications) for the bundled specs and each synthetic size."""
+    cases: List[Tuple[str, Path, Path]] = []
+    if include_bundled:
+        cls_path = REPO_DIR / BUNDLED_CLASSIFICATIONS
+        for name in BUNDLED_SPECS:
+            docx = REPO_DIR / name
+            if docx.exists() and cls_path.exists():
+                cases.append((docx.stem, docx, cls_path))
+    for n in sizes:
+        docx, cls_path = synthetic_case(work_dir, n, seed=seed)
+        cases.append((f"synthetic_{n}", docx, cls_path))
+    return cases
+
+
+def run_benchmarks(
+    arch_extract: Path,
+    work_dir: Path,
+    sizes: List[int],
+    repeat: int = DEFAULT_REPEAT,
+    stages: Optional[List[str]] = None,
+    include_bundled: bool = True,
+    measure_memory: bool = False,
+    progress: Optional[Callable[[str], None]] = print
+) -> Dict[str, Any]:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    stages = list(stages or STAGES)
+    template_pack = load_or_compile_template_pack(arch_extract, cache_dir=work_dir / "_template_packs")
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "sizes": list(sizes),
+            "stages": stages,
+            "include_bundled": include_bundled,
+            "synthetic_generator_version": SYNTHETIC_GENERATOR_VERSION,
+            "template_source_hash": template_pack["source_hash"],
+        },
+        "cases": {},
+    }
+    for name, docx, cls_path in collect_cases(work_dir, sizes, include_bundled):
+        case = BenchCase(name, docx, cls_path, template_pack, work_dir)
+        entry: Dict[str, Any] = {
+            "docx": str(docx),
+            "paragraphs": case.paragraph_count,
+            "document_xml_bytes": case.document_xml_bytes,
+            "docx_bytes": docx.stat().st_size,
+            "stages": {},
+        }
+        for stage in stages:
+            entry["stages"][stage] = time_stage(case, stage, repeat, measure_memory=measure_memory)
+            if progress:
+                progress(f"  {name:20} {stage:32} {entry['stages'][stage]['min_seconds'] * 1000:10.1f} ms")
+        results["cases"][name] = entry
+    return results
+
+
+def format_results_table(results: Dict[str, Any]) -> str:
+    lines = [f"{'case':20} {'paragraphs':>10} {'stage':32} {'min ms':>10} {'median ms':>10}"]
+    lines.append("-" * len(lines[0]))
+    for name, entry in results["cases"].items():
+        for stage, r in entry["stages"].items():
+            lines.append(
+                f"{name:20} {entry['paragraphs']:>10} {stage:32} "
+                f"{r['min_seconds'] * 1000:>10.1f} {r['median_seconds'] * 1000:>10.1f}"
+            )
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Regression gate
+# ─────────────────────────────────────────────────────────────────────────────
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    time_threshold: float = DEFAULT_TIME_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+    min_time_delta: float = MIN_TIME_DELTA_SECONDS,
+    min_memory_delta: int = MIN_MEMORY_DELTA_BYTES
+) -> List[Dict[str, Any]]:
+    """
+    One row per (case, stage) in either result set. status is "ok",
+    "regressed", "new" (not in baseline) or "missing" (not measured now).
+    Times compare min_seconds; memory compares peak_bytes when both have it.
+    """
+    rows: List[Dict[str, Any]] = []
+    base_cases = baseline.get("cases", {})
+    cur_cases = current.get("cases", {})
+    for case in list(base_cases) + [c for c in cur_cases if c not in base_cases]:
+        base_stages = base_cases.get(case, {}).get("stages", {})
+        cur_stages = cur_cases.get(case, {}).get("stages", {})
+        for stage in list(base_stages) + [s for s in cur_stages if s not in base_stages]:
+            b, c = base_stages.get(stage), cur_stages.get(stage)
+            row: Dict[str, Any] = {"case": case, "stage": stage, "reasons": []}
+            if b is None or c is None:
+                row["status"] = "new" if b is None else "missing"
+                rows.append(row)
+                continue
+
+            row["base_seconds"], row["cur_seconds"] = b["min_seconds"], c["min_seconds"]
+            row["time_ratio"] = c["min_seconds"] / b["min_seconds"] if b["min_seconds"] else None
+            if (
+                c["min_seconds"] > b["min_seconds"] * (1 + time_threshold)
+                and c["min_seconds"] - b["min_seconds"] > min_time_delta
+            ):
+                row["reasons"].append("time")
+
+            if "peak_bytes" in b and "peak_bytes" in c:
+                row["base_peak"], row["cur_peak"] = b["peak_bytes"], c["peak_bytes"]
+                row["memory_ratio"] = c["peak_bytes"] / b["peak_bytes"] if b["peak_bytes"] else None
+                if (
+                    c["peak_bytes"] > b["peak_bytes"] * (1 + memory_threshold)
+                    and c["peak_bytes"] - b["peak_bytes"] > min_memory_delta
+                ):
+                    row["reasons"].append("memory")
+
+            row["status"] = "regressed" if row["reasons"] else "ok"
+            rows.append(row)
+    return rows
+
+
+def _fmt_ratio(ratio: Optional[float]) -> str:
+    return f"{(ratio - 1) * 100:+.0f}%" if ratio is not None else "n/a"
+
+
+def format_comparison_table(rows: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'case':20} {'stage':32} {'base ms':>9} {'now ms':>9} {'change':>7} "
+        f"{'base MB':>8} {'now MB':>8} {'change':>7}  status"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        if r["status"] in ("new", "missing"):
+            lines.append(f"{r['case']:20} {r['stage']:32} {'':>9} {'':>9} {'':>7} {'':>8} {'':>8} {'':>7}  {r['status']}")
+            continue
+        mem = f"{'':>8} {'':>8} {'':>7}"
+        if "base_peak" in r:
+            mem = (
+                f"{r['base_peak'] / (1 << 20):>8.2f} {r['cur_peak'] / (1 << 20):>8.2f} "
+                f"{_fmt_ratio(r.get('memory_ratio')):>7}"
+            )
+        status = "REGRESSED (" + ", ".join(r["reasons"]) + ")" if r["reasons"] else "ok"
+        lines.append(
+            f"{r['case']:20} {r['stage']:32} {r['base_seconds'] * 1000:>9.1f} {r['cur_seconds'] * 1000:>9.1f} "
+            f"{_fmt_ratio(r.get('time_ratio')):>7} {mem}  {status}"
+        )
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Phase 2 benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Time Phase 2 stages on bundled and synthetic specs")
+    p_run.add_argument("--arch-extract", default=str(REPO_DIR / BUNDLED_ARCH_EXTRACT), help="Architect extracted folder")
+    p_run.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Scratch folder (synthetic docs are cached here)")
+    p_run.add_argument("--sizes", type=int, nargs="*", default=list(SYNTHETIC_SIZES), help="Synthetic paragraph counts")
+    p_run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per stage (min and median reported)")
+    p_run.add_argument("--stages", nargs="*", choices=STAGES, default=None, help="Subset of stages to time")
+    p_run.add_argument("--no-bundled", action="store_true", help="Skip FIRE/MECH/PLUMB")
+    p_run.add_argument("--out", default=None, help="Write results JSON here")
+
+    p_cmp = sub.add_parser("compare", help="Regression gate against a stored baseline JSON")
+    p_cmp.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON (recorded here if missing)")
+    p_cmp.add_argument("--arch-extract", default=str(REPO_DIR / BUNDLED_ARCH_EXTRACT), help="Architect extracted folder")
+    p_cmp.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Scratch folder (synthetic docs are cached here)")
+    p_cmp.add_argument("--sizes", type=int, nargs="*", default=[], help="Also gate synthetic sizes (default: none)")
+    p_cmp.add_argument("--repeat", type=int, default=DEFAULT_COMPARE_REPEAT, help="Runs per stage (min is compared)")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_TIME_THRESHOLD, help="Allowed slowdown (0.25 = 25%%)")
+    p_cmp.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD, help="Allowed peak memory growth")
+    p_cmp.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+
+    p_gen = sub.add_parser("generate", help="Write one synthetic MasterSpec-style spec")
+    p_gen.add_argument("--paragraphs", type=int, required=True)
+    p_gen.add_argument("--out", required=True, help="Output .docx (classifications written next to it)")
+    p_gen.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        result = generate_synthetic_spec(Path(args.out), args.paragraphs, seed=args.seed)
+        print(f"Synthetic spec written: {args.out} ({result['notes']})")
+        return
+
+    if args.command == "compare":
+        baseline_path = Path(args.baseline)
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+        if baseline is not None:
+            # Measure exactly what the baseline measured
+            sizes = baseline["meta"].get("sizes", [])
+            stages = baseline["meta"].get("stages") or list(STAGES)
+            include_bundled = baseline["meta"].get("include_bundled", True)
+        else:
+            sizes, stages, include_bundled = args.sizes, list(STAGES), True
+
+        current = run_benchmarks(
+            Path(args.arch_extract),
+            Path(args.work_dir),
+            sizes=sizes,
+            repeat=args.repeat,
+            stages=stages,
+            include_bundled=include_bundled,
+            measure_memory=True,
+        )
+        if baseline is None or args.update_baseline:
+            baseline_path.write_text(json.dumps(current, indent=2), encoding="utf-8")
+            print(f"\nBaseline written: {baseline_path}")
+            if baseline is None:
+                return
+
+        rows = compare_results(
+            baseline,
+            current,
+            time_threshold=args.threshold,
+            memory_threshold=args.memory_threshold,
+        )
+        print("")
+        print(format_comparison_table(rows))
+        regressed = [r for r in rows if r["status"] == "regressed"]
+        missing = [r for r in rows if r["status"] == "missing"]
+        if regressed:
+            print(f"\n{len(regressed)} stage(s) regressed beyond the threshold "
+                  f"(time {args.threshold:.0%}, memory {args.memory_threshold:.0%}).")
+        if missing:
+            # A stage that stops being measured must not pass silently
+            print(f"\n{len(missing)} baseline stage(s) not measured in this run: "
+                  + ", ".join(f"{r['case']}/{r['stage']}" for r in missing)
+                  + ". Restore them or re-record the baseline with --update-baseline.")
+        if regressed or missing:
+            sys.exit(1)
+        print("\nNo regressions.")
+        return
+
+    results = run_benchmarks(
+        Path(args.arch_extract),
+        Path(args.work_dir),
+        sizes=args.sizes,
+        repeat=args.repeat,
+        stages=args.stages,
+        include_bundled=not args.no_bundled,
+    )
+    print("")
+    print(format_results_table(results))
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nBenchmark results written: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,10 @@ def _read_docx_part(docx: Path, internal_path: str) -> bytes:
     with zipfile.ZipFile(docx, "r") as z:
         return z.read(internal_path)
 
-def _extract_all_sectpr_blocks(document_xml: str) -> List[str]:
-    return re.findall(r"<w:sectPr\b[\s\S]*?</w:sectPr>", document_xml)
+_SECTPR_BRX = re.compile(rb"<w:sectPr\b[\s\S]*?</w:sectPr>")
+
+def _extract_all_sectpr_blocks(document_xml: bytes) -> List[bytes]:
+    return _SECTPR_BRX.findall(document_xml)
 
 
 def _normalize_rpr_for_comparison(rpr_block: str) -> str:
@@ -60,9 +62,9 @@ def verify_phase2_invariants(
     The font exception allows us to strip hardcoded fonts from MasterSpec docs
     so that style-level fonts take effect.
     """
-    # 1) sectPr unchanged
-    before_doc = _read_docx_part(src_docx, "word/document.xml").decode("utf-8", errors="strict")
-    after_doc = new_document_xml.decode("utf-8", errors="strict")
+    # 1) sectPr unchanged (compared as raw bytes; nothing here needs decoded text)
+    before_doc = _read_docx_part(src_docx, "word/document.xml")
+    after_doc = new_document_xml
 
     if _extract_all_sectpr_blocks(before_doc) != _extract_all_sectpr_blocks(after_doc):
         raise RuntimeError("INVARIANT FAIL: sectPr changed")
@@ -83,23 +85,19 @@ def verify_phase2_invariants(
                     raise RuntimeError(f"INVARIANT FAIL: header/footer changed: {name}")
 
     # 3) no run-level formatting edits EXCEPT font-related (rFonts, sz, szCs)
-    # We normalize rPr blocks by stripping font elements, then compare
-    before_rpr_normalized = _extract_and_normalize_rpr_blocks(before_doc)
-    after_rpr_normalized = _extract_and_normalize_rpr_blocks(after_doc)
-    
-    # Note: The number of rPr blocks might change if we remove empty ones,
-    # so we compare the non-empty normalized blocks
-    before_rpr_filtered = [b for b in before_rpr_normalized if b.strip() and b.strip() != '<w:rPr></w:rPr>']
-    after_rpr_filtered = [b for b in after_rpr_normalized if b.strip() and b.strip() != '<w:rPr></w:rPr>']
-    
     # Instead of strict equality (which fails if rPr blocks are removed),
-    # we check that no NON-FONT formatting was changed.
+    # we would check that no NON-FONT formatting was changed.
     # This is a relaxed check - we're mainly guarding against accidental changes.
     
     # For now, skip this check since stripping fonts can remove entire rPr blocks
     # and change the count. The main contract check in apply_phase2_classifications
-    # handles this more precisely.
+    # handles this more precisely, so the normalized rPr lists are not built either.
     #
     # If you want stricter checking, uncomment:
+    # before_rpr_normalized = _extract_and_normalize_rpr_blocks(before_doc.decode("utf-8"))
+    # after_rpr_normalized = _extract_and_normalize_rpr_blocks(after_doc.decode("utf-8"))
+    # # The number of rPr blocks might change if we remove empty ones, so compare the non-empty ones
+    # before_rpr_filtered = [b for b in before_rpr_normalized if b.strip() and b.strip() != '<w:rPr></w:rPr>']
+    # after_rpr_filtered = [b for b in after_rpr_normalized if b.strip() and b.strip() != '<w:rPr></w:rPr>']
     # if before_rpr_filtered != after_rpr_filtered:
     #     raise RuntimeError("INVARIANT FAIL: document.xml run properties changed beyond font elements")
\ No newline at end of file
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+phase2_profile.py — Stage timing for Phase 2 runs
+
+StageTimer records wall time, CPU time and bytes read/written for each
+pipeline stage (extract, environment, numbering import, style import,
+classification apply, stability checks, patch_docx, invariants), plus the
+slowest paragraphs in apply_phase2_classifications. run_phase2_apply writes
+the result as phase2_timings.json next to phase2_issues.log.
+
+Bytes are taken from the shared PartStore counters when the timer has one;
+a stage can add its own (e.g. the size of the patched docx) by setting
+"bytes_read"/"bytes_written" on the record it gets from stage().
+
+Memory accounting is opt-in (StageTimer(trace_memory=True), --trace-memory):
+each stage then also records, via tracemalloc, its peak and retained Python
+allocations and the source lines holding the most memory. Pipeline functions
+call memory_checkpoint() where their working set is largest (e.g. just
+before apply_phase2_classifications rebuilds document.xml), so the top sites
+reflect the peak and not only what survives the stage. memory_checkpoint()
+is a no-op unless a tracing timer is running.
+
+Usage:
+    timer = StageTimer()
+    with timer.stage("extract") as rec:
+        ...
+        rec["bytes_written"] = extracted_size
+    timer.parts = parts
+    with timer.stage("apply_classifications"):
+        ...
+    timer.write(extract_dir / PHASE2_TIMINGS_NAME)
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from part_store import PartStore
+
+
+PHASE2_TIMINGS_NAME = "phase2_timings.json"
+PHASE2_PROFILE_NAME = "phase2_profile.prof"
+SLOWEST_PARAGRAPHS = 10
+TOP_MEMORY_SITES = 10
+
+# The tracing timer memory_checkpoint() reports to (None when not tracing)
+_ACTIVE_MEMORY_TIMER: Optional["StageTimer"] = None
+
+
+def memory_checkpoint(label: str) -> None:
+    """Record the active stage's live allocations here, if memory tracing is on."""
+    timer = _ACTIVE_MEMORY_TIMER
+    if timer is not None:
+        timer._checkpoint(label)
+
+
+def _top_sites(snapshot: tracemalloc.Snapshot, since: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Source lines with the most memory allocated since `since` and still live."""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = snapshot.filter_traces(ignore).compare_to(since.filter_traces(ignore), "lineno")
+    out: List[Dict[str, Any]] = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        out.append({
+            "site": f"{Path(frame.filename).name}:{frame.lineno}",
+            "size_bytes": stat.size_diff,
+            "count": stat.count_diff,
+        })
+        if len(out) >= top:
+            break
+    return out
+
+
+class StageTimer:
+    def __init__(self, parts: Optional[PartStore] = None, trace_memory: bool = False):
+        self.parts = parts
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+        self.slowest_paragraphs: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._started_tracing = False
+        self._mem_rec: Optional[Dict[str, Any]] = None
+        self._mem_base = 0
+        self._mem_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _counters(self):
+        if self.parts is None:
+            return 0, 0
+        return self.parts.bytes_read, self.parts.bytes_written
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Time the body; the yielded record is appended even if the body raises."""
+        rec: Dict[str, Any] = {
+            "stage": name, "wall_seconds": 0.0, "cpu_seconds": 0.0, "bytes_read": 0, "bytes_written": 0,
+        }
+        if self.trace_memory:
+            self._begin_memory(rec)
+        read0, written0 = self._counters()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        except BaseException:
+            rec["failed"] = True
+            raise
+        finally:
+            read1, written1 = self._counters()
+            rec["wall_seconds"] = round(time.perf_counter() - wall0, 6)
+            rec["cpu_seconds"] = round(time.process_time() - cpu0, 6)
+            rec["bytes_read"] += read1 - read0
+            rec["bytes_written"] += written1 - written0
+            if self.trace_memory:
+                self._end_memory(rec)
+            self.stages.append(rec)
+
+    # ─────────────────────────────────────────────────────────────────────
+    # Memory (tracemalloc)
+    # ─────────────────────────────────────────────────────────────────────
+
+    def _begin_memory(self, rec: Dict[str, Any]) -> None:
+        global _ACTIVE_MEMORY_TIMER
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        _ACTIVE_MEMORY_TIMER = self
+        self._mem_rec = rec
+        self._mem_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self._mem_base = tracemalloc.get_traced_memory()[0]
+        rec["memory"] = {"checkpoints": []}
+
+    def _checkpoint(self, label: str) -> None:
+        if self._mem_rec is None:
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        self._mem_rec["memory"]["checkpoints"].append({
+            "label": label,
+            "live_bytes": current - self._mem_base,
+            "top_sites": _top_sites(tracemalloc.take_snapshot(), self._mem_snapshot, TOP_MEMORY_SITES),
+        })
+
+    def _end_memory(self, rec: Dict[str, Any]) -> None:
+        global _ACTIVE_MEMORY_TIMER
+        current, peak = tracemalloc.get_traced_memory()
+        mem = rec["memory"]
+        mem["peak_bytes"] = peak - self._mem_base
+        mem["retained_bytes"] = current - self._mem_base
+        mem["retained_top_sites"] = _top_sites(tracemalloc.take_snapshot(), self._mem_snapshot, TOP_MEMORY_SITES)
+        self._mem_rec = None
+        self._mem_snapshot = None
+        _ACTIVE_MEMORY_TIMER = None
+
+    def close(self) -> None:
+        """Stop tracemalloc if this timer started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def record_paragraphs(
+        self,
+        paragraph_seconds: Dict[int, float],
+        paragraph_index=None,
+        top: int = SLOWEST_PARAGRAPHS
+    ) -> None:
+        """Keep the top slowest paragraphs (index -> seconds) with a text preview."""
+        slowest = sorted(paragraph_seconds.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        out: List[Dict[str, Any]] = []
+        for idx, seconds in slowest:
+            entry: Dict[str, Any] = {"paragraph_index": idx, "seconds": round(seconds, 6)}
+            if paragraph_index is not None:
+                rec = paragraph_index[idx]
+                entry["xml_bytes"] = rec.end - rec.start
+                entry["text"] = rec.text[:80]
+            out.append(entry)
+        self.slowest_paragraphs = out
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "total_wall_seconds": round(time.perf_counter() - self._start, 6),
+            "stages": self.stages,
+            "slowest_paragraphs": self.slowest_paragraphs,
+        }
+        if self.trace_memory:
+            peaks = [r["memory"]["peak_bytes"] for r in self.stages if "memory" in r]
+            out["peak_stage_bytes"] = max(peaks) if peaks else 0
+        return out
+
+    def write(self, out_path: Path) -> Path:
+        out_path = Path(out_path)
+        out_path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return out_path
+
+
+@contextmanager
+def maybe_profile(out_path: Optional[Path]) -> Iterator[None]:
+    """cProfile the body and dump stats to out_path; no-op if out_path is None."""
+    if out_path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(out_path))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+revision_carryover.py — Reuse classifications across spec revisions
+
+A spec goes through many revisions and most paragraphs survive each one
+unchanged. Given the previous revision (its source DOCX, or the paragraph
+sidecar written when its bundle was built) and the classifications it was
+applied with, the paragraphs of the new revision are aligned to the old ones
+by content hash:
+
+  1. an order-preserving diff of the two content-hash sequences, so
+     repeated paragraphs such as blank lines or "Retain paragraph below..."
+     notes pair up with their neighbours rather than with the first copy.
+     The diff is patience-style: the common prefix and suffix are trimmed,
+     hashes found exactly once on each side are anchored (longest increasing
+     run), and difflib.SequenceMatcher only runs on the small gaps between
+     anchors. SequenceMatcher alone goes quadratic on repeated hashes;
+  2. paragraphs that moved: a hash found exactly once in each revision is
+     still paired if a neighbour moved with it.
+
+Aligned paragraphs keep their old role under their new paragraph_index; only
+paragraphs that are new or changed go into the slim bundle. The LLM output
+for those is then merged back with merge_classifications().
+
+The previous DOCX must be the previous *source* revision (not its
+_PHASE2_FORMATTED output), since apply rewrites paragraph XML.
+
+Usage:
+    previous = load_previous_revision(Path("rev3.docx"), Path("rev3_classifications.json"))
+    carried = carry_over_classifications(previous, paragraph_index)
+    ...
+    merged = merge_classifications(carried, llm_classifications)
+"""
+
+from __future__ import annotations
+
+import json
+import zipfile
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from paragraph_index import ParagraphIndex
+
+
+CARRIED_CLASSIFICATIONS_NAME = "phase2_carried_classifications.json"
+MERGED_CLASSIFICATIONS_NAME = "phase2_classifications_merged.json"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Previous revision
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_previous_revision(previous: Path, classifications_path: Path) -> Dict[str, Any]:
+    """
+    previous is the previous revision's DOCX or its paragraph sidecar
+    (phase2_paragraph_index.json). Returns its paragraph content hashes and
+    the roles it was classified with, keyed by its own paragraph_index.
+    """
+    previous = Path(previous)
+    if previous.suffix.lower() == ".json":
+        sidecar = json.loads(previous.read_text(encoding="utf-8"))
+        if not isinstance(sidecar, dict) or not isinstance(sidecar.get("content_hash"), list):
+            raise ValueError(f"{previous} is not a paragraph sidecar (no content_hash column)")
+        hashes = sidecar["content_hash"]
+        source = sidecar.get("docx_name") or previous.name
+    else:
+        with zipfile.ZipFile(previous, "r") as z:
+            hashes = [r.content_hash for r in ParagraphIndex.build(z.read("word/document.xml"))]
+        source = previous.name
+
+    classifications = json.loads(Path(classifications_path).read_text(encoding="utf-8"))
+    roles: Dict[int, str] = {}
+    for item in classifications.get("classifications", []):
+        if isinstance(item, dict) and isinstance(item.get("paragraph_index"), int) and isinstance(item.get("csi_role"), str):
+            roles[item["paragraph_index"]] = item["csi_role"]
+
+    return {"source": source, "content_hash": hashes, "roles": roles}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Alignment
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _unique_anchors(
+    old_hashes: List[str], new_hashes: List[str], alo: int, ahi: int, blo: int, bhi: int
+) -> List[Tuple[int, int]]:
+    """
+    (old, new) pairs of hashes unique on both sides of the range, reduced to
+    the longest run increasing on both sides (patience sorting).
+    """
+    old_pos: Dict[str, int] = {}
+    old_count: Dict[str, int] = {}
+    for j in range(alo, ahi):
+        h = old_hashes[j]
+        old_count[h] = old_count.get(h, 0) + 1
+        old_pos[h] = j
+    new_count: Dict[str, int] = {}
+    for i in range(blo, bhi):
+        h = new_hashes[i]
+        new_count[h] = new_count.get(h, 0) + 1
+    pairs = [
+        (old_pos[new_hashes[i]], i) for i in range(blo, bhi)
+        if new_count[new_hashes[i]] == 1 and old_count.get(new_hashes[i]) == 1
+    ]
+    if not pairs:
+        return []
+
+    tails: List[int] = []        # old index ending the best run of each length
+    tail_at: List[int] = []      # position in pairs of that run's last pair
+    back: List[int] = [-1] * len(pairs)
+    for k, (j, _) in enumerate(pairs):
+        n = bisect_left(tails, j)
+        back[k] = tail_at[n - 1] if n else -1
+        if n == len(tails):
+            tails.append(j)
+            tail_at.append(k)
+        else:
+            tails[n] = j
+            tail_at[n] = k
+    run: List[Tuple[int, int]] = []
+    k = tail_at[-1]
+    while k != -1:
+        run.append(pairs[k])
+        k = back[k]
+    run.reverse()
+    return run
+
+
+def _diff_paragraphs(old_hashes: List[str], new_hashes: List[str]) -> Dict[int, int]:
+    """Order-preserving alignment, new index -> old index."""
+    aligned: Dict[int, int] = {}
+    ranges = [(0, len(old_hashes), 0, len(new_hashes))]
+    while ranges:
+        alo, ahi, blo, bhi = ranges.pop()
+        while alo < ahi and blo < bhi and old_hashes[alo] == new_hashes[blo]:
+            aligned[blo] = alo
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and old_hashes[ahi - 1] == new_hashes[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            aligned[bhi] = ahi
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(old_hashes, new_hashes, alo, ahi, blo, bhi)
+        if anchors:
+            # Gaps between anchors get the same treatment (they may hold
+            # hashes unique within the gap)
+            for j, i in anchors:
+                aligned[i] = j
+                ranges.append((alo, j, blo, i))
+                alo, blo = j + 1, i + 1
+            ranges.append((alo, ahi, blo, bhi))
+            continue
+
+        matcher = SequenceMatcher(None, old_hashes[alo:ahi], new_hashes[blo:bhi], autojunk=False)
+        for block in matcher.get_matching_blocks():
+            for k in range(block.size):
+                aligned[blo + block.b + k] = alo + block.a + k
+    return aligned
+
+
+def align_paragraphs(old_hashes: List[str], new_hashes: List[str]) -> Dict[int, int]:
+    """new paragraph_index -> old paragraph_index for every unchanged paragraph."""
+    aligned = _diff_paragraphs(old_hashes, new_hashes)
+
+    # Moved paragraphs: unique on both sides and moved together with a neighbour
+    old_unique: Dict[str, int] = {}
+    old_seen: Dict[str, int] = {}
+    for j, h in enumerate(old_hashes):
+        old_seen[h] = old_seen.get(h, 0) + 1
+        old_unique[h] = j
+    new_seen: Dict[str, int] = {}
+    for h in new_hashes:
+        new_seen[h] = new_seen.get(h, 0) + 1
+
+    taken = set(aligned.values())
+    moved: Dict[int, int] = {}
+    for i, h in enumerate(new_hashes):
+        if i in aligned or old_seen.get(h) != 1 or new_seen[h] != 1:
+            continue
+        j = old_unique[h]
+        if j in taken:
+            continue
+        before = i > 0 and j > 0 and new_hashes[i - 1] == old_hashes[j - 1]
+        after = i + 1 < len(new_hashes) and j + 1 < len(old_hashes) and new_hashes[i + 1] == old_hashes[j + 1]
+        if before or after:
+            moved[i] = j
+    aligned.update(moved)
+    return aligned
+
+
+def carry_over_classifications(previous: Dict[str, Any], paragraph_index: ParagraphIndex) -> Dict[str, Any]:
+    """
+    Align paragraph_index (the new revision) with a loaded previous revision.
+
+    Returns a classifications dict for the unchanged paragraphs, renumbered to
+    the new paragraph_index, plus the alignment itself ("aligned": new ->
+    old). Aligned paragraphs the previous run left unclassified stay
+    unclassified and are not sent to the LLM again ("unclassified").
+    """
+    new_hashes = [rec.content_hash for rec in paragraph_index]
+    aligned = align_paragraphs(previous["content_hash"], new_hashes)
+    roles = previous["roles"]
+    items = [
+        {"paragraph_index": new, "csi_role": roles[old]}
+        for new, old in sorted(aligned.items())
+        if old in roles
+    ]
+    return {
+        "classifications": items,
+        "notes": [
+            f"Carried over from {previous['source']}: {len(items)} classifications, "
+            f"{len(aligned)} of {len(new_hashes)} paragraphs unchanged"
+        ],
+        "unclassified": [new for new, old in sorted(aligned.items()) if old not in roles],
+        "aligned": aligned,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Merge
+# ─────────────────────────────────────────────────────────────────────────────
+
+def merge_classifications(*sources: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    One classifications dict from several, in paragraph order. For a
+    paragraph classified by more than one source, the last source wins
+    (pass carried-over roles first and fresh LLM output last).
+    """
+    by_index: Dict[int, Dict[str, Any]] = {}
+    notes: List[Any] = []
+    for source in sources:
+        if not source:
+            continue
+        for item in source.get("classifications", []):
+            if isinstance(item, dict) and isinstance(item.get("paragraph_index"), int):
+                by_index[item["paragraph_index"]] = item
+        notes.extend(source.get("notes", []))
+    return {
+        "classifications": [by_index[i] for i in sorted(by_index)],
+        "notes": notes,
+    }
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+role_cache.py — Cross-document CSI role cache
+
+MasterSpec-derived sections repeat the same article headings and standard
+paragraphs ("QUALITY ASSURANCE", "SUBMITTALS", "Product Data: For each type
+of product.") across a whole project book. Every successful apply records,
+for each paragraph with text, its normalized text plus a small structural
+context -> the role it was applied with:
+
+    (text, ilvl, previous role) -> csi_role ("" = left unclassified)
+
+where text is whitespace-collapsed and case-folded, ilvl is the paragraph's
+explicit numPr level ("" if none) and previous role is the role of the
+nearest preceding classified paragraph ("" at the start of the document).
+Only what the LLM itself returned is recorded: paragraphs the slim bundle
+would not show (record() is given the bundle's own eligibility test) and
+paragraphs that were pre-filled (carried over, cached, rule-classified) are
+skipped, though pre-filled roles still count as the previous role.
+
+build_phase2_slim_bundle looks paragraphs up while walking the document and
+pre-fills the roles it finds, so they never reach the LLM. While every
+earlier paragraph's role is known (carried over or cached) the full key is
+used. Once a paragraph is left to the LLM the previous role is unknown, and
+only (text, ilvl) is matched: it hits if every context it was recorded in
+agreed on the role. A key recorded with more than one role is a miss.
+
+A role needs min_hits observations (documents it was applied in), ""
+(leave unclassified) needs min_skip_hits: one empty or truncated LLM
+response must not hide paragraphs from every later bundle.
+
+The cache is a single SQLite file, safe to share between batch workers.
+
+Usage:
+    with RoleCache(Path("_phase2_role_cache.sqlite")) as cache:
+        role = cache.lookup("QUALITY ASSURANCE", None, "PART")
+        cache.record(paragraph_index, llm_classifications, prefilled=[carried, cached])
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from paragraph_index import ParagraphIndex, ParagraphRecord
+
+
+ROLE_CACHE_NAME = "_phase2_role_cache.sqlite"
+CACHED_CLASSIFICATIONS_NAME = "phase2_cached_classifications.json"
+DEFAULT_MIN_SKIP_HITS = 3
+
+_WS_RX = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS role_cache (
+    text TEXT NOT NULL,
+    ilvl TEXT NOT NULL,
+    prev_role TEXT NOT NULL,
+    role TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (text, ilvl, prev_role, role)
+)
+"""
+
+
+def normalize_paragraph_text(text: str) -> str:
+    return _WS_RX.sub(" ", text).strip().casefold()
+
+
+def default_role_cache_path(docx_path: Path) -> Path:
+    return Path(docx_path).resolve().parent / ROLE_CACHE_NAME
+
+
+class RoleCache:
+    """(normalized text, ilvl, previous role) -> confirmed csi_role, in SQLite."""
+
+    def __init__(self, path: Path, min_hits: int = 1, min_skip_hits: int = DEFAULT_MIN_SKIP_HITS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.min_hits = min_hits
+        self.min_skip_hits = min_skip_hits
+        self._db = sqlite3.connect(str(self.path), timeout=30)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def __enter__(self) -> "RoleCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def lookup(self, text: str, ilvl: Optional[str], prev_role: Optional[str]) -> Optional[str]:
+        """
+        The role recorded for this key ("" = leave unclassified), or None if
+        unseen, ambiguous or below min_hits (min_skip_hits for ""). prev_role
+        None means unknown.
+        """
+        key = (normalize_paragraph_text(text), ilvl or "")
+        rows = []
+        if prev_role is not None:
+            rows = self._db.execute(
+                "SELECT role, hits FROM role_cache WHERE text = ? AND ilvl = ? AND prev_role = ?",
+                key + (prev_role,),
+            ).fetchall()
+        if not rows:
+            rows = self._db.execute(
+                "SELECT role, SUM(hits) FROM role_cache WHERE text = ? AND ilvl = ? GROUP BY role",
+                key,
+            ).fetchall()
+        if len(rows) != 1:
+            return None
+        role, hits = rows[0]
+        if hits < (self.min_hits if role else self.min_skip_hits):
+            return None
+        return role
+
+    def record(
+        self,
+        paragraph_index: ParagraphIndex,
+        classifications: Dict[str, Any],
+        eligible: Optional[Callable[[ParagraphRecord], bool]] = None,
+        prefilled: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """
+        Record the roles the LLM (classifications) gave the paragraphs of the
+        document paragraph_index indexes, and "" for the paragraphs it left
+        out. eligible(rec) tells which paragraphs the slim bundle would show
+        (by default: any with text); the others are skipped entirely.
+        prefilled are the classifications dicts merged in at apply time; their
+        paragraphs ("classifications" and "unclassified") never reached the
+        LLM and are not recorded. A response with no classifications at all is
+        treated as failed and records nothing.
+        Returns the number of distinct keys recorded.
+        """
+        roles = _roles_by_index(classifications, len(paragraph_index))
+        if not roles:
+            return 0
+        prefilled_roles: Dict[int, str] = {}
+        skipped: Set[int] = set()
+        for source in prefilled or []:
+            prefilled_roles.update(_roles_by_index(source, len(paragraph_index)))
+            skipped.update(i for i in source.get("unclassified", []) if isinstance(i, int))
+        skipped.update(prefilled_roles)
+
+        now = time.time()
+        # One observation per key per document: a paragraph repeated within
+        # a section is not extra confirmation
+        rows: Dict[tuple, tuple] = {}
+        prev_role = ""
+        for rec in paragraph_index:
+            text = normalize_paragraph_text(rec.text)
+            if not text or rec.contains_sectpr or (eligible is not None and not eligible(rec)):
+                continue
+            if rec.index in skipped:
+                prev_role = roles.get(rec.index) or prefilled_roles.get(rec.index) or prev_role
+                continue
+            role = roles.get(rec.index, "")
+            key = (text, rec.ilvl or "", prev_role, role)
+            rows[key] = key + (now,)
+            if role:
+                prev_role = role
+
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO role_cache (text, ilvl, prev_role, role, hits, last_seen) "
+                "VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (text, ilvl, prev_role, role) "
+                "DO UPDATE SET hits = hits + 1, last_seen = excluded.last_seen",
+                list(rows.values()),
+            )
+        return len(rows)
+
+
+def _roles_by_index(classifications: Dict[str, Any], paragraph_count: int) -> Dict[int, str]:
+    roles: Dict[int, str] = {}
+    for item in classifications.get("classifications", []):
+        if not isinstance(item, dict):
+            continue
+        idx, role = item.get("paragraph_index"), item.get("csi_role")
+        if isinstance(idx, int) and 0 <= idx < paragraph_count and isinstance(role, str):
+            roles[idx] = role
+    return roles
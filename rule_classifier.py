@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+rule_classifier.py — Deterministic fast path for unambiguous CSI paragraphs
+
+Many paragraphs need no LLM to classify: a "SECTION 23 05 13" line, a
+"PART 2 - PRODUCTS" heading, a "1.01 SUMMARY" article, a paragraph that
+already carries one of MasterSpec's outline styles (SCT, PRT, ART, PR1-PR3)
+or the very architect style registered for a role. Each rule yields a
+candidate role with a confidence; when several rules fire and disagree the
+paragraph is a conflict and gets a low confidence. Typed list labels ("A.",
+"1.", "a.") are only trusted at the outline level (ilvl) they belong to;
+without an ilvl they stay below the default threshold, and at another level
+they are a conflict.
+
+build_phase2_slim_bundle asks the classifier about every paragraph it would
+bundle. A candidate is accepted only if its role is in available_roles and
+its confidence reaches min_confidence; accepted paragraphs are pre-filled
+and left out of the bundle, everything else still goes to the LLM. Both
+outcomes are listed in the bundle's filter_report with their confidence.
+
+Usage:
+    classifier = RuleClassifier(available_roles, role_styles=arch_registry)
+    match = classifier.match(rec, cleaned_text)
+    if match and classifier.accepts(match):
+        ...
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from paragraph_index import ParagraphRecord
+
+
+RULE_CLASSIFICATIONS_NAME = "phase2_rule_classifications.json"
+DEFAULT_MIN_CONFIDENCE = 0.95
+
+# MasterSpec outline paragraph styles
+MASTERSPEC_STYLE_ROLES = {
+    "SCT": "SectionID",
+    "STT": "SectionTitle",
+    "PRT": "PART",
+    "ART": "ARTICLE",
+    "PR1": "PARAGRAPH",
+    "PR2": "SUBPARAGRAPH",
+    "PR3": "SUBSUBPARAGRAPH",
+}
+
+_PART_NAMES = ("GENERAL", "PRODUCTS", "EXECUTION")
+
+# Upper case only: "Section 23 05 00" in running text is a cross-reference
+_SECTION_ID_RX = re.compile(r"^SECTION\s+\d{2}\s?\d{2}\s?\d{2}(?:\.\d{2})?(?P<rest>.*)$")
+_PART_RX = re.compile(r"^PART\s+[1-3]\s*[-–—.:]?\s*(?:GENERAL|PRODUCTS|EXECUTION)$", re.I)
+_ARTICLE_RX = re.compile(r"^\d{1,2}\.\d{2}\s+(?P<title>\S.*)$")
+# Typed list labels and the outline level (numPr ilvl) each belongs at:
+# PART 0, ARTICLE 1, "A." 2, "1." 3, "a." 4
+_LABEL_RULES = (
+    (re.compile(r"^[A-Z]\.\s+\S"), "PARAGRAPH", "label_upper_letter", "2"),
+    (re.compile(r"^\d{1,2}\.\s+\S"), "SUBPARAGRAPH", "label_number", "3"),
+    (re.compile(r"^[a-z]\.\s+\S"), "SUBSUBPARAGRAPH", "label_lower_letter", "4"),
+)
+_CONFLICT = "conflict:"
+
+
+@dataclass(frozen=True)
+class RuleMatch:
+    role: str
+    confidence: float
+    rule: str
+
+
+class RuleClassifier:
+    """
+    Rule-based pre-classifier. available_roles None means all standard
+    roles. role_styles is the architect registry (role -> styleId); with it,
+    a paragraph already in a role's style is classified as that role.
+    """
+
+    def __init__(
+        self,
+        available_roles: Optional[List[str]] = None,
+        role_styles: Optional[Dict[str, str]] = None,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE
+    ):
+        if available_roles is None:
+            available_roles = list(MASTERSPEC_STYLE_ROLES.values())
+        self.available_roles = list(available_roles)
+        self.min_confidence = min_confidence
+        self._style_roles: Dict[str, str] = dict(MASTERSPEC_STYLE_ROLES)
+        for role, style_id in (role_styles or {}).items():
+            self._style_roles[style_id] = role
+
+    def accepts(self, match: RuleMatch) -> bool:
+        return match.role in self.available_roles and match.confidence >= self.min_confidence
+
+    def candidates(self, rec: ParagraphRecord, text: str) -> List[RuleMatch]:
+        """Every rule that fires for this paragraph (text is the bundle text)."""
+        found: List[RuleMatch] = []
+
+        style_role = self._style_roles.get(rec.pstyle or "")
+        if style_role:
+            rule = "masterspec_style" if rec.pstyle in MASTERSPEC_STYLE_ROLES else "architect_style"
+            found.append(RuleMatch(style_role, 0.99, f"{rule}:{rec.pstyle}"))
+
+        m = _SECTION_ID_RX.match(text)
+        if m:
+            # A title run into the same line is still mostly a SectionID line
+            found.append(RuleMatch("SectionID", 0.99 if not m.group("rest").strip() else 0.95, "section_number"))
+        elif _PART_RX.match(text):
+            found.append(RuleMatch("PART", 0.99, "part_heading"))
+        elif text.upper() in _PART_NAMES and rec.ilvl == "0":
+            found.append(RuleMatch("PART", 0.97, "part_name_level0"))
+        else:
+            m = _ARTICLE_RX.match(text)
+            if m:
+                title = m.group("title")
+                found.append(RuleMatch("ARTICLE", 0.98 if title.isupper() else 0.9, "article_number"))
+            else:
+                for rx, role, rule, ilvl in _LABEL_RULES:
+                    if rx.match(text):
+                        # A label alone is not enough: "A. Retain paragraph..."
+                        # notes look the same. Only trust it at its own level.
+                        if rec.ilvl == ilvl:
+                            found.append(RuleMatch(role, 0.96, rule))
+                        elif rec.ilvl is None:
+                            found.append(RuleMatch(role, 0.9, f"{rule}_no_ilvl"))
+                        else:
+                            found.append(RuleMatch(role, 0.5, f"{_CONFLICT}{rule}@ilvl{rec.ilvl}"))
+                        break
+        return found
+
+    def match(self, rec: ParagraphRecord, text: str) -> Optional[RuleMatch]:
+        """
+        The best candidate, or None if no rule fires. Rules that disagree, or
+        a rule contradicted by the paragraph's own ilvl, give a conflict match
+        (confidence 0.5) that is never accepted.
+        """
+        found = self.candidates(rec, text)
+        if not found:
+            return None
+        best = max(found, key=lambda c: c.confidence)
+        if len(found) == 1:
+            return best
+        if any(c.role != best.role or c.rule.startswith(_CONFLICT) for c in found):
+            return RuleMatch(best.role, 0.5, _CONFLICT + ",".join(f"{c.rule}={c.role}" for c in found))
+        return best
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+template_pack.py — Precompiled architect template pack
+
+Compiles one architect extract (arch_style_registry.json,
+arch_template_registry.json and word/styles.xml) into a single versioned JSON
+pack holding everything a Phase 2 run needs from the architect side:
+
+- role -> styleId mapping (the strict registry)
+- pre-materialized style blocks for every role style and its basedOn closure
+- numbering plan inputs (style -> numId, referenced abstractNum/num defs)
+- environment parts (docDefaults, theme, compat flags, font table)
+
+Packs are keyed by a hash of the source files, so a project book formatted
+against one template compiles it once and every later run just loads JSON.
+
+Usage:
+    python template_pack.py NVES_extracted --out nves.pack.json
+
+    from template_pack import load_or_compile_template_pack
+    pack = load_or_compile_template_pack(Path("NVES_extracted"))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from docx_decomposer import (
+    extract_style_block_raw,
+    load_arch_style_registry,
+    materialize_arch_style_block,
+    resolve_arch_extract_root,
+    _collect_style_deps_from_arch,
+)
+from numbering_importer import extract_used_num_ids_from_styles
+from style_index import StyleIndex
+
+
+TEMPLATE_PACK_VERSION = 1
+TEMPLATE_PACK_CACHE_DIRNAME = "_template_packs"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Source resolution + hashing
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _resolve_sources(arch_input: Path) -> Dict[str, Path]:
+    """
+    Accepts the same inputs as --phase2-arch-extract:
+      - extracted root folder (or its word folder)
+      - arch_style_registry.json directly
+    """
+    arch_input = Path(arch_input)
+    if arch_input.is_file() and arch_input.suffix.lower() == ".json":
+        style_registry = arch_input
+        arch_root = resolve_arch_extract_root(arch_input.parent)
+    else:
+        arch_root = resolve_arch_extract_root(arch_input)
+        style_registry = arch_root / "arch_style_registry.json"
+
+    return {
+        "arch_root": arch_root,
+        "style_registry": style_registry,
+        "template_registry": arch_root / "arch_template_registry.json",
+        "styles": arch_root / "word" / "styles.xml",
+    }
+
+
+def template_source_hash(arch_input: Path) -> str:
+    """Content hash of every architect file that feeds a pack."""
+    sources = _resolve_sources(arch_input)
+    h = hashlib.sha256(f"pack-v{TEMPLATE_PACK_VERSION}".encode("utf-8"))
+    for key in ("style_registry", "template_registry", "styles"):
+        p = sources[key]
+        h.update(key.encode("utf-8"))
+        if p.exists():
+            data = p.read_bytes()
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        else:
+            h.update(b"\x00missing")
+    return h.hexdigest()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Compile
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _environment_subset(env_registry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep only the arch_template_registry parts Phase 2 consumes. The full
+    numbering.xml text is dropped; the importer only reads the parsed
+    abstract_nums/nums lists.
+    """
+    subset: Dict[str, Any] = {
+        "doc_defaults": env_registry.get("doc_defaults", {}),
+        "theme": {"theme1_xml": env_registry.get("theme", {}).get("theme1_xml")},
+        "settings": {"compat": env_registry.get("settings", {}).get("compat", {})},
+        "fonts": {"font_table_xml": env_registry.get("fonts", {}).get("font_table_xml")},
+    }
+    if "numbering" in env_registry:
+        numbering = env_registry["numbering"]
+        subset["numbering"] = {
+            "abstract_nums": numbering.get("abstract_nums", []),
+            "nums": numbering.get("nums", []),
+        }
+    return subset
+
+
+def compile_template_pack(arch_input: Path, source_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compile an architect extract into a pack dict (see module docstring).
+    """
+    sources = _resolve_sources(arch_input)
+    arch_root = sources["arch_root"]
+
+    role_styles = load_arch_style_registry(Path(arch_input))
+    style_registry = json.loads(sources["style_registry"].read_text(encoding="utf-8"))
+    available_roles = sorted(style_registry.get("roles", {}).keys())
+
+    arch_styles_text = sources["styles"].read_text(encoding="utf-8")
+    arch_styles = StyleIndex(arch_styles_text)
+
+    # Dependency closure per role style, and the union we pre-materialize
+    dependencies: Dict[str, List[str]] = {}
+    closure: set = set()
+    for sid in sorted(set(role_styles.values())):
+        deps: set = set()
+        _collect_style_deps_from_arch(arch_styles, sid, deps)
+        dependencies[sid] = sorted(deps)
+        closure |= deps
+
+    styles: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for sid in sorted(closure):
+        blk = extract_style_block_raw(arch_styles, sid)
+        if not blk:
+            missing.append(sid)
+            continue
+        # numPr remap/strip happens at import time and only touches <w:numPr>,
+        # so materializing first yields the same block the live import builds.
+        styles[sid] = {
+            "block": materialize_arch_style_block(blk, sid, arch_styles),
+            "has_numpr": "<w:numPr" in blk,
+        }
+
+    style_numids = {
+        sid: num_id
+        for sid, num_id in extract_used_num_ids_from_styles(arch_styles_text).items()
+        if sid in closure
+    }
+
+    template_registry = None
+    if sources["template_registry"].exists():
+        env_registry = json.loads(sources["template_registry"].read_text(encoding="utf-8"))
+        template_registry = _environment_subset(env_registry)
+
+    return {
+        "pack_version": TEMPLATE_PACK_VERSION,
+        "source_hash": source_hash or template_source_hash(arch_input),
+        "arch_root": str(arch_root),
+        "role_styles": role_styles,
+        "available_roles": available_roles,
+        "dependencies": dependencies,
+        "styles": styles,
+        "missing_style_ids": missing,
+        "style_numids": style_numids,
+        "template_registry": template_registry,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Read / write
+# ─────────────────────────────────────────────────────────────────────────────
+
+def write_template_pack(pack: Dict[str, Any], out_path: Path) -> Path:
+    """Write atomically so concurrent runs never see a partial pack."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_text(json.dumps(pack, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def load_template_pack(pack_path: Path) -> Dict[str, Any]:
+    pack = json.loads(Path(pack_path).read_text(encoding="utf-8"))
+    version = pack.get("pack_version") if isinstance(pack, dict) else None
+    if version != TEMPLATE_PACK_VERSION:
+        raise ValueError(
+            f"Template pack {pack_path} has version {version!r}; "
+            f"expected {TEMPLATE_PACK_VERSION}. Recompile it with template_pack.py."
+        )
+    return pack
+
+
+def default_pack_cache_dir(arch_input: Path) -> Path:
+    return _resolve_sources(arch_input)["arch_root"] / TEMPLATE_PACK_CACHE_DIRNAME
+
+
+def workspace_pack_cache_dir(docx_path: Path) -> Path:
+    """Pack cache next to the document being formatted (the arch extract may be read-only)."""
+    return Path(docx_path).resolve().parent / TEMPLATE_PACK_CACHE_DIRNAME
+
+
+def load_or_compile_template_pack(
+    arch_input: Path,
+    cache_dir: Optional[Path] = None,
+    log: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Return the pack for arch_input, compiling and caching it on first use.
+    Cache entries are named by source hash, so edits to the template simply
+    produce a new entry. cache_dir defaults to the arch extract's own
+    _template_packs; if it cannot be written the pack is used in memory only.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else default_pack_cache_dir(arch_input)
+    source_hash = template_source_hash(arch_input)
+    pack_path = cache_dir / f"arch_template_pack_{source_hash[:24]}.json"
+
+    if pack_path.exists():
+        try:
+            pack = load_template_pack(pack_path)
+            if pack.get("source_hash") == source_hash:
+                if log is not None:
+                    log.append(f"Loaded template pack: {pack_path}")
+                return pack
+        except (OSError, ValueError):
+            pass
+
+    pack = compile_template_pack(arch_input, source_hash=source_hash)
+    try:
+        write_template_pack(pack, pack_path)
+    except OSError as e:
+        if log is not None:
+            log.append(f"WARNING: template pack not cached ({pack_path}: {e}); using it in memory")
+        return pack
+    if log is not None:
+        log.append(f"Compiled template pack: {pack_path}")
+    return pack
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compile an architect extract into a Phase 2 template pack"
+    )
+    parser.add_argument("arch_extract", help="Architect extracted folder (or arch_style_registry.json)")
+    parser.add_argument("--out", default=None, help="Pack path (default: cached under the extract)")
+    args = parser.parse_args()
+
+    arch_input = Path(args.arch_extract)
+    if args.out:
+        pack = compile_template_pack(arch_input)
+        out_path = write_template_pack(pack, Path(args.out))
+    else:
+        log: List[str] = []
+        pack = load_or_compile_template_pack(arch_input, log=log)
+        print("\n".join(log))
+        out_path = None
+
+    print(f"Template pack: {len(pack['styles'])} styles, source hash {pack['source_hash'][:12]}")
+    if out_path:
+        print(f"Written: {out_path}")
+
+
+if __name__ == "__main__":
+    main()